@@ -0,0 +1,362 @@
+# Importing the necessary Python libraries
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Importing the per-movie enrichment stages
+from get_tmdb_data import get_tmdb_record, get_tmdb_records, TMDB_COLUMNS
+from get_imdb_data import get_imdb_fields, get_imdb_records, IMDB_COLUMNS
+from get_omdb_data import get_omdb_fields, get_omdb_records, OMDB_COLUMNS
+from get_rt_data import get_rt_fields, get_rt_records, RT_COLUMNS
+from record_streams import iter_records, records_to_dataframe
+
+
+
+## RATE LIMITING
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the default request rate (requests per second) allowed against each provider
+DEFAULT_RATE_LIMITS = {
+    'tmdb': 20.0,
+    'imdb': 5.0,
+    'omdb': 10.0,
+    'rt': 2.0
+}
+
+# Defining the column order of the enriched data, matching the sequential get_*_data passes
+ENRICHED_COLUMNS = TMDB_COLUMNS + IMDB_COLUMNS + OMDB_COLUMNS + RT_COLUMNS
+
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how many requests per second are sent to one provider
+
+    Every acquire takes one token, and tokens refill continuously at the given rate up to the bucket's capacity. A caller
+    that finds the bucket empty reserves the next token and sleeps until it is due, so waiting callers are served in
+    the order they arrived and the long run rate never exceeds the limit.
+
+    Args:
+        - rate (float): Number of requests allowed per second
+        - capacity (float): Largest burst allowed after a quiet period (defaults to a single request, so no window of one
+          second ever sees more than rate + 1 requests)
+    """
+
+    def __init__(self, rate, capacity = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+
+        # Instantiating a full bucket and the counters
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self.acquired = 0
+        self.waited_seconds = 0.0
+
+    def acquire(self):
+        """
+        Taking a token, sleeping until one is available
+
+        Returns:
+            - wait_seconds (float): How long the caller had to wait
+        """
+
+        with self._lock:
+            # Refilling the tokens accrued since the last call and taking one, possibly going into debt
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait_seconds = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+            # Updating the counters
+            self.acquired += 1
+            self.waited_seconds += wait_seconds
+
+        # Sleeping outside the lock so other callers can reserve their own tokens meanwhile
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+        return wait_seconds
+
+    def stats(self):
+        with self._lock:
+            return {'rate': self.rate, 'acquired': self.acquired, 'waited_seconds': round(self.waited_seconds, 3)}
+
+
+
+def build_rate_limiters(rate_limits = DEFAULT_RATE_LIMITS):
+    """
+    Building one token bucket per provider, keyed by the provider names cached_fetch uses
+
+    Args:
+        - rate_limits (dict): Provider ("tmdb", "imdb", "omdb", "rt") -> requests per second, where None or 0 means unlimited
+
+    Returns:
+        - rate_limiters (dict): Provider -> TokenBucket, with the TMDb search and details calls sharing the TMDb quota
+    """
+
+    rate_limiters = {provider: TokenBucket(rate) for provider, rate in rate_limits.items() if rate}
+    if 'tmdb' in rate_limiters:
+        rate_limiters['tmdb_search'] = rate_limiters['tmdb']
+
+    return rate_limiters
+
+
+
+## ENRICHMENT ENGINE
+## ---------------------------------------------------------------------------------------------------------------------
+def stream_enriched_records(movies, provider_clients, metadata_cache = None, title_index = None, rate_limiters = None):
+    """
+    Chaining the four enrichment stages into one stream that takes each movie through every provider before the next
+
+    Args:
+        - movies (iterable): Dictionaries holding each movie's "movie_name", "biehn_scale_rating" and "biehn_yes_or_no"
+        - provider_clients (ProviderClients): The long-lived provider clients
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - title_index (TitleIndex): Optional local title index consulted before the TMDb search
+        - rate_limiters (dict): Optional provider -> rate limiter (see build_rate_limiters)
+
+    Returns:
+        - records (generator): One fully enriched dictionary per movie found on TMDb, holding every column of ENRICHED_COLUMNS
+    """
+
+    records = get_tmdb_records(movies, provider_clients.tmdb_search, provider_clients.tmdb_movies, metadata_cache, title_index, rate_limiters)
+    records = get_imdb_records(records, provider_clients.imdb_search, provider_clients.imdb_dataset, metadata_cache, rate_limiters)
+    records = get_omdb_records(records, provider_clients.omdb_client, metadata_cache, rate_limiters)
+
+    return get_rt_records(records, metadata_cache, rate_limiters)
+
+
+
+class EnrichmentEngine:
+    """
+    Enriching the new movies with TMDb, IMDb, OMDb and Rotten Tomatoes data concurrently on a bounded worker pool
+
+    Instead of four sequential passes over the whole DataFrame, every movie flows through its own pipeline: as soon as
+    its TMDb details (and so its IMDb ID) arrive, its IMDb and OMDb lookups are queued, and its Rotten Tomatoes scrape is
+    queued as soon as OMDb has returned the critic score it is checked against. Only a bounded number of movies are in
+    the pipeline at once so downstream stages of started movies are not stuck behind the TMDb lookups of every other
+    movie. Each provider's requests go through its token bucket so the pool never exceeds the API quotas.
+
+    A movie whose lookups raise is reported and left out of the result. Since the delta is taken against the previous
+    run's output, it is picked up again on the next run. With a journal, every finished stage is checkpointed as it
+    completes and stages already in the journal are reused, so a resumed run only redoes the unfinished work.
+
+    Args:
+        - provider_clients (ProviderClients): The long-lived clients shared by all workers
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - title_index (TitleIndex): Optional local title index consulted before the TMDb search
+        - max_workers (int): Number of worker threads making provider calls (1 streams the movies one by one on the calling thread)
+        - rate_limiters (dict): Optional provider -> rate limiter (see build_rate_limiters)
+        - max_in_flight (int): Number of movies allowed in the pipeline at once (defaults to twice max_workers)
+        - journal (EnrichmentJournal): Optional journal checkpointing every finished stage of every movie
+    """
+
+    def __init__(self, provider_clients, metadata_cache = None, title_index = None, max_workers = 8, rate_limiters = None,
+                 max_in_flight = None, journal = None):
+        self.provider_clients = provider_clients
+        self.metadata_cache = metadata_cache
+        self.title_index = title_index
+        self.max_workers = max_workers
+        self.rate_limiters = rate_limiters
+        self.max_in_flight = max_in_flight or 2 * max_workers
+        self.journal = journal
+
+        # Instantiating the counters of the last run
+        self._stats = {}
+        self._reused_stages = 0
+        self._reused_lock = threading.Lock()
+
+    def _checkpointed(self, movie_name, stage, stage_func):
+        # Reusing the stage's journaled result if there is one, otherwise running it and journaling the result
+        if self.journal is not None:
+            found, fields = self.journal.get(movie_name, stage)
+            if found:
+                with self._reused_lock:
+                    self._reused_stages += 1
+                return dict(fields) if fields is not None else None
+
+        fields = stage_func()
+        if self.journal is not None:
+            self.journal.record(movie_name, stage, fields)
+
+        return fields
+
+    def _tmdb_stage(self, movie):
+        record = self._checkpointed(movie['movie_name'], 'tmdb', lambda: get_tmdb_record(
+            movie['movie_name'], movie['biehn_scale_rating'], movie['biehn_yes_or_no'], self.provider_clients.tmdb_search,
+            self.provider_clients.tmdb_movies, self.metadata_cache, self.title_index, self.rate_limiters))
+
+        # Taking the review fields from the current review, in case they were edited since the stage was journaled
+        if record is not None:
+            record.update(biehn_scale_rating = movie['biehn_scale_rating'], biehn_yes_or_no = movie['biehn_yes_or_no'])
+
+        return record
+
+    def _imdb_stage(self, record):
+        return self._checkpointed(record['movie_name'], 'imdb', lambda: get_imdb_fields(
+            record['movie_name'], record['imdb_id'], self.provider_clients.imdb_search, self.provider_clients.imdb_dataset,
+            self.metadata_cache, self.rate_limiters))
+
+    def _omdb_stage(self, record):
+        return self._checkpointed(record['movie_name'], 'omdb', lambda: get_omdb_fields(
+            record['movie_name'], record['imdb_id'], self.provider_clients.omdb_client, self.metadata_cache, self.rate_limiters))
+
+    def _rt_stage(self, record):
+        return self._checkpointed(record['movie_name'], 'rt', lambda: get_rt_fields(
+            record['movie_name'], record['rt_critic_score'], self.metadata_cache, self.rate_limiters))
+
+    def _stream_records(self, movies, outcomes):
+        # Taking each movie through every (checkpointed) stage before starting the next one, leaving out any movie whose
+        # stages fail (as the threaded pipeline does) and counting the movies not found or failed into outcomes
+        for movie in movies:
+            stage = 'tmdb'
+            try:
+                record = self._tmdb_stage(movie)
+                if record is None:
+                    outcomes['not_found'] += 1
+                    continue
+                for stage, stage_func in [('imdb', self._imdb_stage), ('omdb', self._omdb_stage), ('rt', self._rt_stage)]:
+                    record.update(stage_func(record))
+            except Exception as e:
+                print(f'Failed to enrich {movie["movie_name"]} ({stage}): {e}')
+                outcomes['failed'] += 1
+                continue
+            yield record
+
+    def enrich(self, df_new_data):
+        """
+        Enriching every movie of the delta
+
+        Args:
+            - df_new_data (Pandas DataFrame): A DataFrame containing the movies that need new data collected
+
+        Returns:
+            - df_enriched (Pandas DataFrame): One row per movie found on TMDb with every column of ENRICHED_COLUMNS, in input order
+        """
+
+        print(f'Gathering data from TMDb, IMDb, OMDb and Rotten Tomatoes with {self.max_workers} workers...')
+        start = time.perf_counter()
+        self._reused_stages = 0
+
+        # Streaming the movies through every stage on this thread when there is no pool to spread them over
+        if self.max_workers <= 1:
+            outcomes = {'not_found': 0, 'failed': 0}
+            df_enriched = records_to_dataframe(self._stream_records(iter_records(df_new_data), outcomes), ENRICHED_COLUMNS)
+            self._stats = {'movies': len(df_new_data), 'enriched': len(df_enriched), 'not_found': outcomes['not_found'],
+                           'failed': outcomes['failed'], 'reused_stages': self._reused_stages,
+                           'seconds': round(time.perf_counter() - start, 3)}
+            print(f'Data collection complete! Enriched {len(df_enriched)} of {len(df_new_data)} movies in {self._stats["seconds"]:.1f}s.')
+            return df_enriched
+
+        # Instantiating the per-movie results and pipeline bookkeeping
+        movies = df_new_data[['movie_name', 'biehn_scale_rating', 'biehn_yes_or_no']].to_dict('records')
+        records = [None] * len(movies)
+        pending_branches = [0] * len(movies)
+        failures = {}
+        lock = threading.Lock()
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        executor = ThreadPoolExecutor(max_workers = self.max_workers, thread_name_prefix = 'enrichment')
+
+        def finish_branch(position):
+            # Releasing the movie's pipeline slot once both its IMDb branch and its OMDb -> RT branch are done
+            with lock:
+                pending_branches[position] -= 1
+                finished = pending_branches[position] <= 0
+            if finished:
+                in_flight.release()
+
+        def fail(position, stage, error):
+            with lock:
+                if position not in failures:
+                    print(f'Failed to enrich {movies[position]["movie_name"]} ({stage}): {error}')
+                failures[position] = f'{stage}: {error}'
+
+        def run_tmdb(position):
+            try:
+                tmdb_record = self._tmdb_stage(movies[position])
+            except Exception as e:
+                tmdb_record = None
+                fail(position, 'tmdb', e)
+
+            # Finishing movies without TMDb details straight away, otherwise fanning out to the IMDb and OMDb stages
+            if tmdb_record is None:
+                finish_branch(position)
+                return
+            records[position] = tmdb_record
+            with lock:
+                pending_branches[position] = 2
+            executor.submit(run_imdb, position)
+            executor.submit(run_omdb, position)
+
+        def run_imdb(position):
+            record = records[position]
+            try:
+                record.update(self._imdb_stage(record))
+            except Exception as e:
+                fail(position, 'imdb', e)
+            finish_branch(position)
+
+        def run_omdb(position):
+            record = records[position]
+            try:
+                record.update(self._omdb_stage(record))
+            except Exception as e:
+                fail(position, 'omdb', e)
+                finish_branch(position)
+                return
+
+            # Scraping Rotten Tomatoes now that the critic score it is checked against is known
+            executor.submit(run_rt, position)
+
+        def run_rt(position):
+            record = records[position]
+            try:
+                record.update(self._rt_stage(record))
+            except Exception as e:
+                fail(position, 'rt', e)
+            finish_branch(position)
+
+        # Feeding the movies into the pipeline, waiting for a free slot before starting each one
+        for position in range(len(movies)):
+            in_flight.acquire()
+            pending_branches[position] = 1
+            executor.submit(run_tmdb, position)
+
+        # Waiting for every slot to be handed back, i.e. for the last movies to finish
+        for _ in range(self.max_in_flight):
+            in_flight.acquire()
+        executor.shutdown()
+
+        # Assembling the movies that were found and fully enriched, in their original order
+        enriched = [record for position, record in enumerate(records) if record is not None and position not in failures]
+        df_enriched = records_to_dataframe(enriched, ENRICHED_COLUMNS)
+
+        # Recording the run's counters
+        self._stats = {'movies': len(movies),
+                       'enriched': len(enriched),
+                       'not_found': sum(record is None for position, record in enumerate(records) if position not in failures),
+                       'failed': len(failures),
+                       'reused_stages': self._reused_stages,
+                       'seconds': round(time.perf_counter() - start, 3),
+                       'rate_limiters': {provider: rate_limiter.stats() for provider, rate_limiter in (self.rate_limiters or {}).items()
+                                         if provider != 'tmdb_search'}}
+
+        print(f'Data collection complete! Enriched {len(enriched)} of {len(movies)} movies in {self._stats["seconds"]:.1f}s.')
+
+        return df_enriched
+
+    def stats(self):
+        """
+        Reporting the counters of the last run
+
+        Returns:
+            - stats (dict): Movies enriched, not found and failed, stages reused from the journal, the duration and each
+              provider's rate limiter counters, plus the journal's counters when there is one
+        """
+
+        stats = dict(self._stats)
+        if self.journal is not None:
+            stats['journal'] = self.journal.stats()
+
+        return stats
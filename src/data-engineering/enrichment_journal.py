@@ -0,0 +1,131 @@
+# Importing the necessary Python libraries
+import os
+import json
+import time
+import threading
+
+
+
+## JOURNAL SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining where the journal lives under the output directory
+JOURNAL_DIR = 'checkpoints'
+JOURNAL_FILE = 'enrichment_journal.jsonl'
+
+
+
+def to_json_value(value):
+    # Converting the NumPy scalars the stages produce (e.g. np.int64 budgets) into plain JSON values
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+
+class EnrichmentJournal:
+    """
+    Append-only JSONL journal checkpointing the result of every enrichment stage of every movie
+
+    Each finished stage is appended as one complete line ({"movie_name", "stage", "fields", "recorded_at"}) with a
+    single write and flushed to disk before the stage counts as done, so a crash can at worst leave one torn final line,
+    which is ignored when the journal is read back. Reopening the journal with resume = True replays it so the stages
+    it holds are reused instead of fetched again; otherwise the previous journal is kept aside and a fresh one started.
+
+    Args:
+        - path (str): Path of the JSONL journal file
+        - resume (bool): Whether to reuse the stages recorded by a previous, interrupted run
+        - fsync (bool): Whether to fsync after every line, so checkpoints also survive a machine crash
+    """
+
+    def __init__(self, path, resume = False, fsync = True):
+        self.path = path
+        self.fsync = fsync
+
+        # Instantiating the recorded stages (movie_name -> stage -> fields) and the counters
+        self._lock = threading.Lock()
+        self._stages = {}
+        self.replayed = 0
+        self.torn_lines = 0
+        self.recorded = 0
+        self._torn_tail = False
+
+        # Replaying the previous journal, or setting it aside to start a new one
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+        if os.path.exists(path):
+            if resume:
+                self._replay()
+            else:
+                os.replace(path, f'{path}.previous')
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+        # Ending a torn final line so the next checkpoint starts on a line of its own
+        if self._torn_tail:
+            os.write(self._fd, b'\n')
+
+    def _replay(self):
+        with open(self.path, 'r') as f:
+            for line in f:
+                self._torn_tail = not line.endswith('\n')
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Skipping a line torn by a crash mid-write
+                    self.torn_lines += 1
+                    continue
+                self._stages.setdefault(entry['movie_name'], {})[entry['stage']] = entry['fields']
+                self.replayed += 1
+
+    def get(self, movie_name, stage):
+        """
+        Getting a stage result recorded for a movie
+
+        Args:
+            - movie_name (str): The name of the movie
+            - stage (str): The enrichment stage ("tmdb", "imdb", "omdb" or "rt")
+
+        Returns:
+            - found (bool): Whether the stage was recorded
+            - fields (dict): The fields the stage returned (None for a title TMDb had no result for)
+        """
+
+        with self._lock:
+            stages = self._stages.get(movie_name, {})
+            return stage in stages, stages.get(stage)
+
+    def record(self, movie_name, stage, fields):
+        """
+        Appending a finished stage to the journal
+
+        Args:
+            - movie_name (str): The name of the movie
+            - stage (str): The enrichment stage ("tmdb", "imdb", "omdb" or "rt")
+            - fields (dict): The fields the stage returned (None for a title TMDb had no result for)
+        """
+
+        line = json.dumps({'movie_name': movie_name, 'stage': stage, 'fields': fields, 'recorded_at': round(time.time(), 3)},
+                          default = to_json_value) + '\n'
+
+        with self._lock:
+            # Writing the whole line in one call so concurrent stages never interleave within a line
+            os.write(self._fd, line.encode('utf-8'))
+            if self.fsync:
+                os.fsync(self._fd)
+            self._stages.setdefault(movie_name, {})[stage] = dict(fields) if fields is not None else None
+            self.recorded += 1
+
+    def stats(self):
+        with self._lock:
+            return {'path': self.path, 'movies': len(self._stages), 'replayed': self.replayed, 'torn_lines': self.torn_lines,
+                    'recorded': self.recorded}
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def discard(self):
+        # Removing the journal once the run's output has been saved, as nothing is left to resume
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,13 +1,82 @@
 import numpy as np
 import pandas as pd
 from imdb import IMDb
+from metadata_cache import cached_fetch
+from record_streams import iter_records, records_to_dataframe
 
-def get_imdb_data(df_new_data):
+# Defining the columns the IMDb stage adds
+IMDB_COLUMNS = ['imdb_rating', 'imdb_votes', 'year']
+
+def get_imdb_fields(movie_name, imdb_id, imdb_search, imdb_dataset = None, metadata_cache = None, rate_limiters = None):
+    """
+    Retrieving the IMDb rating, vote count and year of a single movie
+
+    Args:
+        - movie_name (str): The name of the movie
+        - imdb_id (str): The IMDb ID of the movie (e.g. "tt0133093")
+        - imdb_search (obj): The IMDbPY search object
+        - imdb_dataset (IMDbDatasetIndex): Optional offline index built from the IMDb bulk dumps, consulted before IMDbPY
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - rate_limiters (dict): Optional provider -> rate limiter consulted before every IMDbPY request
+
+    Returns:
+        - imdb_fields (dict): The movie's "imdb_rating", "imdb_votes" and "year"
+    """
+
+    # Reading the offline index first and only falling back to IMDbPY for titles it does not have
+    imdb_details = imdb_dataset.get(imdb_id) if imdb_dataset is not None else None
+
+    # Using IMDbPY to get movie details using the IMDb ID with the first two "tt" characters removed
+    if imdb_details is None:
+        imdb_details = dict(cached_fetch(metadata_cache, 'imdb', imdb_id, lambda: imdb_search.get_movie(imdb_id[2:]), rate_limiters))
+
+    # Adding imdb_rating and imdb_votes if available
+    imdb_fields = {'imdb_rating': np.nan, 'imdb_votes': np.nan}
+    if 'rating' not in imdb_details.keys():
+        print(f'The following movie has no IMDb rating: {movie_name}.')
+    else:
+        imdb_fields['imdb_rating'] = imdb_details['rating']
+    if 'votes' not in imdb_details.keys():
+        imdb_fields['imdb_rating'] = np.nan
+    else:
+        imdb_fields['imdb_votes'] = imdb_details['votes']
+
+    # Adding the year the movie debuted
+    imdb_fields['year'] = imdb_details['year']
+
+    return imdb_fields
+
+
+
+def get_imdb_records(records, imdb_search, imdb_dataset = None, metadata_cache = None, rate_limiters = None):
+    """
+    Streaming the records of the movies with their IMDb rating, vote count and year added
+
+    Args:
+        - records (iterable): Dictionaries holding at least each movie's "movie_name" and "imdb_id"
+        - imdb_search (obj): The IMDbPY search object
+        - imdb_dataset (IMDbDatasetIndex): Optional offline index built from the IMDb bulk dumps, consulted before IMDbPY
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - rate_limiters (dict): Optional provider -> rate limiter consulted before every request
+
+    Returns:
+        - records (generator): The same dictionaries, one at a time, updated with every column of IMDB_COLUMNS
+    """
+
+    for record in records:
+        record.update(get_imdb_fields(record['movie_name'], record['imdb_id'], imdb_search, imdb_dataset, metadata_cache, rate_limiters))
+        yield record
+
+
+
+def get_imdb_data(df_new_data, metadata_cache = None, provider_clients = None):
     """
     Retrieving the appropriate data from the Internet Movie Database (IMDb)
 
     Args:
         - df_new_data (Pandas DataFrame): A DataFrame containing the movies that need new data collected
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - provider_clients (ProviderClients): Optional long-lived clients to reuse instead of building new ones
 
     Returns:
         - df_new_data (Pandas DataFrame): A DataFrame containing all the data from before plus the IMDb data
@@ -16,34 +85,15 @@ def get_imdb_data(df_new_data):
     # Printing the starting statement
     print('Gathering data from IMDb...')
     
-    # Instantiating the IMDbPY search object
-    imdb_search = IMDb()
+    # Instantiating the IMDbPY search object if long-lived clients were not passed in
+    imdb_search = IMDb() if provider_clients is None else provider_clients.imdb_search
+    
+    # Using the memory-mapped IMDb index built from the bulk dumps if the provider clients carry one
+    imdb_dataset = None if provider_clients is None else provider_clients.imdb_dataset
     
-    # Iterating through each entry in df_tmdb, using the IMDb ID to extract relevant movie information
-    for index, row in df_new_data.iterrows():
-        # Extracting the movie title from the row
-        movie_name = row['movie_name']
-        
-        # Extracting the IMDb ID from the TMDb search results and removing first two "tt" characters
-        imdb_id = row['imdb_id']
-        imdb_id = imdb_id[2:]
-        
-        # Using IMDbPY to get movie details using the IMDb ID
-        imdb_details = dict(imdb_search.get_movie(imdb_id))
-        
-        # Adding imdb_rating and imdb_votes to movie's row if available
-        if 'rating' not in imdb_details.keys():
-            print(f'The following movie has no IMDb rating: {movie_name}.')
-            df_new_data.loc[index, 'imdb_rating'] = np.nan
-        else:
-            df_new_data.loc[index, 'imdb_rating'] = imdb_details['rating']
-        if 'votes' not in imdb_details.keys():
-            df_new_data.loc[index, 'imdb_rating'] = np.nan
-        else:
-            df_new_data.loc[index, 'imdb_votes'] = imdb_details['votes']
-        
-        # Adding the year the movie debuted
-        df_new_data.loc[index, 'year'] = imdb_details['year']
+    # Streaming each movie's record with the IMDb fields added, using the IMDb ID from the TMDb search results
+    imdb_records = get_imdb_records(iter_records(df_new_data), imdb_search, imdb_dataset, metadata_cache)
+    df_new_data = records_to_dataframe(imdb_records, list(df_new_data.columns) + IMDB_COLUMNS)
     
     # Printing the completion statement
     print('Data collection from IMDb complete!')
@@ -1,14 +1,79 @@
 import numpy as np
 import pandas as pd
 from omdb import OMDBClient
+from metadata_cache import cached_fetch
+from record_streams import iter_records, records_to_dataframe
 
-def get_omdb_data(df_new_data, omdb_key):
+# Defining the columns the OMDb stage adds
+OMDB_COLUMNS = ['rt_critic_score', 'metascore']
+
+def get_omdb_fields(movie_name, imdb_id, omdb_client, metadata_cache = None, rate_limiters = None):
+    """
+    Retrieving the Rotten Tomatoes critic score and Metacritic metascore of a single movie from OMDb
+
+    Args:
+        - movie_name (str): The name of the movie
+        - imdb_id (str): The IMDb ID of the movie (e.g. "tt0133093")
+        - omdb_client (obj): The OMDb client
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - rate_limiters (dict): Optional provider -> rate limiter consulted before every OMDb request
+
+    Returns:
+        - omdb_fields (dict): The movie's "rt_critic_score" (null if OMDb has none) and "metascore"
+    """
+
+    # Using the OMDb client to search for the movie results using the IMDb ID
+    omdb_details = cached_fetch(metadata_cache, 'omdb', imdb_id, lambda: omdb_client.imdbid(imdb_id), rate_limiters)
+
+    # Resetting the Rotten Tomatoes critic score variable
+    rt_critic_score = None
+
+    # Checking if the movie has any ratings populated under 'ratings'
+    omdb_ratings_len = len(omdb_details['ratings'])
+
+    if omdb_ratings_len == 0:
+        print(f'{movie_name} has no Rotten Tomatoes critic score.')
+    elif omdb_ratings_len >= 0:
+        # Extracting out the Rotten Tomatoes score if available
+        for rater in omdb_details['ratings']:
+            if rater['source'] == 'Rotten Tomatoes':
+                rt_critic_score = rater['value']
+
+    # Populating Rotten Tomatoes critic score and the Metacritic metascore appropriately
+    return {'rt_critic_score': rt_critic_score if rt_critic_score else np.nan,
+            'metascore': omdb_details['metascore']}
+
+
+
+def get_omdb_records(records, omdb_client, metadata_cache = None, rate_limiters = None):
+    """
+    Streaming the records of the movies with their Rotten Tomatoes critic score and metascore from OMDb added
+
+    Args:
+        - records (iterable): Dictionaries holding at least each movie's "movie_name" and "imdb_id"
+        - omdb_client (obj): The OMDb client
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - rate_limiters (dict): Optional provider -> rate limiter consulted before every request
+
+    Returns:
+        - records (generator): The same dictionaries, one at a time, updated with every column of OMDB_COLUMNS
+    """
+
+    for record in records:
+        record.update(get_omdb_fields(record['movie_name'], record['imdb_id'], omdb_client, metadata_cache, rate_limiters))
+        yield record
+
+
+
+def get_omdb_data(df_new_data, omdb_key, metadata_cache = None, provider_clients = None):
     """
     Retrieving the appropriate data from the Open Movie Database (OMDb)
 
     Args:
         - df_new_data (Pandas DataFrame): A DataFrame containing the movies that need new data collected
         - omdb_key (str): A string representing the API key for OMDb
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - provider_clients (ProviderClients): Optional long-lived clients to reuse instead of building new ones
 
     Returns:
         - df_new_data (Pandas DataFrame): A DataFrame containing all the data from before plus the OMDb data
@@ -17,39 +82,12 @@ def get_omdb_data(df_new_data, omdb_key):
     # Printing the starting statement
     print('Gathering data from OMDb...')
     
-    # Instantiating the OMDb client
-    omdb_client = OMDBClient(apikey = omdb_key)
+    # Instantiating the OMDb client if long-lived clients were not passed in
+    omdb_client = OMDBClient(apikey = omdb_key) if provider_clients is None else provider_clients.omdb_client
     
-    # Iterating through all the movies to extract the proper OMDb information
-    for index, row in df_new_data.iterrows():
-        # Extracting movie name from the row
-        movie_name = row['movie_name']
-        
-        # Using the OMDb client to search for the movie results using the IMDb ID
-        omdb_details = omdb_client.imdbid(row['imdb_id'])
-        
-        # Resetting the Rotten Tomatoes critic score variable
-        rt_critic_score = None
-        
-        # Checking if the movie has any ratings populated under 'ratings'
-        omdb_ratings_len = len(omdb_details['ratings'])
-        
-        if omdb_ratings_len == 0:
-            print(f'{movie_name} has no Rotten Tomatoes critic score.')
-        elif omdb_ratings_len >= 0:
-            # Extracting out the Rotten Tomatoes score if available
-            for rater in omdb_details['ratings']:
-                if rater['source'] == 'Rotten Tomatoes':
-                    rt_critic_score = rater['value']
-                    
-        # Populating Rotten Tomatoes critic score appropriately
-        if rt_critic_score:
-            df_new_data.loc[index, 'rt_critic_score'] = rt_critic_score
-        else:
-            df_new_data.loc[index, 'rt_critic_score'] = np.nan
-            
-        # Populating the Metacritic metascore appropriately
-        df_new_data.loc[index, 'metascore'] = omdb_details['metascore']
+    # Streaming each movie's record with the OMDb fields added, using the IMDb ID
+    omdb_records = get_omdb_records(iter_records(df_new_data), omdb_client, metadata_cache)
+    df_new_data = records_to_dataframe(omdb_records, list(df_new_data.columns) + OMDB_COLUMNS)
     
     # Printing the completion statement
     print('Data collection from OMDb complete!')
@@ -1,13 +1,90 @@
 import numpy as np
 import pandas as pd
 from rotten_tomatoes_scraper.rt_scraper import MovieScraper
+from metadata_cache import cached_fetch, normalize_title
+from record_streams import iter_records, records_to_dataframe
 
-def get_rt_data(df_new_data):
+# Defining the columns the Rotten Tomatoes stage adds
+RT_COLUMNS = ['rt_audience_score']
+
+
+
+def scrape_rt_metadata(movie_name):
+    """
+    Scraping the raw Rotten Tomatoes metadata for a movie
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to scrape
+
+    Returns:
+        - metadata (dict): The metadata dictionary extracted by the RT scraper
+    """
+
+    movie_scraper = MovieScraper(movie_title = movie_name)
+    movie_scraper.extract_metadata()
+
+    return movie_scraper.metadata
+
+
+
+def get_rt_fields(movie_name, rt_critic_score, metadata_cache = None, rate_limiters = None):
+    """
+    Retrieving the Rotten Tomatoes audience score of a single movie
+
+    Args:
+        - movie_name (str): The name of the movie
+        - rt_critic_score (str): The RT critic score OMDb reported (e.g. "88%"), null if OMDb had none
+        - metadata_cache (MetadataCache): Optional cache so movies scraped on a previous run are not scraped again
+        - rate_limiters (dict): Optional provider -> rate limiter consulted before every scrape
+
+    Returns:
+        - rt_fields (dict): The movie's "rt_audience_score", null unless the scraped critic score agrees with OMDb's
+    """
+
+    # Checking to see if the movie has a critic score from the OMDb run
+    if str(rt_critic_score) == 'nan':
+        return {'rt_audience_score': np.nan}
+
+    # Extracting the metadata about the movie with the scraper
+    try:
+        rt_metadata = cached_fetch(metadata_cache, 'rt', normalize_title(movie_name), lambda: scrape_rt_metadata(movie_name), rate_limiters)
+    except:
+        return {'rt_audience_score': np.nan}
+
+    # Comparing the RT critic score to OMDb and saving audience score if the same
+    if rt_metadata['Score_Rotten'] == rt_critic_score[:2]:
+        return {'rt_audience_score': rt_metadata['Score_Audience']}
+
+    return {'rt_audience_score': np.nan}
+
+
+
+def get_rt_records(records, metadata_cache = None, rate_limiters = None):
+    """
+    Streaming the records of the movies with their Rotten Tomatoes audience score added
+
+    Args:
+        - records (iterable): Dictionaries holding at least each movie's "movie_name" and the "rt_critic_score" from OMDb
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - rate_limiters (dict): Optional provider -> rate limiter consulted before every request
+
+    Returns:
+        - records (generator): The same dictionaries, one at a time, updated with every column of RT_COLUMNS
+    """
+
+    for record in records:
+        record.update(get_rt_fields(record['movie_name'], record['rt_critic_score'], metadata_cache, rate_limiters))
+        yield record
+
+
+
+def get_rt_data(df_new_data, metadata_cache = None):
     """
     Retrieving the appropriate data from Rotten Tomatoes
 
     Args:
         - df_new_data (Pandas DataFrame): A DataFrame containing the movies that need new data collected
+        - metadata_cache (MetadataCache): Optional cache so movies scraped on a previous run are not scraped again
 
     Returns:
         - df_new_data (Pandas DataFrame): A DataFrame containing all the data from before plus the Rotten Tomatoes data
@@ -16,41 +93,9 @@ def get_rt_data(df_new_data):
     # Printing the starting statement
     print('Gathering data from Rotten Tomatoes...')
     
-    # Iterating through the DataFrame to collect the appropriate RT data
-    for index, row in df_new_data.iterrows():
-      
-        # Extracting movie name from row
-        movie_name = row['movie_name']
-        
-        # Checking to see if the movie has a critic score from the OMDb run
-        rt_critic_score_string = str(row['rt_critic_score'])
-        if rt_critic_score_string == 'nan':
-            df_new_data.loc[index, 'rt_audience_score'] = np.nan
-            continue
-        
-        # Instantiating scraper object with movie title
-        try:
-            movie_scraper = MovieScraper(movie_title = movie_name)
-        except:
-            df_new_data.loc[index, 'rt_audience_score'] = np.nan
-            continue
-        
-        # Extracting the metadata about the movie
-        try:
-            movie_scraper.extract_metadata()
-        except:
-            df_new_data.loc[index, 'rt_audience_score'] = np.nan
-            continue
-        
-        # Extracting the critic and audience scores from the metadata
-        rt_critic_score = movie_scraper.metadata['Score_Rotten']
-        rt_audience_score = movie_scraper.metadata['Score_Audience']
-        
-        # Comparing the RT critic score to OMDb and saving audience score if the same
-        if rt_critic_score == row['rt_critic_score'][:2]:
-            df_new_data.loc[index, 'rt_audience_score'] = rt_audience_score
-        else:
-          df_new_data.loc[index, 'rt_audience_score'] = np.nan
+    # Streaming each movie's record with its audience score, checked against the critic score from the OMDb run
+    rt_records = get_rt_records(iter_records(df_new_data), metadata_cache)
+    df_new_data = records_to_dataframe(rt_records, list(df_new_data.columns) + RT_COLUMNS)
     
     # Printing the completion statement
     print('Data collection from OMDb complete!')
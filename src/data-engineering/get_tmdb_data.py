@@ -1,16 +1,143 @@
 import numpy as np
 import pandas as pd
 import tmdbv3api
+from metadata_cache import cached_fetch, normalize_title
+from record_streams import iter_records, records_to_dataframe
 
 
 
-def get_tmdb_data(df_new_data, tmdb_key):
+def search_tmdb_id(movie_name, tmdb_search):
+    """
+    Searching TMDb for a movie title and returning the tmdb_id of the top result
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to search for
+        - tmdb_search (obj): The TMDb search object
+
+    Returns:
+        - tmdb_id (int): The tmdb_id of the top search result, or None if there are no results
+    """
+
+    # Performing the preliminary search
+    search_results = tmdb_search.movies({'query': movie_name})
+
+    # Extracting tmdb_id if search results exist
+    if len(search_results) != 0:
+        return search_results[0]['id']
+
+    return None
+
+
+
+# Defining which features we need to keep from tmdb_details
+TMDB_FEATS = ['movie_name', 'biehn_scale_rating', 'biehn_yes_or_no', 'tmdb_id', 'imdb_id', 'budget', 'primary_genre', 'secondary_genre', 'popularity', 'revenue', 'runtime', 'vote_average', 'vote_count']
+
+# Renaming some of the columns to avoid ambiguity later
+TMDB_NEW_COL_NAMES = {
+    'popularity': 'tmdb_popularity',
+    'vote_average': 'tmdb_vote_average',
+    'vote_count': 'tmdb_vote_count'
+}
+
+# Defining the columns of the TMDb records after renaming
+TMDB_COLUMNS = [TMDB_NEW_COL_NAMES.get(feat, feat) for feat in TMDB_FEATS]
+
+
+
+def get_tmdb_record(movie_name, biehn_scale_rating, biehn_yes_or_no, tmdb_search, tmdb_movies, metadata_cache = None,
+                    title_index = None, rate_limiters = None):
+    """
+    Retrieving the TMDb details of a single reviewed movie
+
+    Args:
+        - movie_name (str): The name of the movie
+        - biehn_scale_rating (float): The movie's rating on the Biehn scale
+        - biehn_yes_or_no (str): Whether the movie was recommended ("Yes" / "No")
+        - tmdb_search (obj): The TMDb search object
+        - tmdb_movies (obj): The TMDb movie object
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - title_index (TitleIndex): Optional local title index consulted before the TMDb search
+        - rate_limiters (dict): Optional provider -> rate limiter consulted before every TMDb request
+
+    Returns:
+        - tmdb_record (dict): The movie's values for every column of TMDB_COLUMNS, or None if TMDb has no result for the title
+    """
+
+    # Getting the tmdb_id from an exact match in the local title index, falling back to the preliminary search if there is no match
+    # (an approximate match may be another movie, such as a sequel, so it never skips the search)
+    title_match = title_index.lookup(movie_name, exact_only = True) if title_index is not None else None
+    if title_match is not None:
+        tmdb_id = title_match['tmdb_id']
+    else:
+        tmdb_id = cached_fetch(metadata_cache, 'tmdb_search', normalize_title(movie_name), lambda: search_tmdb_id(movie_name, tmdb_search),
+                               rate_limiters)
+    if tmdb_id is None:
+        print(f'Results not found for title: {movie_name}.')
+        return None
+
+    # Getting the details of the movie using the tmdb_id
+    tmdb_details = dict(cached_fetch(metadata_cache, 'tmdb', tmdb_id, lambda: tmdb_movies.details(tmdb_id), rate_limiters))
+
+    # Adding the df_ratings info and tmdb_id to the tmdb_details dictionary
+    tmdb_details['movie_name'] = movie_name
+    tmdb_details['biehn_scale_rating'] = biehn_scale_rating
+    tmdb_details['biehn_yes_or_no'] = biehn_yes_or_no
+    tmdb_details['tmdb_id'] = tmdb_id
+
+    # Checking the length of TMDb genres to see if there is a secondary genre
+    tmdb_genre_length = len(tmdb_details['genres'])
+
+    # Separating the primary_genre from the 'genres' nested child dictionary if it exists
+    if tmdb_genre_length == 0:
+        tmdb_details['primary_genre'] = np.nan
+    else:
+        tmdb_details['primary_genre'] = tmdb_details['genres'][0]['name']
+
+    # Separating the secondary_genre from the 'genres' nested child dictionary if it exists
+    if tmdb_genre_length >= 2:
+        tmdb_details['secondary_genre'] = tmdb_details['genres'][1]['name']
+    else:
+        tmdb_details['secondary_genre'] = np.nan
+
+    # Slimming down tmdb_details with only the features we want to keep, renamed to avoid ambiguity later
+    return {TMDB_NEW_COL_NAMES.get(key, key): value for key, value in tmdb_details.items() if key in TMDB_FEATS}
+
+
+
+def get_tmdb_records(movies, tmdb_search, tmdb_movies, metadata_cache = None, title_index = None, rate_limiters = None):
+    """
+    Streaming the TMDb records of the reviewed movies, skipping titles TMDb has no result for
+
+    Args:
+        - movies (iterable): Dictionaries holding each movie's "movie_name", "biehn_scale_rating" and "biehn_yes_or_no"
+        - tmdb_search (obj): The TMDb search object
+        - tmdb_movies (obj): The TMDb movie object
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - title_index (TitleIndex): Optional local title index consulted before the TMDb search
+        - rate_limiters (dict): Optional provider -> rate limiter consulted before every TMDb request
+
+    Returns:
+        - tmdb_records (generator): One dictionary per movie found on TMDb, holding every column of TMDB_COLUMNS
+    """
+
+    for movie in movies:
+        tmdb_record = get_tmdb_record(movie['movie_name'], movie['biehn_scale_rating'], movie['biehn_yes_or_no'], tmdb_search,
+                                      tmdb_movies, metadata_cache, title_index, rate_limiters)
+        if tmdb_record is not None:
+            yield tmdb_record
+
+
+
+def get_tmdb_data(df_new_data, tmdb_key, metadata_cache = None, provider_clients = None, title_index = None):
     """
     Retrieving the appropriate data from The Movies Database (TMDb)
 
     Args:
         - df_new_data (Pandas DataFrame): A DataFrame containing the movies that need new data collected
         - tmdb_key (str): A string representing our API key for interacting with TMDb's API
+        - metadata_cache (MetadataCache): Optional cache so movies looked up on a previous run are not fetched again
+        - provider_clients (ProviderClients): Optional long-lived clients to reuse instead of building new ones
+        - title_index (TitleIndex): Optional local title index consulted before the TMDb search
 
     Returns:
         - df_new_data (Pandas DataFrame): A DataFrame containing all the data from before plus the TMDb data
@@ -19,80 +146,18 @@ def get_tmdb_data(df_new_data, tmdb_key):
     # Printing the starting statement
     print('Gathering data from TMDb...')
 
-    # Instantiating the TMDb objects and setting the API key
-    tmdb = tmdbv3api.TMDb()
-    tmdb_search = tmdbv3api.Search()
-    tmdb_movies = tmdbv3api.Movie()
-    tmdb.api_key = tmdb_key
-
-    # Defining which features we need to keep from tmdb_details
-    TMDB_FEATS = ['movie_name', 'biehn_scale_rating', 'biehn_yes_or_no', 'tmdb_id', 'imdb_id', 'budget', 'primary_genre', 'secondary_genre', 'popularity', 'revenue', 'runtime', 'vote_average', 'vote_count']
-
-    # Creating a new DataFrame to hold all the TMDb data
-    df_tmdb = pd.DataFrame(columns = TMDB_FEATS)
-
-    # Iterating through the df_ratings DataFrame to get the names for extracting detailed info from TMDb
-    for index, row in df_new_data.iterrows():
-        # Extracting info from df_ratings
-        movie_name = row['movie_name']
-        biehn_scale_rating = row['biehn_scale_rating']
-        biehn_yes_or_no = row['biehn_yes_or_no']
-
-        # Performing the preliminary search
-        search_results = tmdb_search.movies({'query': movie_name})
-
-        # Extracting tmdb_id if search results exist
-        if len(search_results) != 0:
-            tmdb_id = search_results[0]['id']
-        else:
-            print(f'Results not found for title: {movie_name}.')
-            continue
-
-        # Getting the details of the movie using the tmdb_id
-        tmdb_details = dict(tmdb_movies.details(tmdb_id))
-
-        # Adding the df_ratings info and tmdb_id to the tmdb_details dictionary
-        tmdb_details['movie_name'] = movie_name
-        tmdb_details['biehn_scale_rating'] = biehn_scale_rating
-        tmdb_details['biehn_yes_or_no'] = biehn_yes_or_no
-        tmdb_details['tmdb_id'] = tmdb_id
-
-        # Checking the length of TMDb genres to see if there is a secondary genre
-        tmdb_genre_length = len(tmdb_details['genres'])
-
-        # Separating the primary_genre from the 'genres' nested child dictionary if it exists
-        if tmdb_genre_length == 0:
-            tmdb_details['primary_genre'] = np.nan
-        else:
-            tmdb_details['primary_genre'] = tmdb_details['genres'][0]['name']
-
-        # Separating the secondary_genre from the 'genres' nested child dictionary if it exists
-        if tmdb_genre_length >= 2:
-            tmdb_details['secondary_genre'] = tmdb_details['genres'][1]['name']
-        else:
-            tmdb_details['secondary_genre'] = np.nan
-
-        # Slimming down tmdb_details with only the features we want to keep
-        tmdb_details = {key: value for key, value in tmdb_details.items() if key in TMDB_FEATS}
-
-        # Converting the tmdb_details dictionary to a Pandas DataFrame
-        new_tmdb_entry = pd.DataFrame.from_dict([tmdb_details])
-
-        # Appending the new movie entry to the overall df_tmdb DataFrame
-        df_tmdb = df_tmdb.append(new_tmdb_entry, ignore_index = True)
-
-    # Renaming some of the columns to avoid ambiguity later
-    TMDB_NEW_COL_NAMES = {
-        'popularity': 'tmdb_popularity',
-        'vote_average': 'tmdb_vote_average',
-        'vote_count': 'tmdb_vote_count'
-    }
-
-    # Applying the new column names appropriately
-    df_tmdb.rename(columns = TMDB_NEW_COL_NAMES, inplace = True)
-
-    # Using df_tmdb as source for all new data in a single DataFrame
-    df_new_data = df_tmdb
+    # Instantiating the TMDb objects and setting the API key if long-lived clients were not passed in
+    if provider_clients is None:
+        tmdb = tmdbv3api.TMDb()
+        tmdb_search = tmdbv3api.Search()
+        tmdb_movies = tmdbv3api.Movie()
+        tmdb.api_key = tmdb_key
+    else:
+        tmdb_search, tmdb_movies = provider_clients.tmdb_search, provider_clients.tmdb_movies
+
+    # Streaming the TMDb records and materializing them once at the end
+    tmdb_records = get_tmdb_records(iter_records(df_new_data), tmdb_search, tmdb_movies, metadata_cache, title_index)
+    df_new_data = records_to_dataframe(tmdb_records, TMDB_COLUMNS)
     
     # Printing the completion statement
     print('Data collection from TMDb complete!')
@@ -0,0 +1,225 @@
+# Importing the necessary Python libraries
+import os
+import csv
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+
+
+## INDEX SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the title types kept from title.basics (episodes, shorts and series are never reviewed)
+DEFAULT_TITLE_TYPES = ('movie', 'tvMovie', 'video')
+
+# Defining the arrays making up an index directory and their on-disk dtypes
+INDEX_ARRAYS = {
+    'tconst': np.uint32,
+    'rating': np.float32,
+    'votes': np.uint32,
+    'year': np.uint16
+}
+
+# Defining the metadata file written next to the arrays
+INDEX_METADATA_FILE = 'imdb_index.json'
+
+# Defining how many TSV rows are parsed at a time so the multi-gigabyte basics file never sits fully in memory
+CHUNK_SIZE = 500000
+
+
+
+def parse_tconst(imdb_id):
+    """
+    Converting an IMDb ID into its numeric tconst
+
+    Args:
+        - imdb_id (str): The IMDb ID of the movie (e.g. "tt0133093")
+
+    Returns:
+        - tconst (int): The numeric part of the ID (e.g. 133093)
+    """
+
+    return int(str(imdb_id)[2:])
+
+
+
+def read_imdb_tsv(path, usecols, chunksize = CHUNK_SIZE):
+    """
+    Streaming one of IMDb's bulk TSV files (gzipped or plain) in chunks
+
+    Args:
+        - path (str): Location of the TSV file (e.g. title.basics.tsv.gz)
+        - usecols (list): The columns to keep
+        - chunksize (int): Number of rows per chunk
+
+    Returns:
+        - chunks (iterator): Pandas DataFrames of at most chunksize rows, with "\\N" read as missing
+    """
+
+    # Turning off quoting since IMDb titles contain bare quote characters
+    return pd.read_csv(path, sep = '\t', usecols = usecols, na_values = '\\N', keep_default_na = False,
+                       quoting = csv.QUOTE_NONE, dtype = str, chunksize = chunksize)
+
+
+
+def build_imdb_index(basics_path, ratings_path, index_dir, title_types = DEFAULT_TITLE_TYPES):
+    """
+    Converting the IMDb bulk files into a compact, sorted, memory-mappable array index
+
+    Each array is stored as its own .npy file so it can be opened with np.load(mmap_mode = 'r'). The files are written
+    to a temporary name and renamed into place so readers never see a half-written index.
+
+    Args:
+        - basics_path (str): Location of title.basics.tsv(.gz)
+        - ratings_path (str): Location of title.ratings.tsv(.gz)
+        - index_dir (str): Directory the index is written to
+        - title_types (tuple): The title.basics title types to keep
+
+    Returns:
+        - metadata (dict): The metadata written alongside the arrays (row counts, sources and build time)
+    """
+
+    # Printing the starting statement
+    print('Building the IMDb dataset index...')
+
+    # Loading the ratings, which are small enough (~1.5M rows) to hold in memory at once
+    rating_tconsts, ratings, votes = [], [], []
+    for chunk in read_imdb_tsv(ratings_path, ['tconst', 'averageRating', 'numVotes']):
+        rating_tconsts.append(chunk['tconst'].str[2:].astype(np.uint32).to_numpy())
+        ratings.append(chunk['averageRating'].astype(np.float32).to_numpy())
+        votes.append(chunk['numVotes'].astype(np.uint32).to_numpy())
+    rating_tconsts, ratings, votes = np.concatenate(rating_tconsts), np.concatenate(ratings), np.concatenate(votes)
+    rating_order = np.argsort(rating_tconsts)
+    rating_tconsts, ratings, votes = rating_tconsts[rating_order], ratings[rating_order], votes[rating_order]
+
+    # Streaming the basics, keeping only the reviewable title types and their release year
+    tconsts, years = [], []
+    for chunk in read_imdb_tsv(basics_path, ['tconst', 'titleType', 'startYear']):
+        chunk = chunk[chunk['titleType'].isin(title_types)]
+        tconsts.append(chunk['tconst'].str[2:].astype(np.uint32).to_numpy())
+        years.append(pd.to_numeric(chunk['startYear'], errors = 'coerce').fillna(0).astype(np.uint16).to_numpy())
+    tconsts, years = np.concatenate(tconsts), np.concatenate(years)
+    title_order = np.argsort(tconsts)
+    tconsts, years = tconsts[title_order], years[title_order]
+
+    # Joining the ratings onto the titles with a sorted merge (NaN rating / zero votes for unrated titles)
+    positions = np.searchsorted(rating_tconsts, tconsts)
+    in_bounds = positions < len(rating_tconsts)
+    has_rating = np.zeros(len(tconsts), dtype = bool)
+    has_rating[in_bounds] = rating_tconsts[positions[in_bounds]] == tconsts[in_bounds]
+    index_arrays = {'tconst': tconsts, 'rating': np.full(len(tconsts), np.nan), 'votes': np.zeros(len(tconsts)), 'year': years}
+    index_arrays['rating'][has_rating] = ratings[positions[has_rating]]
+    index_arrays['votes'][has_rating] = votes[positions[has_rating]]
+
+    # Writing every array and the metadata under a temporary name before renaming them into place
+    os.makedirs(index_dir, exist_ok = True)
+    metadata = {'titles': int(len(tconsts)),
+                'rated_titles': int(has_rating.sum()),
+                'title_types': list(title_types),
+                'sources': [os.path.abspath(basics_path), os.path.abspath(ratings_path)],
+                'built_at': time.time()}
+    for name, dtype in INDEX_ARRAYS.items():
+        temp_path = os.path.join(index_dir, f'.{name}.tmp.npy')
+        np.save(temp_path, index_arrays[name].astype(dtype, copy = False))
+        os.replace(temp_path, os.path.join(index_dir, f'{name}.npy'))
+    temp_path = os.path.join(index_dir, f'.{INDEX_METADATA_FILE}.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(metadata, f)
+    os.replace(temp_path, os.path.join(index_dir, INDEX_METADATA_FILE))
+
+    # Printing the completion statement
+    print(f'IMDb dataset index complete! {metadata["titles"]} titles, {metadata["rated_titles"]} with ratings.')
+
+    return metadata
+
+
+
+## IMDB DATASET INDEX
+## ---------------------------------------------------------------------------------------------------------------------
+class IMDbDatasetIndex:
+    """
+    Read-only, memory-mapped lookup of IMDb ratings, votes and release years built by build_imdb_index
+
+    Opening the index only maps the files, so startup is near-instant and every process mapping the same directory
+    shares one copy in the OS page cache. Lookups binary search the sorted tconst array and never touch the network.
+
+    Args:
+        - index_dir (str): Directory written by build_imdb_index
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+
+        # Mapping every array read-only rather than reading it into memory
+        self._tconst = np.load(os.path.join(index_dir, 'tconst.npy'), mmap_mode = 'r')
+        self._rating = np.load(os.path.join(index_dir, 'rating.npy'), mmap_mode = 'r')
+        self._votes = np.load(os.path.join(index_dir, 'votes.npy'), mmap_mode = 'r')
+        self._year = np.load(os.path.join(index_dir, 'year.npy'), mmap_mode = 'r')
+
+        # Loading the build metadata
+        with open(os.path.join(index_dir, INDEX_METADATA_FILE), 'r') as f:
+            self.metadata = json.load(f)
+
+    def __len__(self):
+        return len(self._tconst)
+
+    def __contains__(self, imdb_id):
+        return self._position(imdb_id) is not None
+
+    def get(self, imdb_id):
+        """
+        Looking up a title in the same shape as the slimmed IMDbPY response ("rating", "votes" and "year")
+
+        Args:
+            - imdb_id (str): The IMDb ID of the movie (e.g. "tt0133093")
+
+        Returns:
+            - imdb_details (dict): The fields known for the title (unrated titles have no "rating" / "votes"), or None if the title is not in the index
+        """
+
+        position = self._position(imdb_id)
+        if position is None:
+            return None
+
+        # Converting the fields to plain Python types, leaving out the ones the dumps do not have
+        imdb_details = {}
+        if not np.isnan(self._rating[position]):
+            imdb_details['rating'] = round(float(self._rating[position]), 1)
+            imdb_details['votes'] = int(self._votes[position])
+        if self._year[position] > 0:
+            imdb_details['year'] = int(self._year[position])
+
+        return imdb_details
+
+    def _position(self, imdb_id):
+        # Binary searching the sorted tconst array for the numeric ID
+        try:
+            tconst = parse_tconst(imdb_id)
+        except (TypeError, ValueError):
+            return None
+        if not 0 <= tconst <= np.iinfo(np.uint32).max:
+            return None
+
+        # Searching with a matching scalar type so NumPy does not upcast (and copy) the whole mapped array
+        position = int(np.searchsorted(self._tconst, np.uint32(tconst)))
+        if position < len(self._tconst) and self._tconst[position] == tconst:
+            return position
+
+        return None
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the command line arguments
+    parser = argparse.ArgumentParser(description = 'Builds the memory-mapped IMDb index from the bulk TSV dumps (https://datasets.imdbws.com/)')
+    parser.add_argument('basics_path', help = 'Location of title.basics.tsv.gz')
+    parser.add_argument('ratings_path', help = 'Location of title.ratings.tsv.gz')
+    parser.add_argument('index_dir', help = 'Directory the index is written to')
+    args = parser.parse_args()
+
+    # Building the index
+    build_imdb_index(args.basics_path, args.ratings_path, args.index_dir)
@@ -1,6 +1,7 @@
 # Importing the necessary Python Libraries
 import os
 import yaml
+import argparse
 import pandas as pd
 
 # Importing the helper functions from other adjacent files
@@ -11,6 +12,13 @@ from get_imdb_data import *
 from get_omdb_data import *
 from get_rt_data import *
 from save_and_join_raw_data import *
+from metadata_cache import MetadataCache
+from provider_clients import ProviderClients
+from title_index import TitleIndex, read_tmdb_id_export
+from enrichment_engine import EnrichmentEngine, build_rate_limiters, DEFAULT_RATE_LIMITS
+from enrichment_journal import EnrichmentJournal, JOURNAL_DIR, JOURNAL_FILE
+from review_index import ReviewIndex, REVIEW_INDEX_FILE
+from raw_data_store import RawDataStore, RAW_DATA_STORE_DIR, new_run_id
 
 
 
@@ -31,31 +39,93 @@ with open('../keys/keys.yml', 'r') as f:
 tmdb_key = keys_yaml['api_keys']['tmdb_key']
 omdb_key = keys_yaml['api_keys']['omdb_key']
 
-# Loading in the raw data gathered from previous run
-df_previous_run = pd.read_csv(os.path.join(INPUT_PATH, 'all_data.csv'))
+# Instantiating the metadata cache so titles fetched on earlier runs are read locally instead of over HTTP
+metadata_cache = MetadataCache(path = os.getenv('METADATA_CACHE_PATH', os.path.join(INPUT_PATH, 'metadata_cache.sqlite')))
+
+# Noting how many movies are enriched concurrently and each provider's quota in requests per second (e.g. TMDB_RATE_LIMIT)
+ENRICHMENT_WORKERS = int(os.getenv('ENRICHMENT_WORKERS', '8'))
+RATE_LIMITS = {provider: float(os.getenv(f'{provider.upper()}_RATE_LIMIT', str(rate))) for provider, rate in DEFAULT_RATE_LIMITS.items()}
+
+# Instantiating the long-lived provider clients shared by every enrichment stage, pooling a connection per worker
+provider_clients = ProviderClients(tmdb_key, omdb_key, pool_size = ENRICHMENT_WORKERS, imdb_dataset_path = os.getenv('IMDB_DATASET_PATH'))
+
+# Noting whether to also rewrite the full all_data.csv, which costs time in the size of the whole history. The partitioned
+# store is the run's output of record, so without EXPORT_CSV=1 no all_data.csv is written (even when nothing changed)
+EXPORT_CSV = os.getenv('EXPORT_CSV', '0') == '1'
+
+# Defining the columns the delta and the title index need from the previous runs
+PREVIOUS_RUN_COLUMNS = ['movie_name', 'biehn_scale_rating', 'biehn_yes_or_no', 'tmdb_id', 'imdb_id']
+
+# Defining the run ID a legacy all_data.csv is imported under, which sorts before every real run
+LEGACY_RUN_ID = '00000000T000000-legacy'
+
+# Pointing to the partitioned store of previous runs and the output directory this run's partition is written to
+raw_data_store = RawDataStore(os.path.join(INPUT_PATH, RAW_DATA_STORE_DIR))
+output_store = RawDataStore(os.path.join(OUTPUT_PATH, RAW_DATA_STORE_DIR))
+
+# Loading in the raw data gathered from previous runs, reading only the needed columns unless exporting the full CSV
+if raw_data_store.exists():
+    df_previous_run = raw_data_store.read(columns = None if EXPORT_CSV else PREVIOUS_RUN_COLUMNS)
+else:
+    # Falling back to a legacy all_data.csv
+    df_previous_run = pd.read_csv(os.path.join(INPUT_PATH, 'all_data.csv'))
+
+# Building the local title index from the previous run plus the optional larger catalog
+title_index = TitleIndex.from_dataframe(df_previous_run)
+if os.getenv('TITLE_CATALOG_PATH') is not None:
+    title_index.add_records(read_tmdb_id_export(os.getenv('TITLE_CATALOG_PATH')), priority_field = 'popularity')
+
+# Loading the index of review hashes behind the previous run, kept next to the store's partitions so it travels with them
+# (built from the previous run when none was persisted yet, e.g. when importing a legacy all_data.csv)
+review_index = ReviewIndex.load(os.path.join(raw_data_store.path, REVIEW_INDEX_FILE), df_previous_run)
 
 
 
 ## SCRIPT INSTANTIATION
 ## ---------------------------------------------------------------------------------------------------------------------
 if __name__ == "__main__":
+    # Parsing whether to resume the stages checkpointed by a previous, interrupted run
+    parser = argparse.ArgumentParser(description = 'Gathers the reviewed movies and enriches the new ones with TMDb, IMDb, OMDb and Rotten Tomatoes data')
+    parser.add_argument('--resume', action = 'store_true', help = 'Reuse the enrichment stages checkpointed by an interrupted run')
+    args = parser.parse_args()
+
+    # Importing a legacy all_data.csv as the store's first partition, so the store holds the full history from here on
+    if not raw_data_store.exists():
+        output_store.append(df_previous_run, run_id = LEGACY_RUN_ID)
+
     # Getting the raw data from the Google Spreadsheet
     df_reviews = get_google_sheets_data(OUTPUT_PATH)
     
-    # Slimming down the data to a delta to not duplicate data already gathered
-    df_new_data = generate_delta(df_reviews, df_previous_run, OUTPUT_PATH)
-    
-    # Getting the data from TMDb
-    df_new_data = get_tmdb_data(df_new_data, tmdb_key)
+    # Slimming down the data to the new and changed reviews to not duplicate data already gathered
+    delta = generate_delta(df_reviews, review_index)
 
-    # Getting the data from IMDb
-    df_new_data = get_imdb_data(df_new_data)
-    
-    # Getting the data from OMDb
-    df_new_data = get_omdb_data(df_new_data, omdb_key)
-    
-    # Getting the data from Rotten Tomatoes
-    df_new_data = get_rt_data(df_new_data)
-    
-    # Joining the new data with the previous one and saving the full raw output
-    df_all_data = save_and_join_raw_data(df_previous_run, df_new_data, OUTPUT_PATH)
\ No newline at end of file
+    if delta.status == NO_CHANGES:
+        # Leaving the store as it is, as the run has nothing to add
+        df_new_data = delta.df_new_data
+    else:
+        # Opening the journal every finished stage is checkpointed to, replaying it when resuming
+        journal = EnrichmentJournal(os.path.join(OUTPUT_PATH, JOURNAL_DIR, JOURNAL_FILE), resume = args.resume)
+
+        # Getting the data from TMDb, IMDb, OMDb and Rotten Tomatoes, pipelining each movie's lookups across the worker pool
+        enrichment_engine = EnrichmentEngine(provider_clients, metadata_cache, title_index, max_workers = ENRICHMENT_WORKERS,
+                                             rate_limiters = build_rate_limiters(RATE_LIMITS), journal = journal)
+        df_new_data = enrichment_engine.enrich(delta.df_new_data)
+        print(f'Enrichment stats: {enrichment_engine.stats()}')
+
+        # Saving only this run's new and changed movies and the deleted movies' tombstones as a new partition
+        partition_path = output_store.append(df_new_data, delta.deleted, run_id = new_run_id())
+        print(f'Saved the run to {partition_path}')
+
+        # Discarding the journal now the run's output is saved, as nothing is left to resume
+        journal.discard()
+
+    # Optionally rewriting the full all_data.csv, replacing the changed rows, appending the new ones and dropping the deleted ones
+    if EXPORT_CSV:
+        df_all_data = save_and_join_raw_data(df_previous_run, df_new_data, OUTPUT_PATH, delta.deleted)
+
+    # Advancing the review index for the saved movies only, so movies that failed enrichment are retried next run
+    review_index.update(delta.review_hashes, df_new_data['movie_name'], delta.deleted)
+    review_index.save(os.path.join(output_store.path, REVIEW_INDEX_FILE))
+
+    # Printing the metadata cache hit / miss counters for this run
+    print(f'Metadata cache stats: {metadata_cache.stats()}')
\ No newline at end of file
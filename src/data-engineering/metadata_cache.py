@@ -0,0 +1,286 @@
+# Importing the necessary Python libraries
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+
+
+
+## CACHE SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining how long (in seconds) each provider's responses stay fresh
+DEFAULT_TTLS = {
+    'tmdb_search': 30 * 24 * 60 * 60,
+    'tmdb': 7 * 24 * 60 * 60,
+    'imdb': 24 * 60 * 60,
+    'omdb': 24 * 60 * 60,
+    'rt': 24 * 60 * 60
+}
+
+# Defining which fields of each provider's response get cached so both consumers store the same shapes
+PROVIDER_FIELDS = {
+    'tmdb': ['imdb_id', 'budget', 'genres', 'popularity', 'revenue', 'runtime', 'vote_average', 'vote_count'],
+    'imdb': ['rating', 'votes', 'year'],
+    'omdb': ['ratings', 'metascore'],
+    'rt': ['Score_Rotten', 'Score_Audience']
+}
+
+
+
+def normalize_title(movie_name):
+    """
+    Normalizing a movie title so that trivially different spellings share a cache key
+
+    Args:
+        - movie_name (str): The raw movie title
+
+    Returns:
+        - normalized_title (str): The lowercased title with collapsed whitespace
+    """
+
+    return ' '.join(str(movie_name).lower().split())
+
+
+
+def slim_response(provider, response):
+    """
+    Reducing a raw provider response to the plain, picklable fields we actually use
+
+    Args:
+        - provider (str): The name of the provider (a key of PROVIDER_FIELDS)
+        - response (dict-like): The raw response returned by the provider client
+
+    Returns:
+        - slimmed_response (dict): A plain dictionary containing only the provider's used fields that were present
+    """
+
+    # Passing through providers without a field list (e.g. "tmdb_search", which caches a bare tmdb_id)
+    if provider not in PROVIDER_FIELDS:
+        return response
+
+    # Keeping only the fields that are present in the response
+    response = dict(response)
+    slimmed_response = {field: response[field] for field in PROVIDER_FIELDS[provider] if field in response}
+
+    # Converting nested client objects into plain dictionaries
+    if 'genres' in slimmed_response:
+        slimmed_response['genres'] = [{'name': genre['name']} for genre in slimmed_response['genres']]
+    if 'ratings' in slimmed_response:
+        slimmed_response['ratings'] = [dict(rater) for rater in slimmed_response['ratings']]
+
+    return slimmed_response
+
+
+
+def cached_fetch(metadata_cache, provider, key, fetch_func, rate_limiters = None):
+    """
+    Fetching a slimmed provider response through the metadata cache if one is configured
+
+    Args:
+        - metadata_cache (MetadataCache): The cache to read from and write to, or None to always call fetch_func
+        - provider (str): The name of the provider
+        - key (str): The provider specific key (e.g. tmdb_id, imdb_id or normalized title)
+        - fetch_func (function): A zero argument function that calls the provider
+        - rate_limiters (dict): Optional provider -> rate limiter (anything with an acquire method) that must grant a
+          request before fetch_func is called; cache hits do not use up the provider's quota
+
+    Returns:
+        - response (dict): The slimmed provider response
+    """
+
+    # Waiting for the provider's rate limiter (if any) right before the call actually goes out
+    rate_limiter = rate_limiters.get(provider) if rate_limiters is not None else None
+    if rate_limiter is not None:
+        unlimited_fetch_func = fetch_func
+
+        def fetch_func():
+            rate_limiter.acquire()
+            return unlimited_fetch_func()
+
+    if metadata_cache is None:
+        return slim_response(provider, fetch_func())
+
+    return metadata_cache.get_or_fetch(provider, key, lambda: slim_response(provider, fetch_func()))
+
+
+
+## METADATA CACHE
+## ---------------------------------------------------------------------------------------------------------------------
+class MetadataCache:
+    """
+    Two tier (in-memory LRU + on-disk SQLite) cache for provider metadata, keyed by provider and provider specific key
+
+    Args:
+        - path (str): Location of the SQLite file backing the disk tier, or None for a memory only cache
+        - max_memory_entries (int): Maximum number of entries held in the memory tier before evicting the least recently used
+        - max_disk_entries (int): Maximum number of entries held in the disk tier before evicting the oldest
+        - ttls (dict): Per provider time-to-live in seconds, overriding DEFAULT_TTLS
+        - eviction_interval (int): Number of writes between two disk evictions, so the disk tier may briefly exceed
+          max_disk_entries by up to this many entries per process instead of being counted on every write
+    """
+
+    def __init__(self, path = None, max_memory_entries = 1024, max_disk_entries = 100000, ttls = None, eviction_interval = 256):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.eviction_interval = eviction_interval
+        self._writes_since_eviction = 0
+
+        # Instantiating the memory tier and the counters
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {'memory_hits': 0, 'disk_hits': 0, 'misses': 0})
+
+        # Instantiating the disk tier if a path is given
+        self._connection = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+            self._connection = self._connect()
+            self._connection.execute('''CREATE TABLE IF NOT EXISTS metadata_cache (
+                                            provider TEXT NOT NULL,
+                                            key TEXT NOT NULL,
+                                            value BLOB NOT NULL,
+                                            stored_at REAL NOT NULL,
+                                            expires_at REAL NOT NULL,
+                                            PRIMARY KEY (provider, key))''')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS metadata_cache_expires_at ON metadata_cache (expires_at)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS metadata_cache_stored_at ON metadata_cache (stored_at)')
+            self._connection.commit()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, check_same_thread = False)
+
+    def reopen(self):
+        # Replacing the SQLite connection with a fresh one, which a process forked after the cache was built must do before
+        # using it (the inherited connection is kept rather than closed, since closing it could disturb the parent's locks)
+        with self._lock:
+            if self._connection is not None:
+                self._inherited_connection = self._connection
+                self._connection = self._connect()
+
+    def get(self, provider, key):
+        """
+        Getting a fresh cached value, promoting disk hits into the memory tier
+
+        Args:
+            - provider (str): The name of the provider
+            - key (str): The provider specific key
+
+        Returns:
+            - value (obj): The cached value, or None if it is missing or expired
+        """
+
+        cache_key = (provider, str(key))
+        now = time.time()
+
+        with self._lock:
+            # Checking the memory tier first
+            if cache_key in self._memory:
+                expires_at, value = self._memory[cache_key]
+                if expires_at > now:
+                    self._memory.move_to_end(cache_key)
+                    self._counters[provider]['memory_hits'] += 1
+                    return value
+                del self._memory[cache_key]
+
+            # Falling back to the disk tier
+            if self._connection is not None:
+                row = self._connection.execute('SELECT value, expires_at FROM metadata_cache WHERE provider = ? AND key = ?',
+                                               cache_key).fetchone()
+                if row is not None and row[1] > now:
+                    value = pickle.loads(row[0])
+                    self._store_in_memory(cache_key, row[1], value)
+                    self._counters[provider]['disk_hits'] += 1
+                    return value
+
+            self._counters[provider]['misses'] += 1
+            return None
+
+    def set(self, provider, key, value):
+        """
+        Storing a value in both tiers with the provider's TTL
+
+        Args:
+            - provider (str): The name of the provider
+            - key (str): The provider specific key
+            - value (obj): The picklable value to store
+        """
+
+        cache_key = (provider, str(key))
+        now = time.time()
+        expires_at = now + self.ttls.get(provider, min(DEFAULT_TTLS.values()))
+
+        with self._lock:
+            self._store_in_memory(cache_key, expires_at, value)
+
+            if self._connection is not None:
+                self._connection.execute('INSERT OR REPLACE INTO metadata_cache VALUES (?, ?, ?, ?, ?)',
+                                         cache_key + (pickle.dumps(value), now, expires_at))
+
+                # Evicting only every eviction_interval writes, since counting the disk tier scans the whole table
+                self._writes_since_eviction += 1
+                if self._writes_since_eviction >= self.eviction_interval:
+                    self._evict_from_disk(now)
+                    self._writes_since_eviction = 0
+                self._connection.commit()
+
+    def get_or_fetch(self, provider, key, fetch_func):
+        """
+        Getting a cached value, calling fetch_func and caching its result on a miss
+
+        Args:
+            - provider (str): The name of the provider
+            - key (str): The provider specific key
+            - fetch_func (function): A zero argument function returning the value; exceptions propagate and nothing is cached
+
+        Returns:
+            - value (obj): The cached or freshly fetched value
+        """
+
+        value = self.get(provider, key)
+        if value is None:
+            value = fetch_func()
+            if value is not None:
+                self.set(provider, key, value)
+
+        return value
+
+    def stats(self):
+        """
+        Reporting the hit / miss counters per provider and the current size of each tier
+
+        Returns:
+            - stats (dict): A dictionary of counters suitable for returning as JSON
+        """
+
+        with self._lock:
+            disk_entries = None
+            if self._connection is not None:
+                disk_entries = self._connection.execute('SELECT COUNT(*) FROM metadata_cache').fetchone()[0]
+
+            return {'providers': {provider: dict(counters) for provider, counters in self._counters.items()},
+                    'memory_entries': len(self._memory),
+                    'disk_entries': disk_entries}
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _store_in_memory(self, cache_key, expires_at, value):
+        self._memory[cache_key] = (expires_at, value)
+        self._memory.move_to_end(cache_key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last = False)
+
+    def _evict_from_disk(self, now):
+        # Dropping expired entries first and then the oldest entries beyond the size bound
+        self._connection.execute('DELETE FROM metadata_cache WHERE expires_at <= ?', (now,))
+        disk_entries = self._connection.execute('SELECT COUNT(*) FROM metadata_cache').fetchone()[0]
+        if disk_entries > self.max_disk_entries:
+            self._connection.execute('''DELETE FROM metadata_cache WHERE rowid IN (
+                                            SELECT rowid FROM metadata_cache ORDER BY stored_at LIMIT ?)''',
+                                     (disk_entries - self.max_disk_entries,))
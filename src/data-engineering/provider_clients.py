@@ -0,0 +1,147 @@
+# Importing the necessary Python libraries
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from imdb_dataset import IMDbDatasetIndex
+
+
+
+## HTTP SESSION SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter that applies a default timeout to every request sent through it
+
+    Args:
+        - timeout (float): The default connect / read timeout in seconds
+        - **kwargs: Passed through to requests' HTTPAdapter (e.g. pool_connections, pool_maxsize, max_retries)
+    """
+
+    def __init__(self, timeout = 10.0, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+
+def build_http_session(pool_size = 10, timeout = 10.0, max_retries = 2):
+    """
+    Building a requests session whose keep-alive connections are pooled and reused across calls
+
+    Args:
+        - pool_size (int): Maximum number of pooled connections kept open per host
+        - timeout (float): The default connect / read timeout in seconds
+        - max_retries (int): Number of times a failed connection attempt is retried
+
+    Returns:
+        - http_session (requests.Session): The pooled session
+    """
+
+    # Mounting the pooled adapter for both schemes
+    http_session = requests.Session()
+    adapter = TimeoutHTTPAdapter(timeout = timeout, pool_connections = pool_size, pool_maxsize = pool_size, max_retries = max_retries)
+    http_session.mount('http://', adapter)
+    http_session.mount('https://', adapter)
+
+    return http_session
+
+
+
+## PROVIDER CLIENT REGISTRY
+## ---------------------------------------------------------------------------------------------------------------------
+class ProviderClients:
+    """
+    Registry of long-lived upstream clients that share one pooled keep-alive HTTP session
+
+    The TMDb and OMDb clients send every request through the shared session. IMDbPY and the Rotten Tomatoes scraper
+    open their own urllib connections, so for those we only save the (fairly expensive) client construction. Each
+    provider library is only imported, and its client only built, the first time that client is used.
+
+    Args:
+        - tmdb_key (str): A string representing the API key to get data from the TMDb API
+        - omdb_key (str): A string representing the API key to get data from the OMDb API
+        - pool_size (int): Maximum number of pooled connections kept open per host
+        - timeout (float): The default connect / read timeout in seconds
+        - max_retries (int): Number of times a failed connection attempt is retried
+        - imdb_dataset_path (str): Optional directory of a memory-mapped IMDb index (see imdb_dataset.py) consulted before IMDbPY
+    """
+
+    def __init__(self, tmdb_key, omdb_key, pool_size = 10, timeout = 10.0, max_retries = 2, imdb_dataset_path = None):
+        self.tmdb_key = tmdb_key
+        self.omdb_key = omdb_key
+        self.timeout = timeout
+        self.http_session = build_http_session(pool_size = pool_size, timeout = timeout, max_retries = max_retries)
+
+        # Mapping the offline IMDb index if one was built from the bulk dumps
+        self.imdb_dataset = IMDbDatasetIndex(imdb_dataset_path) if imdb_dataset_path is not None else None
+
+        # Instantiating the store of clients built so far
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def _get_clients(self, provider, build_func):
+        # Building a provider's clients once, on first use, even when several threads ask for them at the same time
+        clients = self._clients.get(provider)
+        if clients is None:
+            with self._clients_lock:
+                clients = self._clients.get(provider)
+                if clients is None:
+                    clients = self._clients[provider] = build_func()
+
+        return clients
+
+    def _build_tmdb_clients(self):
+        import tmdbv3api
+
+        # Instantiating the TMDb objects on the shared session and setting the API key
+        tmdb = tmdbv3api.TMDb(session = self.http_session)
+        tmdb_search = tmdbv3api.Search(session = self.http_session)
+        tmdb_movies = tmdbv3api.Movie(session = self.http_session)
+        tmdb.api_key = self.tmdb_key
+
+        # Disabling tmdbv3api's unbounded request cache, which bypasses the session (the MetadataCache covers caching)
+        tmdb.cache = False
+
+        return {'tmdb': tmdb, 'tmdb_search': tmdb_search, 'tmdb_movies': tmdb_movies}
+
+    def _build_imdb_clients(self):
+        from imdb import IMDb
+
+        # Instantiating the IMDbPY search object
+        return {'imdb_search': IMDb()}
+
+    def _build_omdb_clients(self):
+        from omdb import OMDBClient
+
+        # Instantiating the OMDb client on the shared session
+        omdb_client = OMDBClient(apikey = self.omdb_key, timeout = self.timeout)
+        omdb_client.session = self.http_session
+
+        return {'omdb_client': omdb_client}
+
+    @property
+    def tmdb(self):
+        return self._get_clients('tmdb', self._build_tmdb_clients)['tmdb']
+
+    @property
+    def tmdb_search(self):
+        return self._get_clients('tmdb', self._build_tmdb_clients)['tmdb_search']
+
+    @property
+    def tmdb_movies(self):
+        return self._get_clients('tmdb', self._build_tmdb_clients)['tmdb_movies']
+
+    @property
+    def imdb_search(self):
+        return self._get_clients('imdb', self._build_imdb_clients)['imdb_search']
+
+    @property
+    def omdb_client(self):
+        return self._get_clients('omdb', self._build_omdb_clients)['omdb_client']
+
+    def close(self):
+        self.http_session.close()
@@ -0,0 +1,308 @@
+# Importing the necessary Python libraries
+import os
+import glob
+import time
+import uuid
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+
+## STORE SCHEMA
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the directory name of the store, which sits where all_data.csv used to
+RAW_DATA_STORE_DIR = 'all_data'
+
+# Defining the explicit schema of the enriched movies, in the column order of all_data.csv
+RAW_DATA_SCHEMA = pa.schema([
+    ('movie_name', pa.string()),
+    ('biehn_scale_rating', pa.float64()),
+    ('biehn_yes_or_no', pa.string()),
+    ('tmdb_id', pa.int64()),
+    ('imdb_id', pa.string()),
+    ('budget', pa.int64()),
+    ('primary_genre', pa.string()),
+    ('secondary_genre', pa.string()),
+    ('tmdb_popularity', pa.float64()),
+    ('revenue', pa.int64()),
+    ('runtime', pa.int64()),
+    ('tmdb_vote_average', pa.float64()),
+    ('tmdb_vote_count', pa.int64()),
+    ('imdb_rating', pa.float64()),
+    ('imdb_votes', pa.float64()),
+    ('year', pa.float64()),
+    ('rt_critic_score', pa.string()),
+    ('metascore', pa.float64()),
+    ('rt_audience_score', pa.float64())
+])
+RAW_DATA_COLUMNS = RAW_DATA_SCHEMA.names
+
+# Defining the bookkeeping columns every partition carries: the run that wrote the row and whether it deletes the movie
+PARTITION_SCHEMA = RAW_DATA_SCHEMA.append(pa.field('_run_id', pa.string())).append(pa.field('_deleted', pa.bool_()))
+
+# Defining how many rows go in each row group, the unit the min / max statistics let a filtered read skip
+ROW_GROUP_SIZE = 64 * 1024
+
+
+
+def conform_to_schema(df):
+    """
+    Casting a DataFrame of enriched movies to the store's schema, the way read_csv would have typed it
+
+    Args:
+        - df (Pandas DataFrame): The enriched movies (e.g. the output of the enrichment engine or all_data.csv)
+
+    Returns:
+        - table (PyArrow Table): The movies as a table with the RAW_DATA_SCHEMA columns
+    """
+
+    columns = {}
+    for field in RAW_DATA_SCHEMA:
+        values = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), index = df.index, dtype = object)
+        if pa.types.is_string(field.type):
+            # Keeping nulls as nulls and everything else as text (e.g. "88%" or an IMDb ID)
+            values = values.astype(object).where(values.notnull(), None).map(lambda value: value if value is None else str(value))
+        else:
+            # Parsing numbers the way read_csv does, so values like OMDb's "N/A" metascore become nulls
+            values = pd.to_numeric(values, errors = 'coerce')
+        columns[field.name] = pa.array(values, type = field.type, from_pandas = True)
+
+    return pa.table(columns, schema = RAW_DATA_SCHEMA)
+
+
+
+def filter_rows(df, filters):
+    """
+    Applying row filters in the read_parquet form to a DataFrame, keeping the rows a filtered RawDataStore.read would
+
+    Args:
+        - df (Pandas DataFrame): The rows to filter (e.g. all_data.csv read with read_csv)
+        - filters (list): Row filters in the read_parquet form (e.g. [('year', '>=', 2000)]), or None to keep every row
+
+    Returns:
+        - df (Pandas DataFrame): The matching rows in their original order, with a fresh index
+    """
+
+    if not filters:
+        return df
+
+    # Evaluating the same PyArrow expression the store pushes down, over just the columns the filters name
+    conjunctions = filters if isinstance(filters[0], list) else [filters]
+    filter_columns = sorted({column for conjunction in conjunctions for column, _, _ in conjunction})
+    table = pa.Table.from_pandas(df[filter_columns], preserve_index = False)
+    table = table.append_column('_row', pa.array(np.arange(len(df))))
+    kept_rows = ds.dataset(table).to_table(columns = ['_row'], filter = pq.filters_to_expression(filters))['_row']
+
+    return df.iloc[kept_rows.to_numpy()].reset_index(drop = True)
+
+
+
+def new_run_id():
+    # Building a run ID that sorts chronologically and never collides with a concurrent run
+    return f'{time.strftime("%Y%m%dT%H%M%S", time.gmtime())}-{uuid.uuid4().hex[:8]}'
+
+
+
+def partition_run_id(partition_path):
+    # Parsing the run ID out of a partition's file name ("part-<run_id>.parquet" or "part-<run_id>-compacted.parquet")
+    return os.path.basename(partition_path)[len('part-'):-len('.parquet')].replace('-compacted', '')
+
+
+
+## RAW DATA STORE
+## ---------------------------------------------------------------------------------------------------------------------
+class RawDataStore:
+    """
+    Append-only store of the enriched movies as typed Parquet partitions, one file per run
+
+    Each run writes only its delta: the new and re-enriched movies, plus a tombstone row for every deleted one. A movie's
+    current row is the one from the latest run that wrote it, unless that row is a tombstone. Reads project the
+    requested columns and push filters down to the Parquet row groups, and compact folds every partition into one.
+
+    Args:
+        - path (str): Directory holding the partitions
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _partition_files(self):
+        # Listing every partition file in run order, a compacted partition after the run it was stamped with
+        # (files still being written start with "." and are ignored)
+        return sorted(glob.glob(os.path.join(self.path, 'part-*.parquet')),
+                      key = lambda path: (partition_run_id(path), path.endswith('-compacted.parquet')))
+
+    def partitions(self):
+        # Skipping the partitions the latest compaction folded in, which are only left while it is removing them
+        partition_files = self._partition_files()
+        compacted_positions = [position for position, path in enumerate(partition_files) if path.endswith('-compacted.parquet')]
+
+        return partition_files[compacted_positions[-1]:] if compacted_positions else partition_files
+
+    def exists(self):
+        return len(self.partitions()) > 0
+
+    def _write_partition(self, table, file_name):
+        # Writing to a hidden temporary file and swapping it into place, so readers never see a partial partition
+        os.makedirs(self.path, exist_ok = True)
+        partition_path = os.path.join(self.path, file_name)
+        temporary_path = os.path.join(self.path, f'.{file_name}.tmp')
+        pq.write_table(table, temporary_path, row_group_size = ROW_GROUP_SIZE)
+        os.replace(temporary_path, partition_path)
+
+        return partition_path
+
+    def append(self, df, deleted = (), run_id = None):
+        """
+        Appending a run's delta as a new partition
+
+        Args:
+            - df (Pandas DataFrame): The new and re-enriched movies of the run
+            - deleted (iterable): Names of the movies no longer reviewed
+            - run_id (str): ID of the run, which orders the partitions (defaults to the current time)
+
+        Returns:
+            - partition_path (str): Path of the written partition, or None if the run had nothing to write
+        """
+
+        # Keeping the last row of a movie written twice in the same run
+        df = df.drop_duplicates(subset = ['movie_name'], keep = 'last')
+        deleted = sorted(set(deleted) - set(df['movie_name']))
+        if len(df) + len(deleted) == 0:
+            return None
+
+        # Stacking the movies and the tombstones of the deleted ones, both stamped with the run ID
+        run_id = run_id or new_run_id()
+        table = pa.concat_tables([conform_to_schema(df), conform_to_schema(pd.DataFrame({'movie_name': deleted}))])
+        table = table.append_column('_run_id', pa.array([run_id] * table.num_rows, type = pa.string()))
+        table = table.append_column('_deleted', pa.array([False] * len(df) + [True] * len(deleted), type = pa.bool_()))
+
+        return self._write_partition(table, f'part-{run_id}.parquet')
+
+    def read(self, columns = None, filters = None):
+        """
+        Reading the current row of every movie
+
+        Args:
+            - columns (list): The columns to read (defaults to every RAW_DATA_COLUMNS column)
+            - filters (list): Optional row filters in the read_parquet form (e.g. [('year', '>=', 2000)]), pushed down
+              to the Parquet row groups
+
+        Returns:
+            - df (Pandas DataFrame): The current rows, with the requested columns in order
+        """
+
+        columns = list(columns or RAW_DATA_COLUMNS)
+        if not self.exists():
+            return pd.DataFrame({column: pd.Series(dtype = RAW_DATA_SCHEMA.field(column).type.to_pandas_dtype()) for column in columns})
+        dataset = ds.dataset(self.partitions(), schema = PARTITION_SCHEMA, format = 'parquet')
+
+        # Finding the superseded rows from the two narrow key columns: as the partitions are scanned in run order,
+        # every row but the last of its movie was replaced by a later run
+        keys = dataset.to_table(columns = ['movie_name', '_run_id'])
+        movie_codes = pc.dictionary_encode(keys['movie_name'].combine_chunks()).indices.to_numpy()
+        last_positions = len(movie_codes) - 1 - np.unique(movie_codes[::-1], return_index = True)[1]
+        is_superseded = np.ones(len(movie_codes), dtype = bool)
+        is_superseded[last_positions] = False
+        superseded = keys.filter(pa.array(is_superseded))
+
+        # Excluding the tombstones and the superseded rows (a few per run) within the scan, along with the caller's filters
+        row_filter = ~pc.field('_deleted')
+        for run_id in set(superseded['_run_id'].to_pylist()):
+            superseded_names = superseded.filter(pc.equal(superseded['_run_id'], run_id))['movie_name']
+            row_filter = row_filter & ~((pc.field('_run_id') == run_id) & pc.field('movie_name').isin(superseded_names))
+        if filters:
+            row_filter = row_filter & pq.filters_to_expression(filters)
+
+        # Reading only the requested columns of the remaining rows, letting the row group statistics skip what they can
+        df = dataset.to_table(columns = columns, filter = row_filter).to_pandas()
+
+        # Typing the columns as read_csv would: integers stay integers unless some are missing, and missing text is NaN
+        for column in columns:
+            field_type = RAW_DATA_SCHEMA.field(column).type
+            if pa.types.is_integer(field_type) and df[column].notnull().all():
+                df[column] = df[column].astype('int64')
+            elif pa.types.is_string(field_type):
+                df[column] = df[column].fillna(np.nan)
+
+        return df
+
+    def compact(self):
+        """
+        Folding every partition into a single one holding only the current rows
+
+        Returns:
+            - partition_path (str): Path of the compacted partition, or None if the store is empty
+        """
+
+        partition_files = self._partition_files()
+        if len(partition_files) == 0:
+            return None
+
+        # Stamping the compacted rows with the latest run ID, so they stay current until a later run supersedes them
+        latest_run_id = partition_run_id(partition_files[-1])
+        table = conform_to_schema(self.read())
+        table = table.append_column('_run_id', pa.array([latest_run_id] * table.num_rows, type = pa.string()))
+        table = table.append_column('_deleted', pa.array([False] * table.num_rows, type = pa.bool_()))
+
+        # Writing the compacted partition before removing the old ones, so a concurrent read never misses a movie
+        partition_path = self._write_partition(table, f'part-{latest_run_id}-compacted.parquet')
+        for partition_file in partition_files:
+            if partition_file != partition_path:
+                os.remove(partition_file)
+
+        return partition_path
+
+    def import_csv(self, csv_path, run_id = None):
+        """
+        Importing a CSV of enriched movies (e.g. a legacy all_data.csv) as a partition
+
+        Args:
+            - csv_path (str): Path of the CSV file
+            - run_id (str): ID of the run the import is recorded under (defaults to the current time)
+
+        Returns:
+            - partition_path (str): Path of the written partition
+        """
+
+        return self.append(pd.read_csv(csv_path), run_id = run_id)
+
+    def export_csv(self, csv_path):
+        """
+        Exporting the current rows to a CSV file shaped like all_data.csv
+
+        Args:
+            - csv_path (str): Path of the CSV file to write
+        """
+
+        self.read().to_csv(f'{csv_path}.tmp', index = False)
+        os.replace(f'{csv_path}.tmp', csv_path)
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the store command
+    parser = argparse.ArgumentParser(description = 'Maintains the partitioned Parquet store of the enriched movies')
+    parser.add_argument('command', choices = ['compact', 'import-csv', 'export-csv', 'info'])
+    parser.add_argument('--path', required = True, help = 'Directory of the store')
+    parser.add_argument('--csv', help = 'CSV file to import from or export to')
+    args = parser.parse_args()
+    raw_data_store = RawDataStore(args.path)
+
+    # Running the command
+    if args.command == 'compact':
+        print(f'Compacted {len(raw_data_store.partitions())} partitions into {raw_data_store.compact()}')
+    elif args.command == 'import-csv':
+        print(f'Imported {args.csv} into {raw_data_store.import_csv(args.csv)}')
+    elif args.command == 'export-csv':
+        raw_data_store.export_csv(args.csv)
+        print(f'Exported the current rows to {args.csv}')
+    else:
+        print(f'{len(raw_data_store.partitions())} partitions holding {len(raw_data_store.read(columns = ["movie_name"]))} movies')
@@ -0,0 +1,54 @@
+# Importing the necessary Python libraries
+import numpy as np
+import pandas as pd
+
+
+
+## RECORD STREAMS
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the enriched columns stored as floats, as in all_data.csv
+FLOAT_COLUMNS = ['imdb_rating', 'imdb_votes', 'year']
+
+
+
+def iter_records(df):
+    """
+    Streaming the rows of a DataFrame as plain dictionaries, one at a time
+
+    Args:
+        - df (Pandas DataFrame): The DataFrame to stream
+
+    Returns:
+        - records (generator): One dictionary per row, keyed by column name
+    """
+
+    columns = list(df.columns)
+    for values in zip(*(df[column] for column in columns)):
+        yield dict(zip(columns, values))
+
+
+
+def records_to_dataframe(records, columns):
+    """
+    Materializing a stream of records into a DataFrame in a single step
+
+    Args:
+        - records (iterable): Dictionaries keyed by column name (e.g. the output of an enrichment stage)
+        - columns (list): The columns of the DataFrame, in order
+
+    Returns:
+        - df (Pandas DataFrame): One row per record, with the IMDb numbers stored as floats
+    """
+
+    # Collecting the values column by column as the records stream past, so no record outlives its own step
+    values = {column: [] for column in columns}
+    for record in records:
+        for column in columns:
+            values[column].append(record.get(column, np.nan))
+    df = pd.DataFrame(values, columns = columns)
+
+    # Casting the numeric columns that rows without a value would otherwise leave as objects
+    float_columns = [column for column in FLOAT_COLUMNS if column in df.columns]
+    df[float_columns] = df[float_columns].astype(float)
+
+    return df
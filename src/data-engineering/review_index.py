@@ -0,0 +1,145 @@
+# Importing the necessary Python libraries
+import os
+import json
+import pandas as pd
+
+
+
+## REVIEW HASHING
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the review fields whose edits in the Google Sheet should trigger a re-enrichment
+REVIEW_FIELDS = ['biehn_scale_rating', 'biehn_yes_or_no']
+
+# Defining the name of the persisted index, stored inside the raw data store directory next to the partitions it describes
+REVIEW_INDEX_FILE = 'review_index.json'
+
+
+
+def hash_reviews(df):
+    """
+    Hashing the review fields of every row, vectorized
+
+    Args:
+        - df (Pandas DataFrame): A DataFrame with the "movie_name" and REVIEW_FIELDS columns
+
+    Returns:
+        - review_hashes (Pandas Series): The 64-bit content hash of each movie's review fields, indexed by movie name
+    """
+
+    # Casting the fields to fixed types first so a rating read back as 7 still hashes like 7.0
+    df_fields = pd.DataFrame({'biehn_scale_rating': pd.to_numeric(df['biehn_scale_rating'], errors = 'coerce').astype(float),
+                              'biehn_yes_or_no': df['biehn_yes_or_no'].astype(str)})
+    hashes = pd.util.hash_pandas_object(df_fields, index = False)
+    review_hashes = pd.Series(hashes.values, index = pd.Index(df['movie_name'], name = 'movie_name'), dtype = 'uint64')
+
+    # Keeping the last review of a title listed more than once, so every title has a single hash
+    return review_hashes[~review_hashes.index.duplicated(keep = 'last')]
+
+
+
+## REVIEW INDEX
+## ---------------------------------------------------------------------------------------------------------------------
+class ReviewIndex:
+    """
+    Persisted index from every enriched movie name to the content hash of its review fields
+
+    Comparing the Google Sheet against the index is a vectorized hash and hash table lookup per review instead of a
+    merge against all_data.csv, and catches edited ratings as well as new titles. The index is only advanced for the
+    movies whose enriched rows were actually saved, so a movie that failed enrichment is detected again on the next run.
+
+    Args:
+        - review_hashes (Pandas Series): The content hash of each movie's review fields, indexed by movie name
+    """
+
+    def __init__(self, review_hashes = None):
+        if review_hashes is None:
+            review_hashes = pd.Series([], index = pd.Index([], dtype = object, name = 'movie_name'), dtype = 'uint64')
+        self.review_hashes = review_hashes
+
+    def __len__(self):
+        return len(self.review_hashes)
+
+    def diff(self, df_reviews):
+        """
+        Comparing the current reviews against the index
+
+        Args:
+            - df_reviews (Pandas DataFrame): All the reviews from the Google Sheet
+
+        Returns:
+            - new (set): Names of the movies reviewed since the last run
+            - changed (set): Names of the movies whose review fields were edited since the last run
+            - deleted (set): Names of the indexed movies no longer in the Google Sheet
+            - review_hashes (Pandas Series): The content hash of every current review, to be passed back to update
+        """
+
+        review_hashes = hash_reviews(df_reviews)
+
+        # Splitting the reviews into unindexed titles and indexed titles, comparing the latter's hashes
+        is_indexed = review_hashes.index.isin(self.review_hashes.index)
+        review_hashes_indexed = review_hashes[is_indexed]
+        is_changed = self.review_hashes.reindex(review_hashes_indexed.index).values != review_hashes_indexed.values
+
+        new = set(review_hashes.index[~is_indexed])
+        changed = set(review_hashes_indexed.index[is_changed])
+        deleted = set(self.review_hashes.index.difference(review_hashes.index))
+
+        return new, changed, deleted, review_hashes
+
+    def update(self, review_hashes, movie_names, deleted = ()):
+        """
+        Advancing the index for the movies whose enriched rows were saved
+
+        Args:
+            - review_hashes (Pandas Series): The content hashes returned by diff
+            - movie_names (iterable): Names of the movies that were enriched and saved
+            - deleted (iterable): Names of the movies dropped from the saved data
+        """
+
+        updated_hashes = review_hashes[review_hashes.index.isin(list(movie_names))]
+        kept_hashes = self.review_hashes.drop(index = updated_hashes.index.union(list(deleted)), errors = 'ignore')
+        self.review_hashes = pd.concat([kept_hashes, updated_hashes])
+
+    def save(self, path):
+        # Writing to a temporary file and swapping it into place so an interrupted run never leaves a partial index
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(dict(zip(self.review_hashes.index, self.review_hashes.tolist())), f)
+        os.replace(f'{path}.tmp', path)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Building an index from the review fields saved in all_data.csv (used when no index was persisted yet)
+
+        Args:
+            - df (Pandas DataFrame): The data from the previous run
+
+        Returns:
+            - review_index (ReviewIndex): The populated index
+        """
+
+        return cls(hash_reviews(df))
+
+    @classmethod
+    def load(cls, path, df_previous_run):
+        """
+        Loading the persisted index, falling back to building it from the previous run's data
+
+        Args:
+            - path (str): Path of the persisted JSON index
+            - df_previous_run (Pandas DataFrame): The data from the previous run
+
+        Returns:
+            - review_index (ReviewIndex): The loaded index
+        """
+
+        if not os.path.exists(path):
+            print('No review index found. Building it from the previous run.')
+            return cls.from_dataframe(df_previous_run)
+
+        with open(path, 'r') as f:
+            review_hashes = json.load(f)
+
+        return cls(pd.Series(list(review_hashes.values()), index = pd.Index(list(review_hashes), dtype = object, name = 'movie_name'),
+                             dtype = 'uint64'))
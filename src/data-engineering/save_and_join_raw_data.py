@@ -4,23 +4,39 @@ import pandas as pd
 
 
 
-def save_and_join_raw_data(df_previous_run, df_new_data, OUTPUT_PATH):
+def save_and_join_raw_data(df_previous_run, df_new_data, OUTPUT_PATH, deleted = ()):
     """
-    Retrieving the appropriate data from the Open Movie Database (OMDb)
+    Joining the newly enriched movies into the data from previous runs and saving the full raw output
+
+    Rows of movies that were enriched again (e.g. after a rating was edited) replace their previous row in place, new
+    movies are appended, deleted movies are dropped, and every other row is carried over untouched.
 
     Args:
         - df_previous_run (Pandas DataFrame): A DataFrame containing data from previous runs
-        - df_new_data (Pandas DataFrame): A DataFrame containing the movies that need new data collected
+        - df_new_data (Pandas DataFrame): A DataFrame containing the movies that had new data collected
         - OUTPUT_PATH (str): The string location of where to place the data output
+        - deleted (set): Names of the movies no longer reviewed, to drop from the output
 
     Returns:
         - df_all_data (Pandas DataFrame): A DataFrame containing all joined data
     """
-    
-    # Concatenating the new data with data from the previous run
-    df_all_data = pd.concat([df_previous_run, df_new_data], axis = 0)
-    
-    # Saving the data to the appropriate output path
-    df_all_data.to_csv(os.path.join(OUTPUT_PATH, 'all_data.csv'), index = False)
-    
-    return df_all_data
\ No newline at end of file
+
+    # Noting where every previous movie sits so re-enriched rows keep their position and new rows go at the end
+    previous_positions = {movie_name: position for position, movie_name in enumerate(df_previous_run['movie_name'])}
+    new_positions = [previous_positions.get(movie_name, len(previous_positions) + position)
+                     for position, movie_name in enumerate(df_new_data['movie_name'])]
+
+    # Keeping the previous rows that were neither re-enriched nor deleted
+    is_kept = ~df_previous_run['movie_name'].isin(set(df_new_data['movie_name']) | set(deleted))
+    df_kept = df_previous_run[is_kept].assign(_position = [position for position, kept in enumerate(is_kept) if kept])
+
+    # Concatenating the new data with data from the previous run, in the previous run's order
+    df_all_data = pd.concat([df_kept, df_new_data.assign(_position = new_positions)], axis = 0)
+    df_all_data = df_all_data.sort_values('_position', kind = 'stable').drop(columns = ['_position']).reset_index(drop = True)
+
+    # Saving the data to a temporary file and swapping it into place, so an interrupted run never leaves a partial all_data.csv
+    output_file = os.path.join(OUTPUT_PATH, 'all_data.csv')
+    df_all_data.to_csv(f'{output_file}.tmp', index = False)
+    os.replace(f'{output_file}.tmp', output_file)
+
+    return df_all_data
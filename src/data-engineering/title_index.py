@@ -0,0 +1,267 @@
+# Importing the necessary Python libraries
+import re
+import gzip
+import json
+import unicodedata
+import pandas as pd
+from collections import Counter, defaultdict
+
+
+
+## TITLE NORMALIZATION
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the leading articles dropped from titles ("The Matrix" and "Matrix" should match)
+LEADING_ARTICLES = ('the ', 'a ', 'an ')
+
+# Defining the characters treated as separators rather than part of a word
+PUNCTUATION = re.compile(r'[^\w\s]')
+
+# Defining the library-style trailing article ("Big Short, The")
+TRAILING_ARTICLE = re.compile(r',\s*(the|a|an)\s*$')
+
+# Defining the Roman numerals read as sequel numbers ("Part III" and "Part 3" are the same movie, "Part II" is not)
+ROMAN_NUMERALS = {numeral: value for value, numeral in enumerate(['i', 'ii', 'iii', 'iv', 'v', 'vi', 'vii', 'viii', 'ix', 'x',
+                                                                   'xi', 'xii', 'xiii', 'xiv', 'xv', 'xvi', 'xvii', 'xviii',
+                                                                   'xix', 'xx'], start = 1)}
+
+
+
+def normalize_title_for_index(movie_name):
+    """
+    Normalizing a movie title for matching: accents, case, punctuation, "&" and leading articles are all ignored
+
+    Args:
+        - movie_name (str): The raw movie title
+
+    Returns:
+        - normalized_title (str): The normalized title (e.g. "The Lord of the Rings: The Two Towers" -> "lord of the rings the two towers")
+    """
+
+    # Stripping accents and lowercasing
+    normalized_title = unicodedata.normalize('NFKD', str(movie_name))
+    normalized_title = ''.join(char for char in normalized_title if not unicodedata.combining(char)).lower()
+
+    # Dropping a library-style trailing article, spelling out ampersands and dropping the remaining punctuation
+    normalized_title = TRAILING_ARTICLE.sub('', normalized_title)
+    normalized_title = PUNCTUATION.sub(' ', normalized_title.replace('&', ' and '))
+    normalized_title = ' '.join(normalized_title.split())
+
+    # Dropping a single leading article unless it is the whole title
+    for article in LEADING_ARTICLES:
+        if normalized_title.startswith(article) and len(normalized_title) > len(article):
+            normalized_title = normalized_title[len(article):]
+            break
+
+    return normalized_title
+
+
+
+def title_numbers(normalized_title):
+    """
+    Reading the numbers of a normalized title, digits or Roman numerals, so titles differing only by a sequel number never match
+    """
+
+    return sorted(int(token) if token.isdigit() else ROMAN_NUMERALS[token] for token in normalized_title.split()
+                  if token.isdigit() or token in ROMAN_NUMERALS)
+
+
+
+def title_trigrams(normalized_title):
+    """
+    Splitting a normalized title into its set of character trigrams, ignoring spaces so "spiderman" and "spider man" agree
+    """
+
+    padded_title = f'  {normalized_title.replace(" ", "")} '
+    return {padded_title[i:i + 3] for i in range(len(padded_title) - 2)}
+
+
+
+## TITLE INDEX
+## ---------------------------------------------------------------------------------------------------------------------
+class TitleIndex:
+    """
+    In-process index from movie titles to TMDb / IMDb IDs with exact and approximate (trigram) matching
+
+    Entries come from our reviewed movies (all_data.csv) plus any larger catalog plugged in with add_records, such as
+    TMDb's daily ID export. When several entries share a normalized title, the highest priority one wins; reviewed
+    movies always outrank catalog entries, and catalog entries are ranked by popularity.
+
+    Approximate matches are never made between titles whose numbers differ (e.g. "The Godfather Part II" and "Part III"),
+    but they can still pick the wrong movie, so callers that skip the TMDb search on a match should ask for exact ones.
+
+    Args:
+        - min_similarity (float): Minimum trigram Dice similarity for an approximate match to be accepted
+    """
+
+    def __init__(self, min_similarity = 0.95):
+        self.min_similarity = min_similarity
+
+        # Instantiating the entry storage, the exact lookup and the trigram postings
+        self._entries = []
+        self._exact = {}
+        self._trigram_postings = defaultdict(list)
+        self._trigram_counts = []
+        self._numbers = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, movie_name, tmdb_id, imdb_id = None, priority = 0.0):
+        """
+        Adding a single title to the index
+
+        Args:
+            - movie_name (str): The movie title
+            - tmdb_id (int): The TMDb ID of the movie
+            - imdb_id (str): The IMDb ID of the movie, if known
+            - priority (float): Rank used to break ties between entries sharing a normalized title
+        """
+
+        normalized_title = normalize_title_for_index(movie_name)
+        if normalized_title == '' or pd.isnull(tmdb_id):
+            return
+
+        # Keeping only the highest priority entry per normalized title
+        position = self._exact.get(normalized_title)
+        entry = {'movie_name': movie_name, 'tmdb_id': int(tmdb_id), 'imdb_id': imdb_id if pd.notnull(imdb_id) else None,
+                 'priority': priority}
+        if position is not None:
+            if priority > self._entries[position]['priority']:
+                self._entries[position] = entry
+            return
+
+        # Storing the new entry and its trigram postings
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._exact[normalized_title] = position
+        trigrams = title_trigrams(normalized_title)
+        self._trigram_counts.append(len(trigrams))
+        self._numbers.append(title_numbers(normalized_title))
+        for trigram in trigrams:
+            self._trigram_postings[trigram].append(position)
+
+    def add_records(self, records, priority_field = None):
+        """
+        Adding a catalog of titles to the index
+
+        Args:
+            - records (iterable): Dictionaries with "movie_name" and "tmdb_id" keys (and optionally "imdb_id")
+            - priority_field (str): Optional record field used as the tie-breaking priority (e.g. "popularity")
+        """
+
+        for record in records:
+            priority = float(record.get(priority_field) or 0.0) if priority_field else 0.0
+            self.add(record['movie_name'], record['tmdb_id'], record.get('imdb_id'), priority = priority)
+
+    def lookup(self, movie_name, exact_only = False):
+        """
+        Looking up a title, trying an exact normalized match before an approximate trigram match
+
+        Args:
+            - movie_name (str): The movie title to look up
+            - exact_only (bool): Whether to return only an exact normalized match, skipping the approximate one
+
+        Returns:
+            - match (dict): A dictionary with "movie_name", "tmdb_id", "imdb_id" and "similarity", or None if nothing is close enough
+        """
+
+        normalized_title = normalize_title_for_index(movie_name)
+
+        # Trying the exact normalized match first
+        position = self._exact.get(normalized_title)
+        if position is not None:
+            return self._as_match(position, 1.0)
+        if exact_only:
+            return None
+
+        # Counting shared trigrams against every candidate entry
+        trigrams = title_trigrams(normalized_title)
+        shared_counts = Counter()
+        for trigram in trigrams:
+            shared_counts.update(self._trigram_postings.get(trigram, ()))
+        if len(shared_counts) == 0:
+            return None
+
+        # Scoring the candidates by Dice similarity and keeping the best one if it clears the threshold, skipping the
+        # candidates numbered differently (a sequel shares nearly all of its trigrams with the original)
+        numbers = title_numbers(normalized_title)
+        best_position, best_similarity = None, 0.0
+        for position, shared in shared_counts.items():
+            similarity = 2 * shared / (len(trigrams) + self._trigram_counts[position])
+            if similarity > best_similarity and self._numbers[position] == numbers:
+                best_position, best_similarity = position, similarity
+        if best_similarity < self.min_similarity:
+            return None
+
+        return self._as_match(best_position, best_similarity)
+
+    def _as_match(self, position, similarity):
+        entry = self._entries[position]
+        return {'movie_name': entry['movie_name'], 'tmdb_id': entry['tmdb_id'], 'imdb_id': entry['imdb_id'], 'similarity': similarity}
+
+    @classmethod
+    def from_dataframe(cls, df, min_similarity = 0.95):
+        """
+        Building an index from a DataFrame with "movie_name", "tmdb_id" and "imdb_id" columns (e.g. all_data.csv)
+
+        Args:
+            - df (Pandas DataFrame): The reviewed movies
+            - min_similarity (float): Minimum trigram Dice similarity for an approximate match to be accepted
+
+        Returns:
+            - title_index (TitleIndex): The populated index
+        """
+
+        title_index = cls(min_similarity = min_similarity)
+        for movie_name, tmdb_id, imdb_id in zip(df['movie_name'], df['tmdb_id'], df['imdb_id']):
+            title_index.add(movie_name, tmdb_id, imdb_id, priority = float('inf'))
+
+        return title_index
+
+    @classmethod
+    def from_csv(cls, path, catalog_path = None, min_similarity = 0.95):
+        """
+        Building an index from all_data.csv, optionally extended with a TMDb ID export catalog
+
+        Args:
+            - path (str): Location of the CSV of reviewed movies; a missing file gives an empty index
+            - catalog_path (str): Optional location of a TMDb daily ID export (gzipped JSON lines)
+            - min_similarity (float): Minimum trigram Dice similarity for an approximate match to be accepted
+
+        Returns:
+            - title_index (TitleIndex): The populated index
+        """
+
+        # Loading the reviewed movies if the file is present
+        try:
+            df = pd.read_csv(path, usecols = ['movie_name', 'tmdb_id', 'imdb_id'])
+        except FileNotFoundError:
+            df = pd.DataFrame(columns = ['movie_name', 'tmdb_id', 'imdb_id'])
+        title_index = cls.from_dataframe(df, min_similarity = min_similarity)
+
+        # Extending the index with the larger catalog
+        if catalog_path is not None:
+            title_index.add_records(read_tmdb_id_export(catalog_path), priority_field = 'popularity')
+
+        return title_index
+
+
+
+def read_tmdb_id_export(path):
+    """
+    Streaming the records of a TMDb daily ID export (http://files.tmdb.org/p/exports/movie_ids_MM_DD_YYYY.json.gz)
+
+    Args:
+        - path (str): Location of the gzipped (or plain) JSON lines export
+
+    Returns:
+        - records (generator): Dictionaries with "movie_name", "tmdb_id" and "popularity" keys, skipping adult titles
+    """
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding = 'utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get('adult'):
+                continue
+            yield {'movie_name': record['original_title'], 'tmdb_id': record['id'], 'popularity': record.get('popularity', 0.0)}
@@ -1,13 +1,25 @@
 # Importing the necessary Python libraries
 import os
+import sys
+import hmac
 import yaml
-import cloudpickle
+import tempfile
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, Request, Form
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from helpers import *
+from inference_executor import BoundedExecutor, ExecutorSaturated
+from request_coalescer import RequestCoalescer
+from micro_batcher import MicroBatcher
+from deferred_startup import DeferredStartup, ServiceNotReady
+from model_registry import ModelRegistry, RegistryBusy, activate_model_version
+
+# Importing the lightweight metadata cache directly, leaving the model and provider stack to the service initialization
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data-engineering'))
+from metadata_cache import MetadataCache, normalize_title
 
 
 
@@ -16,9 +28,39 @@ from helpers import *
 # Instantiating the FastAPI object
 api = FastAPI()
 
+# Instantiating the bounded executor that runs the blocking inference path off the event loop, shedding load with a 503 once its queue is full
+inference_executor = BoundedExecutor(max_workers = int(os.getenv('INFERENCE_WORKERS', '8')),
+                                     max_queue = int(os.getenv('INFERENCE_QUEUE_SIZE', '32')))
+
+# Instantiating the coalescer that lets concurrent requests for the same title share one prediction
+prediction_coalescer = RequestCoalescer(result_ttl = float(os.getenv('RESULT_CACHE_TTL', '30')))
+
+# Instantiating the thread pool that fans out the IMDb, OMDb and RT lookups for each movie concurrently (three per inference worker)
+lookup_executor = ThreadPoolExecutor(max_workers = int(os.getenv('LOOKUP_WORKERS', str(3 * inference_executor.max_workers))))
+
+# Instantiating the separate thread pool batch requests gather their movies on, so a large batch never starves the lookups of single-title requests
+batch_lookup_executor = ThreadPoolExecutor(max_workers = int(os.getenv('BATCH_LOOKUP_WORKERS', str(inference_executor.max_workers))))
+
+# Capping the number of movies a batch request may hold (larger ones are rejected with a 413)
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '100'))
+
+# Instantiating the metadata cache so repeat lookups of a title are read locally instead of over HTTP
+metadata_cache = MetadataCache(path = os.getenv('METADATA_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'metadata_cache.sqlite')),
+                               max_memory_entries = int(os.getenv('METADATA_CACHE_MEMORY_ENTRIES', '1024')),
+                               max_disk_entries = int(os.getenv('METADATA_CACHE_DISK_ENTRIES', '100000')))
+
 # Checking for Heroku environment variable
 IS_HEROKU = os.getenv('IS_HEROKU')
 
+# Checking for a model registry directory whose active version is served and hot-swapped as new versions are published
+MODEL_REGISTRY_PATH = os.getenv('MODEL_REGISTRY_PATH')
+
+# Getting the token the admin endpoints require (they are disabled without one)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Checking whether the model is loaded before serving ("eager") or in the background while liveness checks are answered ("deferred")
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'eager')
+
 # Setting the appropriate variables if deployed to Heroku
 if IS_HEROKU == 'Yes':
 
@@ -26,11 +68,11 @@ if IS_HEROKU == 'Yes':
     tmdb_key = os.getenv('TMDB_KEY')
     omdb_key = os.getenv('OMBD_KEY')
 
-    # Loading the respective models from the serialized pickle files
-    with open(os.path.join(os.getcwd(), './model/binary_classification_pipeline.pkl'), 'rb') as f:
-        binary_classification_pipeline = cloudpickle.load(f)
-    with open(os.path.join(os.getcwd(), './model/regression_pipeline.pkl'), 'rb') as f:
-        regression_pipeline = cloudpickle.load(f)
+    # Noting where the combined model (or the older pair of pipelines) was saved
+    model_dir = os.path.join(os.getcwd(), 'model')
+
+    # Noting where the reviewed movies live for the local title index
+    title_index_path = os.path.join(os.getcwd(), 'data/raw/all_data.csv')
 
     # Instantiating an object to hold the HTML files
     html_templates = Jinja2Templates(directory = os.path.join(os.getcwd(), 'src/model-inference-ui/webpage/html'))
@@ -47,11 +89,11 @@ else:
     tmdb_key = keys_yaml['api_keys']['tmdb_key']
     omdb_key = keys_yaml['api_keys']['omdb_key']
 
-    # Loading the respective models from the serialized pickle files
-    with open('../../models/binary_classification_pipeline.pkl', 'rb') as f:
-        binary_classification_pipeline = cloudpickle.load(f)
-    with open('../../models/regression_pipeline.pkl', 'rb') as f:
-        regression_pipeline = cloudpickle.load(f)
+    # Noting where the combined model (or the older pair of pipelines) was saved
+    model_dir = '../../models'
+
+    # Noting where the reviewed movies live for the local title index
+    title_index_path = '../../data/raw/all_data.csv'
 
     # Instantiating an object to hold the HTML files
     html_templates = Jinja2Templates(directory = 'webpage/html')
@@ -61,8 +103,202 @@ else:
 
 
 
+## SERVICE INITIALIZATION
+## ---------------------------------------------------------------------------------------------------------------------
+def load_model_version(version_dir):
+    """
+    Loading one model version for serving
+
+    Args:
+        - version_dir (str): Directory holding the combined model (or the older pair of pipelines)
+
+    Returns:
+        - movie_rating_model (obj): The loaded, flattened and compiled model
+        - micro_batcher (MicroBatcher): The micro-batcher that scores the movies of concurrent requests with this model
+    """
+
+    from helpers import load_movie_rating_model, flatten_forest_classifier, compile_movie_rating_model, predict_from_features
+
+    # Loading the model, flattening the forest of models pickled before the training export step did it and
+    # precompiling the shared feature engineering into NumPy buffers
+    movie_rating_model = load_movie_rating_model(version_dir)
+    movie_rating_model = flatten_forest_classifier(movie_rating_model)
+    movie_rating_model = compile_movie_rating_model(movie_rating_model)
+
+    # Instantiating the micro-batcher that scores the movies of concurrent requests with one model call
+    micro_batcher = MicroBatcher(partial(predict_from_features, movie_rating_model = movie_rating_model),
+                                 max_batch_size = int(os.getenv('MICRO_BATCH_MAX_SIZE', '32')),
+                                 max_wait_ms = float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', '2')))
+
+    return movie_rating_model, micro_batcher
+
+
+
+def load_shared_resources():
+    """
+    Loading the read-only resources that a pre-fork parent can load once for all of its workers
+
+    Returns:
+        - shared_resources (dict): The model registry (with its active version loaded) and the local title index
+    """
+
+    from helpers import TitleIndex
+
+    # Loading the active model version
+    model_registry = ModelRegistry(load_model_version, registry_dir = MODEL_REGISTRY_PATH, default_model_dir = model_dir,
+                                   poll_interval = float(os.getenv('MODEL_REGISTRY_POLL_SECONDS', '30')))
+    model_registry.load_active()
+
+    # Building the local title index so known titles skip the TMDb search round trip
+    title_index = TitleIndex.from_csv(os.getenv('TITLE_INDEX_PATH', title_index_path), catalog_path = os.getenv('TITLE_CATALOG_PATH'))
+
+    return {'model_registry': model_registry, 'title_index': title_index}
+
+# Holding the shared resources when a pre-fork parent loaded them before forking its workers (see prefork_server.py)
+preloaded_resources = None
+
+
+
+def preload_before_fork():
+    # Loading the shared resources in the pre-fork parent so every worker inherits them copy-on-write instead of loading its own
+    global preloaded_resources
+    preloaded_resources = load_shared_resources()
+
+
+
+def after_fork_in_worker():
+    # Giving a forked worker its own SQLite connection, since connections must not be used across a fork
+    metadata_cache.reopen()
+
+
+
+def initialize_service():
+    """
+    Loading the model and building the title index and provider clients, the slow part of starting the API
+
+    Returns:
+        - service (dict): The model registry, the inference functions and the long-lived objects every prediction uses
+    """
+
+    # Importing the model and feature engineering stack (pandas, sklearn, category_encoders) only now
+    from helpers import get_movie_features, get_movie_prediction, get_movie_predictions, ProviderClients
+
+    # Reusing the resources a pre-fork parent loaded, or loading them in this process, then watching the registry (if any)
+    shared_resources = preloaded_resources if preloaded_resources is not None else load_shared_resources()
+    shared_resources['model_registry'].start_watcher()
+
+    # Instantiating this process's long-lived provider clients, whose pooled keep-alive sessions are shared by its requests
+    provider_clients = ProviderClients(tmdb_key, omdb_key,
+                                       pool_size = int(os.getenv('PROVIDER_POOL_SIZE', '16')),
+                                       timeout = float(os.getenv('PROVIDER_TIMEOUT', '10')),
+                                       imdb_dataset_path = os.getenv('IMDB_DATASET_PATH'))
+
+    return dict(shared_resources,
+                get_movie_features = get_movie_features,
+                get_movie_prediction = get_movie_prediction,
+                get_movie_predictions = get_movie_predictions,
+                provider_clients = provider_clients)
+
+# Instantiating the tracker that runs the initialization once and reports readiness
+service_startup = DeferredStartup(initialize_service)
+
+@api.on_event('startup')
+def start_service():
+    # Loading in the background so liveness checks pass straight away, or before serving anything (as SageMaker expects of /ping)
+    if STARTUP_MODE == 'deferred':
+        service_startup.start()
+    else:
+        service_startup.run()
+
+
+
+## INFERENCE SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+async def gather_and_score(movie_name, service):
+    """
+    Gathering a movie's features on the inference executor and scoring them in a micro-batch awaited on the event loop
+
+    Awaiting the batch here rather than in an inference worker frees the worker for the next request meanwhile, so the
+    batch size is bounded by the concurrent requests (up to MICRO_BATCH_MAX_SIZE) instead of by INFERENCE_WORKERS.
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to infer for predictions
+        - service (dict): The initialized service (see initialize_service)
+
+    Returns:
+        - final_scores (dict): A dictionary containing the movie name, final scores and the model version that produced them
+    """
+
+    # Pinning the active model version here, since this coroutine is shared by (and outlives) the requests awaiting it
+    with service['model_registry'].acquire() as model_version:
+
+        # Scoring the whole request on the inference executor if this version has no micro-batcher
+        micro_batcher = model_version.micro_batcher
+        if micro_batcher is None:
+            final_scores = await inference_executor.run(service['get_movie_prediction'], movie_name, tmdb_key, omdb_key,
+                                                        model_version.movie_rating_model, lookup_executor = lookup_executor,
+                                                        metadata_cache = metadata_cache, provider_clients = service['provider_clients'],
+                                                        title_index = service['title_index'])
+            return dict(final_scores, model_version = model_version.version)
+
+        # Reserving a place in the micro-batch while the features are gathered, so queued movies wait for this one
+        with micro_batcher.reserve():
+            movie_features = await inference_executor.run(service['get_movie_features'], movie_name, tmdb_key, omdb_key,
+                                                          lookup_executor, metadata_cache = metadata_cache,
+                                                          provider_clients = service['provider_clients'],
+                                                          title_index = service['title_index'])
+            final_scores = await micro_batcher.submit_async(movie_features)
+            return dict(final_scores, model_version = model_version.version)
+
+
+
+async def predict_movie(movie_name):
+    """
+    Getting the movie review prediction on the inference executor, coalescing concurrent requests for the same title
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to infer for predictions
+
+    Returns:
+        - final_scores (dict): A dictionary containing the movie name, final scores and the model version that produced them
+    """
+
+    # Sharing one prediction between every concurrent request for the same normalized title and active model version
+    # (the shared prediction pins the version itself, so a caller that disconnects does not unpin it mid-prediction)
+    service = service_startup.get()
+    final_scores = await prediction_coalescer.run((service['model_registry'].active_version(), normalize_title(movie_name)),
+                                                  gather_and_score, movie_name, service)
+
+    # Echoing back the caller's own spelling of the title
+    return dict(final_scores, movie_name = movie_name)
+
+
+
+def check_admin_token(request):
+    # Rejecting admin requests unless an admin token is configured and the request presents it
+    if ADMIN_TOKEN is None:
+        return JSONResponse(content = {'error': 'Admin endpoints are disabled (ADMIN_TOKEN is not set).'}, status_code = 403)
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return JSONResponse(content = {'error': 'Invalid admin token.'}, status_code = 403)
+
+    return None
+
+
+
 ## API ENDPOINTS
 ## ---------------------------------------------------------------------------------------------------------------------
+@api.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(content = {'error': str(exc)}, status_code = 503, headers = {'Retry-After': '1'})
+
+@api.exception_handler(ServiceNotReady)
+async def service_not_ready_handler(request: Request, exc: ServiceNotReady):
+    return JSONResponse(content = {'error': str(exc)}, status_code = 503, headers = {'Retry-After': '5'})
+
+@api.exception_handler(RegistryBusy)
+async def registry_busy_handler(request: Request, exc: RegistryBusy):
+    return JSONResponse(content = {'error': str(exc)}, status_code = 409, headers = {'Retry-After': '5'})
+
 @api.get('/', response_class = HTMLResponse)
 async def homepage(request: Request):
     return html_templates.TemplateResponse('home.html', {'request': request})
@@ -70,11 +306,8 @@ async def homepage(request: Request):
 @api.post('/', response_class = HTMLResponse)
 async def results_page(request: Request, movie_name: str = Form(...)):
 
-    # Getting JSON from the body of the request and loading as Pandas DataFrame
-    df = pd.DataFrame(data = [movie_name], columns = ['movie_name'])
-
     # Getting the movie review predictions appropriately
-    final_scores = get_movie_prediction(movie_name, tmdb_key, omdb_key, binary_classification_pipeline, regression_pipeline)
+    final_scores = await predict_movie(movie_name)
 
     # Crafting the final response
     final_response = jsonable_encoder(final_scores)
@@ -84,23 +317,90 @@ async def results_page(request: Request, movie_name: str = Form(...)):
 @api.post('/invocations')
 async def predict(request: Request):
 
-    # Getting the response from the body of the request
-    response_body = await request.body()
-
-    # Converting response from binary to standard string
-    movie_name = 'The Matrix'
-
-    # Getting JSON from the body of the request and loading as Pandas DataFrame
-    df = pd.DataFrame(data = [movie_name], columns = ['movie_name'])
+    # Getting the movie name from the JSON body of the request (e.g. {"movie_name": "The Matrix"})
+    request_body = await request.json()
+    movie_name = request_body['movie_name']
 
     # Getting the movie review predictions appropriately
-    final_scores = get_movie_prediction(movie_name, tmdb_key, omdb_key, binary_classification_pipeline, regression_pipeline)
+    final_scores = await predict_movie(movie_name)
 
     # Crafting the final response
     final_response = jsonable_encoder(final_scores)
 
     return JSONResponse(content = final_response)
 
+@api.post('/invocations/batch')
+async def predict_batch(request: Request):
+
+    # Getting the movie names from the JSON array in the body of the request, accepting plain titles or {"movie_name": ...} objects
+    request_body = await request.json()
+    movie_names = [item['movie_name'] if isinstance(item, dict) else item for item in request_body]
+    if len(movie_names) > MAX_BATCH_SIZE:
+        return JSONResponse(content = {'error': f'A batch holds at most {MAX_BATCH_SIZE} movies; got {len(movie_names)}.'}, status_code = 413)
+
+    # Getting the movie review predictions for the whole batch, scored together on the pinned model version
+    service = service_startup.get()
+    with service['model_registry'].acquire() as model_version:
+        batch_scores = await inference_executor.run(service['get_movie_predictions'], movie_names, tmdb_key, omdb_key,
+                                                    model_version.movie_rating_model, lookup_executor = batch_lookup_executor,
+                                                    metadata_cache = metadata_cache, provider_clients = service['provider_clients'],
+                                                    title_index = service['title_index'])
+    batch_scores = [dict(final_scores, model_version = model_version.version) for final_scores in batch_scores]
+
+    # Crafting the final response
+    final_response = jsonable_encoder(batch_scores)
+
+    return JSONResponse(content = final_response)
+
 @api.get('/ping')
 async def health():
-    return JSONResponse(content = {'status': 'healthy!'}, status_code = 200)
\ No newline at end of file
+    # Answering as soon as the process serves requests (liveness), whether or not the model has loaded yet
+    return JSONResponse(content = {'status': 'healthy!'}, status_code = 200)
+
+@api.get('/ready')
+async def readiness():
+    # Answering 200 only once the model is loaded and predictions can be served (readiness)
+    startup_stats = service_startup.stats()
+    return JSONResponse(content = startup_stats, status_code = 200 if startup_stats['status'] == 'ready' else 503)
+
+@api.get('/metrics')
+async def metrics():
+    # Reporting the active version's micro-batch size and queue wait histograms alongside the other counters
+    model_registry_stats = service_startup.get()['model_registry'].stats() if service_startup.ready else None
+
+    return JSONResponse(content = {'startup': service_startup.stats(),
+                                   'metadata_cache': metadata_cache.stats(),
+                                   'inference_executor': inference_executor.stats(),
+                                   'prediction_coalescer': prediction_coalescer.stats(),
+                                   'micro_batcher': model_registry_stats['active_micro_batcher'] if model_registry_stats is not None else None,
+                                   'model_registry': model_registry_stats},
+                        status_code = 200)
+
+@api.get('/admin/models')
+async def list_model_versions(request: Request):
+    rejection = check_admin_token(request)
+    if rejection is not None:
+        return rejection
+
+    return JSONResponse(content = service_startup.get()['model_registry'].stats(), status_code = 200)
+
+@api.post('/admin/models/activate')
+async def activate_model(request: Request):
+    rejection = check_admin_token(request)
+    if rejection is not None:
+        return rejection
+
+    # Getting the version to activate from the JSON body (e.g. {"version": "20220722-120000"}), or reloading the manifest's active one
+    request_body = await request.json() if await request.body() else {}
+    version = request_body.get('version')
+    model_registry = service_startup.get()['model_registry']
+
+    # Recording the activation in the manifest so every worker's watcher converges on it, then loading it here in the background
+    try:
+        if version is not None and MODEL_REGISTRY_PATH is not None:
+            activate_model_version(MODEL_REGISTRY_PATH, version)
+        load_status = model_registry.request_version(version)
+    except KeyError as e:
+        return JSONResponse(content = {'error': e.args[0]}, status_code = 404)
+
+    return JSONResponse(content = load_status, status_code = 202)
\ No newline at end of file
@@ -0,0 +1,105 @@
+# Importing the necessary Python libraries
+import time
+import threading
+
+
+
+class ServiceNotReady(Exception):
+    """
+    Raised when a request needs the model before the service has finished starting up, so it can be answered with a 503
+    """
+    pass
+
+
+
+class DeferredStartup:
+    """
+    Running a service's slow initialization once, either in the foreground or on a background thread, and tracking readiness
+
+    The initialization function builds everything requests depend on (e.g. the model) and returns it. Until it has
+    finished, get raises ServiceNotReady, which lets the app answer liveness checks while it is still loading.
+
+    Args:
+        - initialize_func (function): Zero-argument function doing the slow initialization and returning the resources it built
+    """
+
+    def __init__(self, initialize_func):
+        self.initialize_func = initialize_func
+
+        # Instantiating the readiness state
+        self._lock = threading.Lock()
+        self._thread = None
+        self._resources = None
+        self._error = None
+        self._created_at = time.perf_counter()
+        self._ready_seconds = None
+
+    def run(self):
+        """
+        Running the initialization on the calling thread, re-raising any failure
+
+        Returns:
+            - resources (obj): The resources returned by initialize_func
+        """
+
+        try:
+            resources = self.initialize_func()
+        except Exception as e:
+            with self._lock:
+                self._error = e
+            raise
+
+        # Publishing the resources only once everything has been built
+        with self._lock:
+            self._resources = resources
+            self._ready_seconds = time.perf_counter() - self._created_at
+
+        return resources
+
+    def start(self):
+        # Running the initialization on a daemon thread (only once), leaving failures to be reported through stats
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target = self._run_quietly, name = 'deferred-startup', daemon = True)
+        self._thread.start()
+
+    def _run_quietly(self):
+        try:
+            self.run()
+        except Exception as e:
+            print(f'Service initialization failed: {e}')
+
+    @property
+    def ready(self):
+        return self._resources is not None
+
+    def get(self):
+        """
+        Getting the initialized resources
+
+        Returns:
+            - resources (obj): The resources returned by initialize_func; ServiceNotReady is raised while they are still being built
+        """
+
+        resources = self._resources
+        if resources is None:
+            if self._error is not None:
+                raise ServiceNotReady(f'Service failed to start: {self._error}')
+            raise ServiceNotReady('Service is still starting up.')
+
+        return resources
+
+    def stats(self):
+        """
+        Reporting the startup status
+
+        Returns:
+            - stats (dict): The status ("starting", "ready" or "failed"), the failure if any and how long startup took
+        """
+
+        with self._lock:
+            status = 'ready' if self._resources is not None else 'failed' if self._error is not None else 'starting'
+            return {'status': status,
+                    'error': str(self._error) if self._error is not None else None,
+                    'ready_seconds': self._ready_seconds}
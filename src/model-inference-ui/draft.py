@@ -28,17 +28,11 @@ api = FastAPI()
 # Checking for Heroku environment variable
 IS_HEROKU = os.getenv('IS_HEROKU')
 
-# Loading the models from the serialized pickle files
+# Loading the combined model (or the older pair of pipelines) from the serialized pickle files
 if IS_HEROKU == 'Yes':
-    with open(os.path.join(os.getcwd(), './models/binary_classification_pipeline.pkl'), 'rb') as f:
-        binary_classification_pipeline = cloudpickle.load(f)
-    with open(os.path.join(os.getcwd(), './models/regression_pipeline.pkl'), 'rb') as f:
-        regression_pipeline = cloudpickle.load(f)
+    movie_rating_model = load_movie_rating_model(os.path.join(os.getcwd(), './models'))
 else:
-    with open('../../models/binary_classification_pipeline.pkl', 'rb') as f:
-    	binary_classification_pipeline = cloudpickle.load(f)
-    with open('../../models/regression_pipeline.pkl', 'rb') as f:
-    	regression_pipeline = cloudpickle.load(f)
+    movie_rating_model = load_movie_rating_model('../../models')
 
 # Loading the API keys from respective sources
 if IS_HEROKU == 'Yes':
@@ -71,7 +65,7 @@ async def predict(request: Request):
     df = pd.DataFrame(data = [movie_name], columns = ['movie_name'])
 
     # Getting the movie review predictions appropriately
-    final_scores = get_movie_prediction(movie_name, tmdb_key, omdb_key, binary_classification_pipeline, regression_pipeline)
+    final_scores = get_movie_prediction(movie_name, tmdb_key, omdb_key, movie_rating_model)
 
     # Crafting the final response
     final_response = jsonable_encoder(final_scores)
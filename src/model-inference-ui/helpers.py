@@ -1,11 +1,29 @@
 # Importing the necessary Python libraries
+import os
+import sys
+import time
+import threading
 import numpy as np
 import pandas as pd
 from datetime import datetime
-import tmdbv3api
-from imdb import IMDb
-from omdb import OMDBClient
-from rotten_tomatoes_scraper.rt_scraper import MovieScraper
+from category_encoders.one_hot import OneHotEncoder
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import StandardScaler
+
+# Importing the shared provider support modules from the data engineering directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data-engineering'))
+from metadata_cache import MetadataCache, cached_fetch, normalize_title
+from provider_clients import ProviderClients
+from title_index import TitleIndex
+
+# Importing the feature engineering transformers shared with the training code, which trained models are pickled against
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../model-training'))
+from feature_transformers import MovieAgeTransformer, RTCriticScoreTransformer, NullImputer
+
+# Importing the combined model, its flattened forest and its artifact saving / loading shared with the training code
+from rating_model import (NODE_DTYPE, FlatForestClassifier, flatten_forest_classifier, MOVIE_RATING_MODEL_FILE,
+                          BINARY_CLASSIFICATION_PIPELINE_FILE, REGRESSION_PIPELINE_FILE, MOVIE_RATING_ARRAYS_DIR,
+                          MODEL_SKELETON_FILE, MovieRatingModel, save_movie_rating_model_arrays, load_movie_rating_model)
 
 
 
@@ -22,16 +40,7 @@ def generate_movie_age(df):
         - df (Pandas DataFrame): A DataFrame containing newly engineered feature of relative "year"
     """
 
-    # Extracting current year
-    currentYear = datetime.now().year
-
-    # Engineering the "year" column to be a relative "movie_age" column based on number of years since original release
-    for index, row in df.iterrows():
-        year_released = row['year']
-        movie_age = currentYear - year_released
-        df.loc[index, 'movie_age'] = movie_age
-
-    return df
+    return MovieAgeTransformer().transform(df)
 
 
 
@@ -46,18 +55,7 @@ def engineer_rt_critic_score(df):
         - df (Pandas DataFrame): A DataFrame containing an updated version of RT critic score
     """
 
-    # Removing percentage sign from RT critic score
-    for index, row in df.iterrows():
-        if pd.notnull(row['rt_critic_score']):
-            df.loc[index, 'rt_critic_score'] = int(row['rt_critic_score'][:2])
-
-    # Filling rt_critic_score nulls with critic average of 59%
-    df['rt_critic_score'].fillna(59, inplace = True)
-
-    # Transforming RT critic score into an integer datatype
-    df['rt_critic_score'] = df['rt_critic_score'].astype(int)
-
-    return df
+    return RTCriticScoreTransformer(fill_value = 59).transform(df)
 
 
 
@@ -72,10 +70,7 @@ def handle_nulls_for_metascore(df):
         - df (Pandas DataFrame): A DataFrame containing an updated version of the metascore
     """
 
-    # Filling metascore nulls with 50.0
-    df['metascore'].fillna(50.0, inplace = True)
-
-    return df
+    return NullImputer(fill_value = 50.0).transform(df[['metascore']])
 
 
 
@@ -90,64 +85,316 @@ def handle_nulls_for_rt_audience_score(df):
         - df (Pandas DataFrame): A DataFrame containing an updated version of the RT audience score
     """
 
-    # Filling rt_audience_score with audience average of 59%
-    df['rt_audience_score'].fillna(59.0, inplace = True)
+    return NullImputer(fill_value = 59.0).transform(df[['rt_audience_score']])
 
-    return df
 
 
-
-## MODEL INFERENCE FUNCTIONS
+## FEATURE SCHEMA
 ## ---------------------------------------------------------------------------------------------------------------------
-def get_movie_prediction(movie_name, tmdb_key, omdb_key, binary_classification_pipeline, regression_pipeline):
+def _parse_number(value):
+    # Converting a raw feature value into a float the way pd.to_numeric(errors = 'coerce') would (missing / unparseable is NaN)
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+
+def _parse_rt_critic_score(value, fill_value):
+    # Parsing a single raw critic score exactly as RTCriticScoreTransformer does ("88%" -> 88, missing or unparseable -> fill_value)
+    if not isinstance(value, str) and pd.isnull(value):
+        return fill_value
+    try:
+        return int(value[:2].rstrip('%')) if isinstance(value, str) else int(value)
+    except (TypeError, ValueError):
+        return fill_value
+
+
+
+class FeatureSchema:
     """
-    Getting the movie review prediction from the input data
+    Precompiled description of a fitted feature engineering pipeline that writes movie features straight into NumPy
+
+    The schema is read once from the fitted ColumnTransformer: the output column order, the one-hot vectors for every
+    known genre and the imputation constants. Filling a row is then a handful of scalar writes into a preallocated
+    per-thread buffer instead of building a DataFrame and running every transformer over it.
 
     Args:
-        - movie_name (str): A string containing the name of the movie to infer for predictions
-        - tmdb_key (str): A string representing the API key to get data from the TMDb API
-        - omdb_key (str): A string representing the API key to get data from the OMDb API
-        - binary_classification_pipeline (obj): The model representing the binary classification pipeline to obtain the Biehn binary yes / no approval score
-        - regression_pipeline (obj): The model representing the regression pipeline to obtain the Biehn Scale score
+        - column_ops (list): Tuples describing how each block of output columns is filled, in output order
+        - n_features (int): Total number of output columns
+    """
+
+    def __init__(self, column_ops, n_features):
+        self.column_ops = column_ops
+        self.n_features = n_features
+
+        # Instantiating the per-thread buffers so concurrent inference threads never share rows
+        self._local = threading.local()
+
+    @classmethod
+    def from_column_transformer(cls, column_transformer):
+        """
+        Reading the schema out of a fitted ColumnTransformer
+
+        Args:
+            - column_transformer (sklearn ColumnTransformer): The fitted feature engineering step, fitted on a DataFrame
+
+        Returns:
+            - feature_schema (FeatureSchema): The compiled schema producing the same columns as the ColumnTransformer
+        """
+
+        if not isinstance(column_transformer, ColumnTransformer) or not hasattr(column_transformer, 'feature_names_in_'):
+            raise ValueError('The feature engineering must be a ColumnTransformer fitted on a DataFrame.')
+
+        # Compiling each fitted transformer into the operation that fills its block of output columns
+        column_ops, start = [], 0
+        for name, transformer, columns in column_transformer.transformers_:
+            if transformer == 'drop' or len(columns) == 0:
+                continue
+
+            # Translating the remainder's positional columns back into names
+            columns = [column_transformer.feature_names_in_[column] if isinstance(column, (int, np.integer)) else column
+                       for column in columns]
+
+            if transformer == 'passthrough':
+                column_ops.append(('passthrough', columns, start))
+                start += len(columns)
+            elif isinstance(transformer, OneHotEncoder):
+                for ordinal_mapping, one_hot_mapping in zip(transformer.ordinal_encoder.mapping, transformer.mapping):
+                    one_hot_vectors = one_hot_mapping['mapping']
+                    width = one_hot_vectors.shape[1]
+                    vocabulary, missing_vector = {}, np.zeros(width)
+                    for category, code in ordinal_mapping['mapping'].items():
+                        if pd.isnull(category):
+                            missing_vector = one_hot_vectors.loc[code].to_numpy(dtype = np.float64)
+                        else:
+                            vocabulary[category] = one_hot_vectors.loc[code].to_numpy(dtype = np.float64)
+                    unknown_vector = (one_hot_vectors.loc[-1].to_numpy(dtype = np.float64) if -1 in one_hot_vectors.index
+                                      else np.zeros(width))
+                    column_ops.append(('one_hot', ordinal_mapping['col'], start, start + width, vocabulary, missing_vector,
+                                       unknown_vector))
+                    start += width
+            elif isinstance(transformer, MovieAgeTransformer):
+                column_ops.append(('movie_age', columns[0], start, transformer.current_year))
+                start += 2
+            elif isinstance(transformer, RTCriticScoreTransformer):
+                column_ops.append(('rt_critic_score', columns[0], start, transformer.fill_value))
+                start += 1
+            elif isinstance(transformer, NullImputer):
+                column_ops.append(('impute', columns, start, transformer.fill_value))
+                start += len(columns)
+            else:
+                raise ValueError(f'Cannot compile the "{name}" transformer ({type(transformer).__name__}).')
+
+        return cls(column_ops, start)
+
+    def fill_row(self, row, movie_features):
+        """
+        Writing one movie's engineered features into a row of a buffer
+
+        Args:
+            - row (NumPy array): The 1-D row to fill, of length n_features
+            - movie_features (dict): The raw features gathered for the movie (every feature in ALL_FEATS)
+        """
+
+        for column_op in self.column_ops:
+            kind = column_op[0]
+            if kind == 'passthrough':
+                _, columns, start = column_op
+                for offset, column in enumerate(columns):
+                    row[start + offset] = _parse_number(movie_features.get(column))
+            elif kind == 'one_hot':
+                _, column, start, stop, vocabulary, missing_vector, unknown_vector = column_op
+                value = movie_features.get(column)
+                row[start:stop] = missing_vector if pd.isnull(value) else vocabulary.get(value, unknown_vector)
+            elif kind == 'movie_age':
+                _, column, start, current_year = column_op
+                year_released = _parse_number(movie_features.get(column))
+                row[start] = year_released
+                row[start + 1] = (current_year if current_year is not None else datetime.now().year) - year_released
+            elif kind == 'rt_critic_score':
+                _, column, start, fill_value = column_op
+                row[start] = _parse_rt_critic_score(movie_features.get(column), fill_value)
+            elif kind == 'impute':
+                _, columns, start, fill_value = column_op
+                for offset, column in enumerate(columns):
+                    value = _parse_number(movie_features.get(column))
+                    row[start + offset] = fill_value if np.isnan(value) else value
+
+    def transform(self, feature_records, out = None):
+        """
+        Writing a batch of movies' engineered features into a buffer
+
+        Args:
+            - feature_records (list): Dictionaries of raw features, one per movie
+            - out (NumPy array): Optional buffer shaped (len(feature_records), n_features); a reused per-thread buffer otherwise
+
+        Returns:
+            - X (NumPy array): The filled buffer, valid until this thread's next call when no out buffer was given
+        """
+
+        # Reusing this thread's buffer while the batch size stays the same (column-major like the ColumnTransformer's
+        # output, so the downstream dot products sum in the same order and match the pipeline bit for bit)
+        if out is None:
+            out = getattr(self._local, 'buffer', None)
+            if out is None or out.shape[0] != len(feature_records):
+                out = self._local.buffer = np.empty((len(feature_records), self.n_features), order = 'F')
+
+        # Filling each row
+        for row, movie_features in zip(out, feature_records):
+            self.fill_row(row, movie_features)
+
+        return out
+
+
+
+class CompiledMovieRatingModel:
+    """
+    Combined model whose feature engineering is replaced by a FeatureSchema, predicting directly from feature dictionaries
+
+    Args:
+        - feature_schema (FeatureSchema): The compiled feature engineering shared by both heads
+        - classifier (obj): The fitted classification head
+        - scaler_mean (NumPy array): The regression head's fitted StandardScaler mean_, or None if it does not scale
+        - scaler_scale (NumPy array): The regression head's fitted StandardScaler scale_, or None if it does not scale
+        - regressor (obj): The fitted regression model applied after the scaling
+    """
+
+    def __init__(self, feature_schema, classifier, scaler_mean, scaler_scale, regressor):
+        self.feature_schema = feature_schema
+        self.classifier = classifier
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.regressor = regressor
+
+    def predict_all(self, feature_records):
+        """
+        Predicting both scores for a batch of movies from a single pass over their features
+
+        Args:
+            - feature_records (list): Dictionaries of raw features, one per movie
+
+        Returns:
+            - predictions (dict): The "biehn_yes_or_no" and "biehn_scale_score" prediction arrays, in the same order as feature_records
+        """
+
+        X_engineered = self.feature_schema.transform(feature_records)
+
+        # Scaling a copy for the regression head with the same arithmetic as StandardScaler.transform
+        X_scaled = X_engineered
+        if self.scaler_mean is not None:
+            X_scaled = (X_engineered - self.scaler_mean) / self.scaler_scale
+
+        return {'biehn_yes_or_no': self.classifier.predict(X_engineered),
+                'biehn_scale_score': self.regressor.predict(X_scaled)}
+
+
+
+def compile_movie_rating_model(movie_rating_model, X_check = None):
+    """
+    Replacing a fitted combined model's feature engineering and scaling with precompiled NumPy equivalents
+
+    Models using steps the schema does not know are returned unchanged (with a printed note) so serving still works.
+
+    Args:
+        - movie_rating_model (MovieRatingModel): The fitted combined model
+        - X_check (Pandas DataFrame): Optional raw rows used to verify the compiled model reproduces the model's predictions exactly
 
     Returns:
-        - final_scores (dict): A dictionary containing the movie name and final scores
+        - compiled_model (CompiledMovieRatingModel): The compiled model, or the original model if it could not be compiled
     """
 
-    # Defining which features to keep from each respective source
-    TMDB_FEATS = ['tmdb_id', 'imdb_id', 'budget', 'primary_genre', 'secondary_genre',
-                  'tmdb_popularity', 'revenue', 'runtime', 'tmdb_vote_average', 'tmdb_vote_count']
-    IMDB_FEATS = ['imdb_rating', 'imdb_votes', 'year']
-    OMDB_FEATS = ['rt_critic_score', 'metascore']
-    ROTT_FEATS = ['rt_audience_score']
-    ALL_FEATS = TMDB_FEATS + IMDB_FEATS + OMDB_FEATS + ROTT_FEATS
+    # Compiling the schema and unpacking the regression head, falling back to the sklearn model for anything unsupported
+    try:
+        feature_schema = FeatureSchema.from_column_transformer(movie_rating_model.feature_engineering)
+        regression_steps = [step for _, step in movie_rating_model.regressor.steps]
+        scaler_mean, scaler_scale = None, None
+        for step in regression_steps[:-1]:
+            if not isinstance(step, StandardScaler) or scaler_mean is not None:
+                raise ValueError(f'Cannot compile the {type(step).__name__} regression step.')
+            scaler_mean = step.mean_ if step.with_mean else np.zeros(feature_schema.n_features)
+            scaler_scale = step.scale_ if step.with_std else np.ones(feature_schema.n_features)
+    except (ValueError, AttributeError, KeyError) as e:
+        print(f'Serving the model without a compiled feature schema: {e}')
+        return movie_rating_model
+    compiled_model = CompiledMovieRatingModel(feature_schema, movie_rating_model.classifier, scaler_mean, scaler_scale,
+                                              regression_steps[-1])
+
+    # Verifying the compiled model matches the model's own predictions on the check rows
+    if X_check is not None:
+        expected = movie_rating_model.predict_all(X_check)
+        compiled = compiled_model.predict_all(X_check.to_dict('records'))
+        if not all(np.array_equal(expected[key], compiled[key]) for key in expected):
+            raise ValueError('Compiled model predictions do not match the combined model.')
+
+    return compiled_model
+
+
+
+## MODEL INFERENCE FUNCTIONS
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining which features to keep from each respective source
+TMDB_FEATS = ['tmdb_id', 'imdb_id', 'budget', 'primary_genre', 'secondary_genre',
+              'tmdb_popularity', 'revenue', 'runtime', 'tmdb_vote_average', 'tmdb_vote_count']
+IMDB_FEATS = ['imdb_rating', 'imdb_votes', 'year']
+OMDB_FEATS = ['rt_critic_score', 'metascore']
+ROTT_FEATS = ['rt_audience_score']
+ALL_FEATS = TMDB_FEATS + IMDB_FEATS + OMDB_FEATS + ROTT_FEATS
 
-    # Instantiating the TMDb objects and setting the API key
-    tmdb = tmdbv3api.TMDb()
-    tmdb_search = tmdbv3api.Search()
-    tmdb_movies = tmdbv3api.Movie()
-    tmdb.api_key = tmdb_key
 
-    # Instantiating the IMDbPY search object
-    imdb_search = IMDb()
 
-    # Instantiating the OMDb client
-    omdb_client = OMDBClient(apikey = omdb_key)
+def search_tmdb_id(movie_name, tmdb_search):
+    """
+    Searching TMDb for a movie title and returning the tmdb_id of the top result
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to search for
+        - tmdb_search (obj): The TMDb search object
 
-    # Getting JSON from the body of the request and loading as Pandas DataFrame
-    df = pd.DataFrame(data = [movie_name], columns = ['movie_name'])
+    Returns:
+        - tmdb_id (int): The tmdb_id of the top search result, or None if there are no results
+    """
 
     # Getting TMDb full search results
     tmdb_search_results = tmdb_search.movies({'query': movie_name})
 
     # Extracting tmdb_id if search results exist
     if len(tmdb_search_results) != 0:
-        tmdb_id = tmdb_search_results[0]['id']
+        return tmdb_search_results[0]['id']
+
+    return None
+
+
+
+def lookup_tmdb_features(movie_name, tmdb_search, tmdb_movies, metadata_cache = None, title_index = None):
+    """
+    Looking up the TMDb features for a movie, which also yields the imdb_id that the other providers need
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to look up
+        - tmdb_search (obj): The TMDb search object
+        - tmdb_movies (obj): The TMDb movie details object
+        - metadata_cache (MetadataCache): Optional cache for the search and details responses
+        - title_index (TitleIndex): Optional local title index consulted before the TMDb search
+
+    Returns:
+        - tmdb_features (dict): A dictionary containing every feature in TMDB_FEATS
+    """
+
+    # Getting the tmdb_id from an exact match in the local title index, falling back to the (cached) search results
+    # (an approximate match may be another movie, such as a sequel, so it never skips the search)
+    title_match = title_index.lookup(movie_name, exact_only = True) if title_index is not None else None
+    if title_match is not None:
+        tmdb_id = title_match['tmdb_id']
     else:
-        print(f'Results not found for title: {movie_name}.')
+        tmdb_id = cached_fetch(metadata_cache, 'tmdb_search', normalize_title(movie_name), lambda: search_tmdb_id(movie_name, tmdb_search))
+    if tmdb_id is None:
+        raise ValueError(f'Results not found for title: {movie_name}.')
 
-    # Getting the details of the movie using the tmdb_id
-    tmdb_details = dict(tmdb_movies.details(tmdb_id))
+    # Getting the (cached) details of the movie using the tmdb_id
+    tmdb_details = dict(cached_fetch(metadata_cache, 'tmdb', tmdb_id, lambda: tmdb_movies.details(tmdb_id)))
 
     # Adding tmdb_id to tmdb_details dictionary
     tmdb_details['tmdb_id'] = tmdb_id
@@ -172,79 +419,348 @@ def get_movie_prediction(movie_name, tmdb_key, omdb_key, binary_classification_p
     tmdb_details['tmdb_vote_average'] = tmdb_details.pop('vote_average')
     tmdb_details['tmdb_vote_count'] = tmdb_details.pop('vote_count')
 
-    # Adding the TMDb features to df
-    for feat in TMDB_FEATS:
-        df[feat] = tmdb_details[feat]
+    return {feat: tmdb_details[feat] for feat in TMDB_FEATS}
+
+
+
+def lookup_imdb_features(imdb_id, imdb_search, metadata_cache = None, imdb_dataset = None):
+    """
+    Looking up the IMDb features for a movie using its IMDb ID
+
+    Args:
+        - imdb_id (str): The IMDb ID of the movie (e.g. "tt0133093")
+        - imdb_search (obj): The IMDbPY search object
+        - metadata_cache (MetadataCache): Optional cache for the IMDb response
+        - imdb_dataset (IMDbDatasetIndex): Optional offline index built from the IMDb bulk dumps, consulted before IMDbPY
+
+    Returns:
+        - imdb_features (dict): A dictionary containing every feature in IMDB_FEATS
+    """
 
-    # Getting imdb_id from TMDb output and removing unnecessary characters
-    imdb_id = df['imdb_id'][0]
-    imdb_id = imdb_id[2:]
+    # Reading the offline index first and only falling back to IMDbPY for titles it does not have
+    imdb_details = imdb_dataset.get(imdb_id) if imdb_dataset is not None else None
 
-    # Using IMDbPY to get movie details using the IMDb ID
-    imdb_details = dict(imdb_search.get_movie(imdb_id))
+    # Using IMDbPY to get movie details using the IMDb ID without the leading "tt" characters
+    if imdb_details is None:
+        imdb_details = dict(cached_fetch(metadata_cache, 'imdb', imdb_id, lambda: imdb_search.get_movie(imdb_id[2:])))
 
     # Renaming the features appropriately
     imdb_details['imdb_rating'] = imdb_details.pop('rating')
     imdb_details['imdb_votes'] = imdb_details.pop('votes')
 
-    # Adding the IMDb features to df
-    for feat in IMDB_FEATS:
-        df[feat] = imdb_details[feat]
+    return {feat: imdb_details[feat] for feat in IMDB_FEATS}
+
+
+
+def lookup_omdb_features(imdb_id, omdb_client, metadata_cache = None):
+    """
+    Looking up the OMDb features (Rotten Tomatoes critic score and metascore) for a movie using its IMDb ID
+
+    Args:
+        - imdb_id (str): The IMDb ID of the movie (e.g. "tt0133093")
+        - omdb_client (obj): The OMDb client
+        - metadata_cache (MetadataCache): Optional cache for the OMDb response
+
+    Returns:
+        - omdb_features (dict): A dictionary containing every feature in OMDB_FEATS
+    """
 
     # Using the OMDb client to search for the movie results using the IMDb ID
-    omdb_details = omdb_client.imdbid(df['imdb_id'][0])
+    omdb_details = dict(cached_fetch(metadata_cache, 'omdb', imdb_id, lambda: omdb_client.imdbid(imdb_id)))
 
     # Setting the Rotten Tomatoes critic score based on availability
-    if len(omdb_details['ratings']) > 0:
-        for rater in omdb_details['ratings']:
-            if rater['source'] == 'Rotten Tomatoes':
-                omdb_details['rt_critic_score'] = rater['value']
-    else:
-        omdb_details['rt_critic_score'] = np.nan
+    omdb_details['rt_critic_score'] = np.nan
+    for rater in omdb_details['ratings']:
+        if rater['source'] == 'Rotten Tomatoes':
+            omdb_details['rt_critic_score'] = rater['value']
+
+    return {feat: omdb_details[feat] for feat in OMDB_FEATS}
+
+
+
+def scrape_rt_metadata(movie_name):
+    """
+    Scraping the raw Rotten Tomatoes metadata for a movie
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to scrape
+
+    Returns:
+        - metadata (dict): The metadata dictionary extracted by the RT scraper
+    """
+
+    # Importing the scraper (and its HTML parsing stack) on first use rather than when the API starts
+    from rotten_tomatoes_scraper.rt_scraper import MovieScraper
+
+    rt_movie_scraper = MovieScraper(movie_title = movie_name)
+    rt_movie_scraper.extract_metadata()
+
+    return rt_movie_scraper.metadata
+
 
-    # Adding the OMDb features to df
-    for feat in OMDB_FEATS:
-        df[feat] = omdb_details[feat]
+
+def lookup_rt_scores(movie_name, metadata_cache = None):
+    """
+    Scraping the Rotten Tomatoes critic and audience scores for a movie
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to scrape
+        - metadata_cache (MetadataCache): Optional cache for the scraped metadata (failed scrapes are not cached)
+
+    Returns:
+        - rt_scores (dict): A dictionary containing the scraped "rt_critic_score" and "rt_audience_score", null if the scrape fails
+    """
+
+    # Getting the movie metadata from the RT scraper, treating any scraper failure as missing scores
+    try:
+        rt_metadata = cached_fetch(metadata_cache, 'rt', normalize_title(movie_name), lambda: scrape_rt_metadata(movie_name))
+        return {'rt_critic_score': rt_metadata['Score_Rotten'],
+                'rt_audience_score': rt_metadata['Score_Audience']}
+    except:
+        return {'rt_critic_score': np.nan, 'rt_audience_score': np.nan}
+
+
+
+def reconcile_rt_audience_score(omdb_rt_critic_score, rt_scores):
+    """
+    Keeping the scraped RT audience score only if the scraped critic score agrees with the OMDb one
+
+    Args:
+        - omdb_rt_critic_score (str): The RT critic score from OMDb (e.g. "88%"), null if OMDb had none
+        - rt_scores (dict): The output of lookup_rt_scores
+
+    Returns:
+        - rott_features (dict): A dictionary containing every feature in ROTT_FEATS
+    """
 
     # Setting the Rotten Tomatoes audience score to be null if RT critic score is not present from OMDb output
-    if str(df['rt_critic_score'][0]) == 'nan':
-        rt_movie_details = {'rt_audience_score': np.nan}
+    if str(omdb_rt_critic_score) == 'nan':
+        return {'rt_audience_score': np.nan}
+
+    # Comparing the rt_critic_score from the RT scraper to the OMDb output
+    if rt_scores['rt_critic_score'] == omdb_rt_critic_score[:2]:
+        return {'rt_audience_score': rt_scores['rt_audience_score']}
+
+    return {'rt_audience_score': np.nan}
+
+
+
+def _timed(stage_timings, stage, func, *args):
+    """
+    Calling func(*args) and recording its wall clock duration in seconds under stage_timings[stage]
+    """
+
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        if stage_timings is not None:
+            stage_timings[stage] = time.perf_counter() - start
+
+
+
+def get_movie_features(movie_name, tmdb_key, omdb_key, lookup_executor = None, stage_timings = None, metadata_cache = None,
+                       provider_clients = None, title_index = None):
+    """
+    Gathering the raw model features for a single movie from TMDb, IMDb, OMDb and Rotten Tomatoes
+
+    Only the TMDb search and details calls have to run first since they produce the imdb_id. If a lookup_executor is
+    given, the IMDb, OMDb and Rotten Tomatoes lookups then run concurrently on it so latency is bound by the slowest
+    one rather than their sum. The RT scrape starts speculatively alongside OMDb and is discarded (or cancelled if it
+    has not started) when OMDb has no critic score to reconcile it against; without an executor it is skipped then.
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to gather features for
+        - tmdb_key (str): A string representing the API key to get data from the TMDb API
+        - omdb_key (str): A string representing the API key to get data from the OMDb API
+        - lookup_executor (concurrent.futures.Executor): Optional executor to fan the independent lookups out on
+        - stage_timings (dict): Optional dictionary filled with per-stage durations in seconds ("tmdb", "imdb", "omdb", "rt", "total")
+        - metadata_cache (MetadataCache): Optional cache so repeat lookups are served locally instead of over HTTP
+        - provider_clients (ProviderClients): Optional long-lived clients to reuse (new ones are built from the keys otherwise)
+        - title_index (TitleIndex): Optional local title index that lets known titles skip the TMDb search round trip
+
+    Returns:
+        - movie_features (dict): A dictionary containing the movie name and every feature in ALL_FEATS
+    """
+
+    # Noting the start time for the total duration
+    start = time.perf_counter()
+
+    # Instantiating the provider clients for this call only if long-lived ones were not passed in
+    if provider_clients is None:
+        provider_clients = ProviderClients(tmdb_key, omdb_key)
+    tmdb_search, tmdb_movies = provider_clients.tmdb_search, provider_clients.tmdb_movies
+    imdb_search, omdb_client = provider_clients.imdb_search, provider_clients.omdb_client
+    imdb_dataset = provider_clients.imdb_dataset
+
+    # Getting the TMDb features first since they contain the imdb_id needed downstream
+    tmdb_features = _timed(stage_timings, 'tmdb', lookup_tmdb_features, movie_name, tmdb_search, tmdb_movies,
+                           metadata_cache, title_index)
+    imdb_id = tmdb_features['imdb_id']
+
+    # Running the IMDb, OMDb and RT lookups either concurrently on the executor or one after another
+    if lookup_executor is not None:
+        imdb_future = lookup_executor.submit(_timed, stage_timings, 'imdb', lookup_imdb_features, imdb_id, imdb_search,
+                                             metadata_cache, imdb_dataset)
+        omdb_future = lookup_executor.submit(_timed, stage_timings, 'omdb', lookup_omdb_features, imdb_id, omdb_client, metadata_cache)
+        rt_future = lookup_executor.submit(_timed, stage_timings, 'rt', lookup_rt_scores, movie_name, metadata_cache)
+        omdb_features = omdb_future.result()
+
+        # Discarding the RT scrape (cancelling it if it has not started) if OMDb has no critic score to reconcile it against
+        if str(omdb_features['rt_critic_score']) == 'nan':
+            rt_future.cancel()
+            rt_scores = {'rt_critic_score': np.nan, 'rt_audience_score': np.nan}
+        else:
+            rt_scores = rt_future.result()
+        imdb_features = imdb_future.result()
     else:
-        # Setting the Rotten Tomatoes audience score appropriately from the RT scraper object if present
-        try:
-            # Getting the movie metadata from the RT scraper
-            movie_name = df['movie_name'][0]
-            rt_movie_scraper = MovieScraper(movie_title = movie_name)
-            rt_movie_scraper.extract_metadata()
-
-            # Extracting the critic and audience scores from the metadata
-            rt_critic_score = rt_movie_scraper.metadata['Score_Rotten']
-            rt_audience_score = rt_movie_scraper.metadata['Score_Audience']
-
-            # Comparing the rt_critic_score from the RT scraper to the OMDb output
-            if rt_critic_score == df['rt_critic_score'][0][:2]:
-                rt_movie_details = {'rt_audience_score': rt_audience_score}
-            else:
-                rt_movie_details = {'rt_audience_score': np.nan}
+        imdb_features = _timed(stage_timings, 'imdb', lookup_imdb_features, imdb_id, imdb_search, metadata_cache, imdb_dataset)
+        omdb_features = _timed(stage_timings, 'omdb', lookup_omdb_features, imdb_id, omdb_client, metadata_cache)
 
-        # Setting the Rotten Tomatoes audience score to be null if RT critic score is not present from OMDb output
-        except:
-            rt_movie_details = {'rt_audience_score': np.nan}
+        # Skipping the RT scrape entirely if OMDb has no critic score to reconcile it against
+        if str(omdb_features['rt_critic_score']) == 'nan':
+            rt_scores = {'rt_critic_score': np.nan, 'rt_audience_score': np.nan}
+        else:
+            rt_scores = _timed(stage_timings, 'rt', lookup_rt_scores, movie_name, metadata_cache)
 
-    # Adding the ROTT features to df
-    for feat in ROTT_FEATS:
-        df[feat] = rt_movie_details[feat]
+    # Merging every provider's features into a single dictionary
+    movie_features = {'movie_name': movie_name}
+    movie_features.update(tmdb_features)
+    movie_features.update(imdb_features)
+    movie_features.update(omdb_features)
+    movie_features.update(reconcile_rt_audience_score(omdb_features['rt_critic_score'], rt_scores))
 
-    # Getting the inference for the Biehn "yes or no" approval
-    df['biehn_yes_or_no'] = binary_classification_pipeline.predict(df[ALL_FEATS])
+    # Recording the total duration
+    if stage_timings is not None:
+        stage_timings['total'] = time.perf_counter() - start
 
-    # Getting the inference for the Biehn Scale score
-    df['biehn_scale_score'] = regression_pipeline.predict(df[ALL_FEATS])
+    return movie_features
 
-    # Establishing final output as a dictionary
-    final_scores = {'movie_name': df['movie_name'][0],
-                    'biehn_yes_or_no': df['biehn_yes_or_no'][0],
-                    'biehn_scale_score': df['biehn_scale_score'][0]
-                   }
 
-    return final_scores
\ No newline at end of file
+
+def predict_from_features(feature_records, movie_rating_model):
+    """
+    Scoring a batch of gathered movie features with a single feature engineering pass and one call per head
+
+    Args:
+        - feature_records (list): Dictionaries containing the movie name and every feature in ALL_FEATS, one per movie
+        - movie_rating_model (obj): The combined model (MovieRatingModel or CompiledMovieRatingModel) predicting the Biehn yes / no approval and Biehn Scale score
+
+    Returns:
+        - final_scores (list): A list of dictionaries containing the movie name and final scores, in the same order as feature_records
+    """
+
+    # Writing straight into the compiled schema's buffer, or building the DataFrame the sklearn feature engineering expects
+    if isinstance(movie_rating_model, CompiledMovieRatingModel):
+        predictions = movie_rating_model.predict_all(feature_records)
+    else:
+        predictions = movie_rating_model.predict_all(pd.DataFrame(feature_records)[ALL_FEATS])
+
+    # Establishing final output as a list of dictionaries
+    final_scores = [{'movie_name': movie_features['movie_name'],
+                     'biehn_yes_or_no': yes_or_no,
+                     'biehn_scale_score': scale_score}
+                    for movie_features, yes_or_no, scale_score in zip(feature_records, predictions['biehn_yes_or_no'],
+                                                                      predictions['biehn_scale_score'])]
+
+    return final_scores
+
+
+
+def get_movie_prediction(movie_name, tmdb_key, omdb_key, movie_rating_model, lookup_executor = None, metadata_cache = None,
+                         provider_clients = None, title_index = None, micro_batcher = None):
+    """
+    Getting the movie review prediction from the input data
+
+    Args:
+        - movie_name (str): A string containing the name of the movie to infer for predictions
+        - tmdb_key (str): A string representing the API key to get data from the TMDb API
+        - omdb_key (str): A string representing the API key to get data from the OMDb API
+        - movie_rating_model (obj): The combined model predicting the Biehn binary yes / no approval and the Biehn Scale score
+        - lookup_executor (concurrent.futures.Executor): Optional executor to run the IMDb, OMDb and RT lookups concurrently on
+        - metadata_cache (MetadataCache): Optional cache so repeat lookups are served locally instead of over HTTP
+        - provider_clients (ProviderClients): Optional long-lived clients to reuse (new ones are built from the keys otherwise)
+        - title_index (TitleIndex): Optional local title index that lets known titles skip the TMDb search round trip
+        - micro_batcher (MicroBatcher): Optional batcher that scores this movie together with concurrent requests' movies
+
+    Returns:
+        - final_scores (dict): A dictionary containing the movie name and final scores
+    """
+
+    # Handing the features to the micro-batcher so the model is evaluated once for every concurrently waiting movie,
+    # reserving a place in its batch while they are gathered
+    if micro_batcher is not None:
+        with micro_batcher.reserve():
+            movie_features = get_movie_features(movie_name, tmdb_key, omdb_key, lookup_executor, metadata_cache = metadata_cache,
+                                                provider_clients = provider_clients, title_index = title_index)
+            return micro_batcher.submit(movie_features)
+
+    # Gathering the features for the single movie
+    movie_features = get_movie_features(movie_name, tmdb_key, omdb_key, lookup_executor, metadata_cache = metadata_cache,
+                                        provider_clients = provider_clients, title_index = title_index)
+
+    return predict_from_features([movie_features], movie_rating_model)[0]
+
+
+
+def get_movie_predictions(movie_names, tmdb_key, omdb_key, movie_rating_model, lookup_executor = None, metadata_cache = None,
+                          provider_clients = None, title_index = None):
+    """
+    Getting the movie review predictions for a batch of movies, gathering their features concurrently and scoring all
+    of them with one call to the model
+
+    Args:
+        - movie_names (list): A list of strings containing the names of the movies to infer for predictions
+        - tmdb_key (str): A string representing the API key to get data from the TMDb API
+        - omdb_key (str): A string representing the API key to get data from the OMDb API
+        - movie_rating_model (obj): The combined model predicting the Biehn binary yes / no approval and the Biehn Scale score
+        - lookup_executor (concurrent.futures.Executor): Optional executor to gather the movies' features concurrently on
+        - metadata_cache (MetadataCache): Optional cache so repeat lookups are served locally instead of over HTTP
+        - provider_clients (ProviderClients): Optional long-lived clients to reuse (new ones are built from the keys otherwise)
+        - title_index (TitleIndex): Optional local title index that lets known titles skip the TMDb search round trip
+
+    Returns:
+        - batch_scores (list): A list of dictionaries in input order, each holding either the final scores or an "error" for that movie
+    """
+
+    # Instantiating the provider clients once for the whole batch if long-lived ones were not passed in
+    if provider_clients is None:
+        provider_clients = ProviderClients(tmdb_key, omdb_key)
+
+    # Gathering the features for every movie at once, one movie per lookup worker with its own lookups run in turn
+    # inside it (so the movies never wait on lookups queued behind each other on the same pool), or else one by one
+    def gather_features(movie_name):
+        return get_movie_features(movie_name, tmdb_key, omdb_key, metadata_cache = metadata_cache,
+                                  provider_clients = provider_clients, title_index = title_index)
+
+    if lookup_executor is not None:
+        feature_futures = [lookup_executor.submit(gather_features, movie_name) for movie_name in movie_names]
+    else:
+        feature_futures = [None] * len(movie_names)
+
+    # Collecting the features, noting a per-movie error instead of failing the whole batch
+    batch_scores = [None] * len(movie_names)
+    gathered_positions, gathered_features = [], []
+    for position, (movie_name, feature_future) in enumerate(zip(movie_names, feature_futures)):
+        try:
+            gathered_features.append(feature_future.result() if feature_future is not None else gather_features(movie_name))
+            gathered_positions.append(position)
+        except Exception as e:
+            batch_scores[position] = {'movie_name': movie_name, 'error': str(e)}
+
+    # Scoring every successfully gathered movie in a single batch, falling back to one movie at a time if the batch
+    # fails so only the movies whose features cannot be scored come back as errors
+    if len(gathered_features) > 0:
+        try:
+            final_scores = predict_from_features(gathered_features, movie_rating_model)
+        except Exception:
+            final_scores = []
+            for movie_features in gathered_features:
+                try:
+                    final_scores.append(predict_from_features([movie_features], movie_rating_model)[0])
+                except Exception as e:
+                    final_scores.append({'movie_name': movie_features['movie_name'], 'error': str(e)})
+        for position, scores in zip(gathered_positions, final_scores):
+            batch_scores[position] = scores
+
+    return batch_scores
@@ -0,0 +1,99 @@
+# Importing the necessary Python libraries
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+
+class ExecutorSaturated(Exception):
+    """
+    Raised when the inference executor's admission queue is full and a request should be shed with a 503
+    """
+    pass
+
+
+
+class BoundedExecutor:
+    """
+    Thread pool with an admission queue for running the blocking inference path off the event loop
+
+    Up to max_workers calls run at once and up to max_queue more wait for a free worker. Anything beyond that is
+    rejected immediately with ExecutorSaturated instead of piling up behind slow upstream lookups.
+
+    Args:
+        - max_workers (int): Number of worker threads running blocking calls concurrently
+        - max_queue (int): Number of calls allowed to wait for a free worker before new ones are rejected
+    """
+
+    def __init__(self, max_workers = 8, max_queue = 32):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        # Instantiating the worker pool and the counters
+        self._executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = 'inference')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queued = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Running a blocking function on the pool and awaiting its result without blocking the event loop
+
+        Args:
+            - func (function): The blocking function to call
+            - *args, **kwargs: Passed through to func
+
+        Returns:
+            - result (obj): The return value of func
+        """
+
+        # Admitting the call only if there is room in the workers or the queue
+        with self._lock:
+            if self._in_flight + self._queued >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturated(f'Inference queue is full ({self.max_workers} running, {self.max_queue} queued).')
+            self._queued += 1
+
+        # Submitting the call and awaiting it from the event loop
+        future = self._executor.submit(self._call, func, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Releasing the queue slot if the call was cancelled before a worker picked it up
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def _call(self, func, *args, **kwargs):
+        # Moving the call from queued to in flight once a worker picks it up
+        with self._lock:
+            self._queued -= 1
+            self._in_flight += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+
+    def stats(self):
+        """
+        Reporting the current load on the executor
+
+        Returns:
+            - stats (dict): A dictionary of counters suitable for returning as JSON
+        """
+
+        with self._lock:
+            return {'in_flight': self._in_flight,
+                    'queued': self._queued,
+                    'max_workers': self.max_workers,
+                    'max_queue': self.max_queue,
+                    'completed': self._completed,
+                    'rejected': self._rejected}
+
+    def shutdown(self, wait = True):
+        self._executor.shutdown(wait = wait)
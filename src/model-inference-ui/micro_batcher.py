@@ -0,0 +1,262 @@
+# Importing the necessary Python libraries
+import time
+import queue
+import bisect
+import asyncio
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, InvalidStateError
+
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram for tuning metrics
+
+    Args:
+        - bounds (list): Sorted inclusive upper bounds of the buckets; larger observations land in a final overflow bucket
+    """
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+
+        # Instantiating the bucket counts and running totals
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.bounds, value)] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def snapshot(self):
+        """
+        Reporting the bucket counts and summary statistics
+
+        Returns:
+            - snapshot (dict): Per-bucket counts keyed by upper bound ("le_<bound>" and "gt_<last bound>") plus count, mean and max
+        """
+
+        with self._lock:
+            buckets = {f'le_{bound:g}': count for bound, count in zip(self.bounds, self._counts)}
+            buckets[f'gt_{self.bounds[-1]:g}'] = self._counts[-1]
+            return {'buckets': buckets,
+                    'count': self._count,
+                    'mean': self._sum / self._count if self._count > 0 else 0.0,
+                    'max': self._max}
+
+
+
+class MicroBatcher:
+    """
+    Collecting single-row predictions from concurrent callers into one vectorized model call
+
+    Callers wait in submit (or await submit_async from an event loop) while a background thread gathers their items.
+    A batch is flushed as soon as it holds max_batch_size items or its oldest item has waited max_wait_ms, and each
+    caller then receives its own result. Callers announce themselves with reserve() while they prepare their item, and
+    a lone queued item is flushed straight away unless another reserved caller is still on its way, so a request
+    arriving alone never waits out max_wait_ms for a batch that cannot fill. If a batch fails, its items are evaluated
+    one by one so a bad item only fails its own caller.
+
+    The batch size is bounded by how many callers can wait at once: callers blocking in submit hold a thread each, so
+    submit_async is the way to let more requests share a batch than there are worker threads. Histograms of the flushed
+    batch sizes and of each item's queue wait are kept for tuning the two limits. The thread is only started by the
+    first submit, so a batcher built in a pre-fork parent starts its thread in the worker.
+
+    Args:
+        - predict_func (function): Function mapping a list of items to a list of results in the same order
+        - max_batch_size (int): Largest number of items evaluated in one call
+        - max_wait_ms (float): Longest time in milliseconds the oldest queued item waits for the batch to fill
+    """
+
+    def __init__(self, predict_func, max_batch_size = 32, max_wait_ms = 2.0):
+        self.predict_func = predict_func
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        # Instantiating the queue and the histograms, leaving the batching thread to the first submit
+        self._queue = queue.Queue()
+        self._closed_lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        self._reserved = 0
+        self._fallback_batches = 0
+        self._cancelled_items = 0
+        self.batch_size_histogram = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_histogram = Histogram([0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100])
+
+    @contextmanager
+    def reserve(self):
+        """
+        Announcing a caller that is preparing an item (e.g. gathering a movie's features) and will submit it soon
+
+        Queued items wait for reserved callers (up to max_wait_ms) instead of being flushed alone.
+        """
+
+        with self._closed_lock:
+            self._reserved += 1
+        try:
+            yield self
+        finally:
+            with self._closed_lock:
+                self._reserved -= 1
+
+    def _enqueue(self, item):
+        # Queuing the item with a future for its result, or returning None once the batcher has been shut down
+        future = Future()
+        with self._closed_lock:
+            if self._closed:
+                return None
+            if self._thread is None:
+                self._thread = threading.Thread(target = self._run, name = 'micro-batcher', daemon = True)
+                self._thread.start()
+            self._queue.put((time.perf_counter(), item, future))
+
+        return future
+
+    def submit(self, item):
+        """
+        Queuing an item and blocking until the batch containing it has been evaluated
+
+        Args:
+            - item (obj): The item to evaluate (e.g. a dictionary of movie features)
+
+        Returns:
+            - result (obj): The result for this item; exceptions raised by predict_func are re-raised here
+        """
+
+        # Evaluating the item on its own once the batcher has been shut down (e.g. for a request finishing on a retired model)
+        future = self._enqueue(item)
+        if future is None:
+            return self.predict_func([item])[0]
+
+        return future.result()
+
+    async def submit_async(self, item):
+        """
+        Queuing an item from an event loop and awaiting the batch containing it without holding a thread
+
+        Args:
+            - item (obj): The item to evaluate (e.g. a dictionary of movie features)
+
+        Returns:
+            - result (obj): The result for this item; exceptions raised by predict_func are re-raised here
+        """
+
+        # Evaluating the item on its own off the event loop once the batcher has been shut down
+        future = self._enqueue(item)
+        if future is None:
+            return await asyncio.get_running_loop().run_in_executor(None, lambda: self.predict_func([item])[0])
+
+        return await asyncio.wrap_future(future)
+
+    def _run(self):
+        while True:
+            # Blocking until the first item of the next batch arrives
+            first_entry = self._queue.get()
+            if first_entry is None:
+                return
+            batch = [first_entry]
+
+            # Keeping the thread alive through any unexpected failure, failing only the callers of the batch it hit
+            try:
+                self._fill(batch)
+                self._flush(batch)
+            except Exception as e:
+                print(f'Micro-batcher failed to evaluate a batch of {len(batch)} items: {e}')
+                for _, _, future in batch:
+                    self._set_exception(future, e)
+
+    def _fill(self, batch):
+        # Flushing a lone item straight away when no other reserved caller could join its batch
+        if self._queue.empty() and self._reserved <= 1:
+            return
+
+        # Filling the batch until it is full or the oldest item has waited long enough
+        deadline = batch[0][0] + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout = timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+
+    @staticmethod
+    def _set_exception(future, exception):
+        # Failing a caller's future unless it was already resolved or cancelled
+        try:
+            future.set_exception(exception)
+        except InvalidStateError:
+            pass
+
+    def _flush(self, batch):
+        # Dropping the items whose callers gave up (e.g. a cancelled submit_async), marking the rest as running so they
+        # can no longer be cancelled while their batch is evaluated
+        n_queued = len(batch)
+        batch[:] = [entry for entry in batch if entry[2].set_running_or_notify_cancel()]
+        self._cancelled_items += n_queued - len(batch)
+        if len(batch) == 0:
+            return
+
+        # Recording how long each item queued and how large the batch was
+        flushed_at = time.perf_counter()
+        for enqueued_at, _, _ in batch:
+            self.queue_wait_histogram.observe((flushed_at - enqueued_at) * 1000)
+        self.batch_size_histogram.observe(len(batch))
+
+        # Evaluating the whole batch at once and routing each result back to its caller
+        try:
+            results = self.predict_func([item for _, item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f'Expected {len(batch)} results from the batch but got {len(results)}.')
+        except Exception:
+            self._flush_one_by_one(batch)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _flush_one_by_one(self, batch):
+        # Evaluating each item of a failed batch on its own so only the callers of bad items receive an exception
+        self._fallback_batches += 1
+        for _, item, future in batch:
+            try:
+                future.set_result(self.predict_func([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+
+    def stats(self):
+        """
+        Reporting the batching configuration, the current queue depth and both histograms
+
+        Returns:
+            - stats (dict): A dictionary of counters suitable for returning as JSON
+        """
+
+        return {'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'queued': self._queue.qsize(),
+                'reserved': self._reserved,
+                'fallback_batches': self._fallback_batches,
+                'cancelled_items': self._cancelled_items,
+                'batch_size': self.batch_size_histogram.snapshot(),
+                'queue_wait_ms': self.queue_wait_histogram.snapshot()}
+
+    def shutdown(self):
+        # Stopping new items from queuing, letting the thread flush everything queued before the sentinel and exit
+        with self._closed_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is None:
+                return
+            self._queue.put(None)
+        self._thread.join()
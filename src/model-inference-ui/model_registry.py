@@ -0,0 +1,374 @@
+# Importing the necessary Python libraries
+import os
+import json
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+
+
+## REGISTRY LAYOUT
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the manifest naming the active version and the subdirectory holding one directory per published version
+MANIFEST_FILE = 'manifest.json'
+VERSIONS_DIR = 'versions'
+
+# Defining the version name used when the API serves a single model directory without a registry
+DEFAULT_VERSION = 'default'
+
+
+
+class RegistryBusy(Exception):
+    """
+    Raised when a new model version is requested while another is loading or the previous one is still draining
+    """
+    pass
+
+
+
+def read_manifest(registry_dir):
+    """
+    Reading the registry manifest
+
+    Args:
+        - registry_dir (str): The registry directory
+
+    Returns:
+        - manifest (dict): The "active" version name and the "versions" published so far (empty if nothing was published)
+    """
+
+    manifest_path = os.path.join(registry_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {'active': None, 'versions': {}}
+
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+
+def write_manifest(registry_dir, manifest):
+    # Writing the manifest to a temporary file and renaming it so watchers never read a partial manifest
+    temp_path = os.path.join(registry_dir, f'{MANIFEST_FILE}.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent = 2, sort_keys = True)
+    os.replace(temp_path, os.path.join(registry_dir, MANIFEST_FILE))
+
+
+
+def publish_model_version(model_dir, registry_dir, version = None, activate = True):
+    """
+    Copying a training job's model directory into the registry as a new version
+
+    Args:
+        - model_dir (str): Directory holding the trained artifacts (e.g. the SageMaker /opt/ml/model output)
+        - registry_dir (str): The registry directory
+        - version (str): Name of the new version (defaults to the current UTC timestamp)
+        - activate (bool): Whether to make the new version the active one
+
+    Returns:
+        - version (str): The name of the published version
+    """
+
+    version = version or datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+    manifest = read_manifest(registry_dir)
+    if version in manifest['versions']:
+        raise ValueError(f'Model version "{version}" is already published.')
+
+    # Copying the artifacts into a staging directory and renaming it into place
+    version_dir = os.path.join(registry_dir, VERSIONS_DIR, version)
+    staging_dir = f'{version_dir}.tmp'
+    shutil.rmtree(staging_dir, ignore_errors = True)
+    shutil.copytree(model_dir, staging_dir)
+    os.replace(staging_dir, version_dir)
+
+    # Recording the version (and activating it) in the manifest
+    manifest['versions'][version] = {'published_at': datetime.utcnow().isoformat(timespec = 'seconds'),
+                                     'source': os.path.abspath(model_dir)}
+    if activate:
+        manifest['active'] = version
+    write_manifest(registry_dir, manifest)
+
+    return version
+
+
+
+def activate_model_version(registry_dir, version):
+    """
+    Marking a published version as the active one in the manifest
+
+    Args:
+        - registry_dir (str): The registry directory
+        - version (str): Name of the published version to activate
+    """
+
+    manifest = read_manifest(registry_dir)
+    if version not in manifest['versions']:
+        raise KeyError(f'Model version "{version}" is not published in {registry_dir}.')
+
+    manifest['active'] = version
+    write_manifest(registry_dir, manifest)
+
+
+
+## RESIDENT MODEL VERSIONS
+## ---------------------------------------------------------------------------------------------------------------------
+class ModelVersion:
+    """
+    Loaded model version plus its micro-batcher, counting the requests still using it
+
+    Args:
+        - version (str): Name of the version
+        - movie_rating_model (obj): The loaded model
+        - micro_batcher (MicroBatcher): Optional micro-batcher scoring with this model, shut down once the version is retired and idle
+    """
+
+    def __init__(self, version, movie_rating_model, micro_batcher = None):
+        self.version = version
+        self.movie_rating_model = movie_rating_model
+        self.micro_batcher = micro_batcher
+        self.loaded_at = datetime.utcnow().isoformat(timespec = 'seconds')
+
+        # Instantiating the request count and lifecycle flags
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.retired = False
+        self.closed = False
+
+    def acquire(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            close_now = self.retired and self.in_flight == 0
+        if close_now:
+            self.close()
+
+    def retire(self):
+        # Marking the version as replaced, closing it straight away if no request is still using it
+        with self._lock:
+            self.retired = True
+            close_now = self.in_flight == 0
+        if close_now:
+            self.close()
+
+    def close(self):
+        # Dropping the model so its memory is released, stopping the micro-batcher off the calling thread (often the event loop)
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        if self.micro_batcher is not None:
+            threading.Thread(target = self.micro_batcher.shutdown, name = 'micro-batcher-shutdown', daemon = True).start()
+        self.movie_rating_model = None
+        self.micro_batcher = None
+
+
+
+class ModelRegistry:
+    """
+    Serving the active model version of a registry directory and swapping in new versions without a restart
+
+    A new version is loaded on a background thread while requests keep using the current one, then swapped in with a
+    single reference assignment. Requests that started on the old version finish on it, and the old version is
+    closed once the last of them has finished. A further version is only loaded once that has happened, so at most two
+    versions are ever resident. Without a registry directory the model directory is served as a single fixed version.
+
+    Args:
+        - load_func (function): Function loading a model directory into a (movie_rating_model, micro_batcher) pair
+        - registry_dir (str): Optional registry directory holding the manifest and the published versions
+        - default_model_dir (str): Model directory served when no registry directory is given
+        - poll_interval (float): Seconds between manifest checks by the watcher (0 disables the watcher)
+    """
+
+    def __init__(self, load_func, registry_dir = None, default_model_dir = None, poll_interval = 30.0):
+        self.load_func = load_func
+        self.registry_dir = registry_dir
+        self.default_model_dir = default_model_dir
+        self.poll_interval = poll_interval
+
+        # Instantiating the swap state
+        self._lock = threading.Lock()
+        self._active = None
+        self._retired = None
+        self._loading = None
+        self._last_error = None
+        self._swaps = 0
+        self._watcher = None
+
+    def _model_dir(self, version):
+        if self.registry_dir is None:
+            return self.default_model_dir
+        return os.path.join(self.registry_dir, VERSIONS_DIR, version)
+
+    def manifest_version(self):
+        """
+        Getting the version the manifest currently marks as active
+
+        Returns:
+            - version (str): The active version name (DEFAULT_VERSION when serving without a registry)
+        """
+
+        if self.registry_dir is None:
+            return DEFAULT_VERSION
+
+        version = read_manifest(self.registry_dir)['active']
+        if version is None:
+            raise ValueError(f'No model version has been published to {self.registry_dir}.')
+
+        return version
+
+    def _load_and_swap(self, version):
+        # Loading the version completely before it becomes visible to requests
+        start = time.perf_counter()
+        movie_rating_model, micro_batcher = self.load_func(self._model_dir(version))
+        model_version = ModelVersion(version, movie_rating_model, micro_batcher)
+
+        # Swapping it in and retiring the version it replaces
+        with self._lock:
+            retired_version, self._active = self._active, model_version
+            self._retired = retired_version
+            self._swaps += 1
+        if retired_version is not None:
+            retired_version.retire()
+        print(f'Serving model version {version} (loaded in {time.perf_counter() - start:.2f}s).')
+
+    def load_active(self):
+        # Loading the manifest's active version on the calling thread, as done once at startup
+        self._load_and_swap(self.manifest_version())
+
+    def request_version(self, version = None):
+        """
+        Starting to load a version in the background, to be swapped in once it has loaded
+
+        Args:
+            - version (str): The version to serve (defaults to the manifest's active version)
+
+        Returns:
+            - status (dict): The requested version and whether a load was started
+        """
+
+        version = version or self.manifest_version()
+        if self.registry_dir is None and version != DEFAULT_VERSION:
+            raise KeyError(f'Model version "{version}" is unknown; no model registry is configured.')
+        if self.registry_dir is not None and version not in read_manifest(self.registry_dir)['versions']:
+            raise KeyError(f'Model version "{version}" is not published in {self.registry_dir}.')
+
+        # Refusing to start a load that would make a third version resident
+        with self._lock:
+            if self._active is not None and self._active.version == version:
+                return {'version': version, 'loading': False}
+            if self._loading is not None:
+                raise RegistryBusy(f'Model version {self._loading} is still loading.')
+            if self._retired is not None and not self._retired.closed:
+                raise RegistryBusy(f'Model version {self._retired.version} is still finishing its in-flight requests.')
+            self._loading = version
+
+        threading.Thread(target = self._load_in_background, args = (version,), name = 'model-loader', daemon = True).start()
+
+        return {'version': version, 'loading': True}
+
+    def _load_in_background(self, version):
+        try:
+            self._load_and_swap(version)
+            self._last_error = None
+        except Exception as e:
+            self._last_error = f'{version}: {e}'
+            print(f'Failed to load model version {version}: {e}')
+        finally:
+            with self._lock:
+                self._loading = None
+
+    def active_version(self):
+        # Naming the active version without pinning it (e.g. to key a request before the work that pins it starts)
+        with self._lock:
+            return self._active.version if self._active is not None else None
+
+    @contextmanager
+    def acquire(self):
+        """
+        Pinning the active version for the duration of a request
+
+        Returns:
+            - model_version (ModelVersion): The version the request should use from start to finish
+        """
+
+        with self._lock:
+            model_version = self._active
+            model_version.acquire()
+        try:
+            yield model_version
+        finally:
+            model_version.release()
+
+    def start_watcher(self):
+        # Polling the manifest on a daemon thread so publishing a version is enough to roll it out
+        if self.registry_dir is None or self.poll_interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target = self._watch, name = 'model-registry-watcher', daemon = True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.request_version()
+            except RegistryBusy:
+                continue
+            except (OSError, ValueError, KeyError) as e:
+                print(f'Could not check the model registry: {e}')
+
+    def stats(self):
+        """
+        Reporting the active, loading and draining versions
+
+        Returns:
+            - stats (dict): A dictionary of the registry state suitable for returning as JSON
+        """
+
+        with self._lock:
+            active, retired = self._active, self._retired
+            return {'registry_dir': self.registry_dir,
+                    'active_version': active.version if active is not None else None,
+                    'active_loaded_at': active.loaded_at if active is not None else None,
+                    'active_in_flight': active.in_flight if active is not None else 0,
+                    'active_micro_batcher': active.micro_batcher.stats() if active is not None and active.micro_batcher is not None else None,
+                    'loading_version': self._loading,
+                    'draining_version': retired.version if retired is not None and not retired.closed else None,
+                    'draining_in_flight': retired.in_flight if retired is not None and not retired.closed else 0,
+                    'swaps': self._swaps,
+                    'last_error': self._last_error}
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the registry command
+    parser = argparse.ArgumentParser(description = 'Publishes and activates versions in a model registry directory')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+    publish_parser = subparsers.add_parser('publish', help = 'Copies a trained model directory into the registry')
+    publish_parser.add_argument('model_dir')
+    publish_parser.add_argument('--registry-dir', required = True)
+    publish_parser.add_argument('--version', default = None)
+    publish_parser.add_argument('--no-activate', action = 'store_true')
+    activate_parser = subparsers.add_parser('activate', help = 'Marks a published version as active')
+    activate_parser.add_argument('version')
+    activate_parser.add_argument('--registry-dir', required = True)
+    list_parser = subparsers.add_parser('list', help = 'Prints the manifest')
+    list_parser.add_argument('--registry-dir', required = True)
+    args = parser.parse_args()
+
+    # Running the command
+    if args.command == 'publish':
+        version = publish_model_version(args.model_dir, args.registry_dir, version = args.version, activate = not args.no_activate)
+        print(f'Published model version {version}.')
+    elif args.command == 'activate':
+        activate_model_version(args.registry_dir, args.version)
+        print(f'Activated model version {args.version}.')
+    else:
+        print(json.dumps(read_manifest(args.registry_dir), indent = 2, sort_keys = True))
@@ -0,0 +1,170 @@
+# Importing the necessary Python libraries
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+import importlib
+import threading
+import traceback
+import uvicorn
+
+
+
+## PRE-FORK SERVER
+## ---------------------------------------------------------------------------------------------------------------------
+def bind_socket(host, port, backlog = 2048):
+    """
+    Binding the listening socket in the parent so every forked worker accepts connections from it
+
+    Args:
+        - host (str): The interface to listen on
+        - port (int): The port to listen on
+        - backlog (int): The maximum number of pending connections
+
+    Returns:
+        - sock (socket.socket): The bound, listening socket
+    """
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+
+    return sock
+
+
+
+def watch_parent(parent_pid, interval = 1.0):
+    # Shutting the worker down gracefully if the parent dies without stopping it (e.g. it was killed with SIGKILL)
+    while os.getppid() == parent_pid:
+        time.sleep(interval)
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+
+def run_worker(app_module, sock, log_level, parent_pid):
+    # Restoring the default signal handlers so uvicorn installs its own graceful shutdown handlers in the worker
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    threading.Thread(target = watch_parent, args = (parent_pid,), name = 'parent-watcher', daemon = True).start()
+
+    # Replacing anything per-process the app built before the fork (e.g. database connections)
+    if hasattr(app_module, 'after_fork_in_worker'):
+        app_module.after_fork_in_worker()
+
+    # Serving the app on the inherited socket, running its startup hooks in this worker
+    config = uvicorn.Config(app_module.api, log_level = log_level)
+    uvicorn.Server(config).run(sockets = [sock])
+
+
+
+class PreforkServer:
+    """
+    Parent process that forks uvicorn workers sharing one listening socket and restarts any that exit unexpectedly
+
+    Whatever the parent loaded before run is called (the model, the title index) is inherited by every worker
+    copy-on-write, so N workers use roughly one copy of the read-only model pages instead of N.
+
+    Args:
+        - app_module (module): The imported app module, exposing the FastAPI app as "api"
+        - sock (socket.socket): The bound, listening socket
+        - workers (int): Number of worker processes
+        - log_level (str): The uvicorn log level of the workers
+        - restart_delay (float): Seconds to wait before replacing a worker that exited, to avoid a tight crash loop
+    """
+
+    def __init__(self, app_module, sock, workers = 1, log_level = 'info', restart_delay = 1.0):
+        self.app_module = app_module
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.restart_delay = restart_delay
+
+        # Instantiating the worker table (pid -> worker number)
+        self._worker_pids = {}
+        self._stopping = False
+
+    def spawn_worker(self, worker_number):
+        parent_pid = os.getpid()
+        pid = os.fork()
+        if pid == 0:
+            # Running the worker in the child and never returning into the parent's code
+            exit_code = 0
+            try:
+                run_worker(self.app_module, self.sock, self.log_level, parent_pid)
+            except BaseException:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        self._worker_pids[pid] = worker_number
+        print(f'Started worker {worker_number} (pid {pid}).')
+
+    def stop(self, signum, frame):
+        # Asking every worker to shut down gracefully and not replacing them as they exit
+        self._stopping = True
+        for pid in list(self._worker_pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        # Forwarding termination to the workers
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for worker_number in range(self.workers):
+            self.spawn_worker(worker_number)
+
+        # Reaping workers as they exit and replacing the ones that died while the server is still running
+        while self._worker_pids:
+            pid, status = os.wait()
+            worker_number = self._worker_pids.pop(pid, None)
+            if worker_number is None or self._stopping:
+                continue
+            print(f'Worker {worker_number} (pid {pid}) exited with status {status}; restarting it.')
+            time.sleep(self.restart_delay)
+            if not self._stopping:
+                self.spawn_worker(worker_number)
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the server options
+    parser = argparse.ArgumentParser(description = 'Serves the API from pre-forked uvicorn workers that share the preloaded model')
+    parser.add_argument('--host', default = '0.0.0.0')
+    parser.add_argument('--port', type = int, default = int(os.getenv('PORT', '8080')))
+    parser.add_argument('--workers', type = int, default = int(os.getenv('WEB_CONCURRENCY', '1')))
+    parser.add_argument('--inference-workers', type = int, default = None, help = 'Inference threads per worker (INFERENCE_WORKERS)')
+    parser.add_argument('--provider-pool-size', type = int, default = None, help = 'Upstream connections per host per worker (PROVIDER_POOL_SIZE)')
+    parser.add_argument('--log-level', default = 'info')
+    args = parser.parse_args()
+
+    # Setting the per-worker pool sizes before the app reads them at import time
+    if args.inference_workers is not None:
+        os.environ['INFERENCE_WORKERS'] = str(args.inference_workers)
+    if args.provider_pool_size is not None:
+        os.environ['PROVIDER_POOL_SIZE'] = str(args.provider_pool_size)
+
+    # Importing the app and loading the model and title index once, in the parent
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    app_module = importlib.import_module('api')
+    app_module.preload_before_fork()
+
+    # Moving everything loaded so far out of the garbage collector's reach so collections in the workers do not write to
+    # (and so un-share) the inherited pages
+    gc.collect()
+    gc.freeze()
+
+    # Forking the workers on a shared listening socket
+    sock = bind_socket(args.host, args.port)
+    print(f'Serving on {args.host}:{args.port} with {args.workers} worker(s).')
+    PreforkServer(app_module, sock, workers = args.workers, log_level = args.log_level).run()
@@ -0,0 +1,81 @@
+# Importing the necessary Python libraries
+import time
+import asyncio
+from collections import OrderedDict
+
+
+
+class RequestCoalescer:
+    """
+    Single-flight coalescing of identical concurrent requests, backed by a short-lived result cache
+
+    The first caller for a key starts the work and every concurrent caller with the same key awaits that same task, so a
+    burst of N identical requests costs one upstream fetch and one model evaluation. Successful results are kept for
+    result_ttl seconds so requests arriving just after the burst are answered from memory too. Failures are not cached.
+
+    Args:
+        - result_ttl (float): Number of seconds a successful result is served from the result cache
+        - max_results (int): Maximum number of cached results before evicting the oldest
+    """
+
+    def __init__(self, result_ttl = 30.0, max_results = 1024):
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+
+        # Instantiating the in-flight tasks, the result cache and the counters
+        self._in_flight = {}
+        self._results = OrderedDict()
+        self._counters = {'executed': 0, 'coalesced': 0, 'result_cache_hits': 0}
+
+    async def run(self, key, coroutine_func, *args, **kwargs):
+        """
+        Running coroutine_func(*args, **kwargs) once per key across all concurrent callers
+
+        Args:
+            - key (str): The coalescing key (e.g. the normalized movie title)
+            - coroutine_func (function): The coroutine function doing the work
+            - *args, **kwargs: Passed through to coroutine_func
+
+        Returns:
+            - result (obj): The (possibly shared) result of the work
+        """
+
+        # Answering from the result cache if a fresh result exists
+        if key in self._results:
+            expires_at, result = self._results[key]
+            if expires_at > time.monotonic():
+                self._counters['result_cache_hits'] += 1
+                return result
+            del self._results[key]
+
+        # Joining the in-flight task for this key or starting a new one
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._counters['coalesced'] += 1
+        else:
+            self._counters['executed'] += 1
+            task = asyncio.ensure_future(coroutine_func(*args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda finished_task: self._on_done(key, finished_task))
+
+        # Shielding the shared task so one caller disconnecting does not cancel the work for the others
+        return await asyncio.shield(task)
+
+    def _on_done(self, key, task):
+        # Removing the finished task and caching its result if it succeeded
+        self._in_flight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._results[key] = (time.monotonic() + self.result_ttl, task.result())
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last = False)
+
+    def stats(self):
+        """
+        Reporting how many requests were executed, coalesced onto an in-flight request or answered from the result cache
+
+        Returns:
+            - stats (dict): A dictionary of counters suitable for returning as JSON
+        """
+
+        return dict(self._counters, in_flight = len(self._in_flight), cached_results = len(self._results))
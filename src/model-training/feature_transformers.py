@@ -0,0 +1,121 @@
+# Importing the necessary Python libraries
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+
+## FEATURE ENGINEERING TRANSFORMERS
+## ---------------------------------------------------------------------------------------------------------------------
+class MovieAgeTransformer(BaseEstimator, TransformerMixin):
+    """
+    Column-wise transformer that engineers the "movie_age" feature from the year the movie was released
+
+    Args:
+        - current_year (int): The year to measure movie age against (defaults to the current year at transform time)
+    """
+
+    def __init__(self, current_year = None):
+        self.current_year = current_year
+
+    def fit(self, X, y = None):
+        return self
+
+    def transform(self, X):
+        """
+        Producing the "year" and "movie_age" columns in a single vectorized pass
+
+        Args:
+            - X (Pandas DataFrame): A DataFrame containing the raw data for which year the movie was released
+
+        Returns:
+            - df (Pandas DataFrame): A new DataFrame containing "year" and the engineered "movie_age"
+        """
+
+        # Extracting the reference year
+        current_year = self.current_year if self.current_year is not None else datetime.now().year
+
+        # Pulling out the release years as a float array to match the legacy output dtype
+        year_released = np.asarray(X['year'], dtype = np.float64)
+
+        return pd.DataFrame({'year': year_released, 'movie_age': current_year - year_released}, index = X.index)
+
+
+
+class RTCriticScoreTransformer(BaseEstimator, TransformerMixin):
+    """
+    Column-wise transformer that parses the Rotten Tomatoes critic score (e.g. "88%") into an integer
+
+    Args:
+        - fill_value (int): The value used to fill missing critic scores (defaults to the critic average of 59%)
+    """
+
+    def __init__(self, fill_value = 59):
+        self.fill_value = fill_value
+
+    def fit(self, X, y = None):
+        return self
+
+    def transform(self, X):
+        """
+        Parsing and imputing the RT critic score in a single vectorized pass
+
+        Args:
+            - X (Pandas DataFrame): A DataFrame containing the raw data RT critic score
+
+        Returns:
+            - df (Pandas DataFrame): A new DataFrame containing the integer RT critic score
+        """
+
+        raw_scores = X['rt_critic_score']
+
+        # Parsing the numbers as they are, which covers every row of a numeric column
+        rt_critic_score = pd.to_numeric(raw_scores, errors = 'coerce')
+
+        # Parsing the text rows of a text or mixed column by truncating to the first two characters and removing the
+        # percentage sign to match the legacy parsing, leaving the numbers to the parse above
+        if pd.api.types.is_object_dtype(raw_scores) or pd.api.types.is_string_dtype(raw_scores):
+            text_prefixes = raw_scores.str[:2]
+            text_scores = pd.to_numeric(text_prefixes.str.rstrip('%'), errors = 'coerce')
+            rt_critic_score = text_scores.where(text_prefixes.notnull(), rt_critic_score)
+
+        # Filling the missing (or unparseable) scores and truncating the rest to integers
+        rt_critic_score = rt_critic_score.fillna(self.fill_value).to_numpy().astype(np.int64)
+
+        return pd.DataFrame({'rt_critic_score': rt_critic_score}, index = X.index)
+
+
+
+class NullImputer(BaseEstimator, TransformerMixin):
+    """
+    Column-wise transformer that fills nulls in every column it is given with a constant value
+
+    Args:
+        - fill_value (float): The value used to fill missing values
+    """
+
+    def __init__(self, fill_value = 0.0):
+        self.fill_value = fill_value
+
+    def fit(self, X, y = None):
+        return self
+
+    def transform(self, X):
+        """
+        Filling the nulls without modifying the incoming DataFrame
+
+        Args:
+            - X (Pandas DataFrame): A DataFrame containing the raw columns to impute
+
+        Returns:
+            - df (Pandas DataFrame): A new DataFrame containing the imputed columns
+        """
+
+        # Filling each column with a single vectorized "where" call (unparseable entries like "N/A" count as nulls)
+        imputed_columns = {}
+        for column in X.columns:
+            values = pd.to_numeric(X[column], errors = 'coerce').to_numpy(dtype = np.float64)
+            imputed_columns[column] = np.where(np.isnan(values), self.fill_value, values)
+
+        return pd.DataFrame(imputed_columns, index = X.index)
@@ -1,7 +1,10 @@
-# Importing the necessary Python libraries
-import numpy as np
-import pandas as pd
-from datetime import datetime
+# Importing the feature engineering transformers shared with the inference code
+from feature_transformers import MovieAgeTransformer, RTCriticScoreTransformer, NullImputer
+
+# Importing the combined model, its flattened forest and its artifact saving / loading, shared with the inference code
+from rating_model import (NODE_DTYPE, FlatForestClassifier, flatten_forest_classifier, MOVIE_RATING_MODEL_FILE,
+                          BINARY_CLASSIFICATION_PIPELINE_FILE, REGRESSION_PIPELINE_FILE, MOVIE_RATING_ARRAYS_DIR,
+                          MODEL_SKELETON_FILE, MovieRatingModel, save_movie_rating_model_arrays, load_movie_rating_model)
 
 
 
@@ -18,16 +21,7 @@ def generate_movie_age(df):
         - df (Pandas DataFrame): A DataFrame containing newly engineered feature of relative "year"
     """
 
-    # Extracting current year
-    currentYear = datetime.now().year
-
-    # Engineering the "year" column to be a relative "movie_age" column based on number of years since original release
-    for index, row in df.iterrows():
-        year_released = row['year']
-        movie_age = currentYear - year_released
-        df.loc[index, 'movie_age'] = movie_age
-
-    return df
+    return MovieAgeTransformer().transform(df)
 
 
 
@@ -42,18 +36,7 @@ def engineer_rt_critic_score(df):
         - df (Pandas DataFrame): A DataFrame containing an updated version of RT critic score
     """
 
-    # Removing percentage sign from RT critic score
-    for index, row in df.iterrows():
-        if pd.notnull(row['rt_critic_score']):
-            df.loc[index, 'rt_critic_score'] = int(row['rt_critic_score'][:2])
-
-    # Filling rt_critic_score nulls with critic average of 59%
-    df['rt_critic_score'].fillna(59, inplace = True)
-
-    # Transforming RT critic score into an integer datatype
-    df['rt_critic_score'] = df['rt_critic_score'].astype(int)
-
-    return df
+    return RTCriticScoreTransformer(fill_value = 59).transform(df)
 
 
 
@@ -68,10 +51,7 @@ def handle_nulls_for_metascore(df):
         - df (Pandas DataFrame): A DataFrame containing an updated version of the metascore
     """
 
-    # Filling metascore nulls with 50.0
-    df['metascore'].fillna(50.0, inplace = True)
-
-    return df
+    return NullImputer(fill_value = 50.0).transform(df[['metascore']])
 
 
 
@@ -86,7 +66,4 @@ def handle_nulls_for_rt_audience_score(df):
         - df (Pandas DataFrame): A DataFrame containing an updated version of the RT audience score
     """
 
-    # Filling rt_audience_score with audience average of 59%
-    df['rt_audience_score'].fillna(59.0, inplace = True)
-
-    return df
\ No newline at end of file
+    return NullImputer(fill_value = 59.0).transform(df[['rt_audience_score']])
@@ -0,0 +1,219 @@
+# Importing the necessary Python libraries
+import os
+import json
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from sklearn.base import clone
+from sklearn.metrics import f1_score, make_scorer
+from sklearn.model_selection import GridSearchCV, KFold, RandomizedSearchCV, StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+
+
+## SEARCH SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the default search: the grids of the model selection notebook, searched exhaustively with 5-fold CV
+DEFAULT_SEARCH_CONFIG = {
+    'search_type': 'grid',
+    'n_iter': 20,
+    'cv': 5,
+    'random_state': 42,
+    'classifier': {
+        'n_estimators': [25, 50, 75],
+        'max_depth': [10, 15, 20],
+        'min_samples_split': [5, 10, 15, 20],
+        'min_samples_leaf': [1, 2, 4]
+    },
+    'regressor': {
+        'alpha': [round(float(alpha), 3) for alpha in np.linspace(0.2, 2, 25)]
+    }
+}
+
+# Defining the scores reported for each head, the first of which picks the best candidate
+CLASSIFIER_SCORING = {'accuracy': 'accuracy', 'roc_auc': 'roc_auc', 'f1': make_scorer(f1_score, pos_label = 'Yes')}
+REGRESSOR_SCORING = {'neg_mean_absolute_error': 'neg_mean_absolute_error', 'r2': 'r2'}
+
+# Defining the name of the step every searched head's hyperparameters belong to
+SEARCHED_STEP = 'predictive_modeling'
+
+# Defining the files the search writes
+SEARCH_RESULTS_FILE = 'search_results.csv'
+SEARCH_BEST_PARAMS_FILE = 'search_best_params.json'
+
+
+
+def to_json_value(value):
+    # Converting the NumPy scalars a search can hand back (e.g. np.int64) into plain JSON values
+    return value.item()
+
+
+
+def read_hyperparameters(path):
+    """
+    Reading the hyperparameters SageMaker passes to a training job, decoding the values it stores as JSON strings
+
+    Args:
+        - path (str): Path of hyperparameters.json (e.g. "/opt/ml/input/config/hyperparameters.json")
+
+    Returns:
+        - hyperparameters (dict): The decoded hyperparameters, empty when the file does not exist
+    """
+
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, 'r') as f:
+        hyperparameters = json.load(f)
+
+    # Decoding values such as "true", "5" or '{"alpha": [0.1, 0.2]}', leaving plain strings like "grid" as they are
+    decoded_hyperparameters = {}
+    for name, value in hyperparameters.items():
+        try:
+            decoded_hyperparameters[name] = json.loads(value) if isinstance(value, str) else value
+        except json.JSONDecodeError:
+            decoded_hyperparameters[name] = value
+
+    return decoded_hyperparameters
+
+
+
+def load_search_config(path = None, overrides = None):
+    """
+    Building the search configuration from the defaults, an optional JSON file and optional overrides
+
+    Args:
+        - path (str): Optional JSON file with any of the DEFAULT_SEARCH_CONFIG keys
+        - overrides (dict): Optional values taking precedence over both (e.g. SageMaker hyperparameters)
+
+    Returns:
+        - search_config (dict): The search type ("grid" or "random"), n_iter, cv, random_state and each head's search space
+    """
+
+    search_config = dict(DEFAULT_SEARCH_CONFIG)
+    if path is not None:
+        with open(path, 'r') as f:
+            search_config.update(json.load(f))
+    search_config.update({name: value for name, value in (overrides or {}).items() if name in DEFAULT_SEARCH_CONFIG})
+
+    if search_config['search_type'] not in ('grid', 'random'):
+        raise ValueError(f'Unknown search type "{search_config["search_type"]}"; expected "grid" or "random".')
+
+    return search_config
+
+
+
+## HYPERPARAMETER SEARCH
+## ---------------------------------------------------------------------------------------------------------------------
+def build_search(pipeline, search_space, scoring, cv, search_config, n_jobs):
+    """
+    Creating the grid or randomized search over the hyperparameters of a pipeline's final step
+
+    The best candidate is not refit on the full data, since train() fits the final heads with the hyperparameters found.
+
+    Args:
+        - pipeline (sklearn Pipeline): The feature engineering followed by the head, whose last step is SEARCHED_STEP
+        - search_space (dict): Each hyperparameter of the head mapped to the list of values to try
+        - scoring (dict): The scores to report, the first of which picks the best candidate
+        - cv (sklearn splitter): The cross-validation folds
+        - search_config (dict): The search configuration (see load_search_config)
+        - n_jobs (int): Number of candidate fits run in parallel (-1 for every core)
+
+    Returns:
+        - search (GridSearchCV or RandomizedSearchCV): The unfitted search
+    """
+
+    param_space = {f'{SEARCHED_STEP}__{name}': values for name, values in search_space.items()}
+
+    if search_config['search_type'] == 'random':
+        return RandomizedSearchCV(pipeline, param_space, n_iter = search_config['n_iter'], scoring = scoring, refit = False,
+                                  cv = cv, n_jobs = n_jobs, random_state = search_config['random_state'])
+
+    return GridSearchCV(pipeline, param_space, scoring = scoring, refit = False, cv = cv, n_jobs = n_jobs)
+
+
+
+def search_results_table(search, head):
+    """
+    Flattening a fitted search's cross-validation results into one row per candidate
+
+    Args:
+        - search (GridSearchCV or RandomizedSearchCV): The fitted search
+        - head (str): The name of the searched head ("classifier" or "regressor")
+
+    Returns:
+        - df_results (Pandas DataFrame): The candidate's hyperparameters, fit / score times, mean and std of every score and rank
+    """
+
+    cv_results = search.cv_results_
+    score_columns = [column for column in cv_results if column.startswith(('mean_test_', 'std_test_', 'rank_test_'))]
+
+    df_results = pd.DataFrame({
+        'head': head,
+        'candidate': np.arange(len(cv_results['params'])),
+        'params': [json.dumps({name[len(SEARCHED_STEP) + 2:]: value for name, value in params.items()}, default = to_json_value)
+                   for params in cv_results['params']],
+        'mean_fit_time': cv_results['mean_fit_time'],
+        'std_fit_time': cv_results['std_fit_time'],
+        'mean_score_time': cv_results['mean_score_time'],
+        **{column: cv_results[column] for column in score_columns}
+    })
+
+    return df_results
+
+
+
+def search_movie_rating_model(df_raw, data_preprocessor, classifier, regressor, search_config, cache_dir, n_jobs = -1):
+    """
+    Searching the hyperparameters of both heads with cross-validation, fitting the feature engineering once per fold
+
+    Each head is searched as a Pipeline of the feature engineering and the head, with memory = cache_dir. The fitted
+    feature engineering (and the regressor's scaler) of every fold is cached on disk and shared by the worker processes,
+    so only the head is refit for each candidate.
+
+    Args:
+        - df_raw (Pandas DataFrame): The training data
+        - data_preprocessor (ColumnTransformer): The unfitted feature engineering stage
+        - classifier (obj): The unfitted binary classification head
+        - regressor (sklearn Pipeline): The unfitted regression head, whose last step is SEARCHED_STEP
+        - search_config (dict): The search configuration (see load_search_config)
+        - cache_dir (str): Directory of the fitted transformer cache (None refits it for every candidate)
+        - n_jobs (int): Number of candidate fits run in parallel (-1 for every core)
+
+    Returns:
+        - best_params (dict): The best hyperparameters found for the "classifier" and the "regressor"
+        - df_results (Pandas DataFrame): One row per candidate of both heads (see search_results_table)
+    """
+
+    memory = Memory(location = cache_dir, verbose = 0)
+    X = df_raw.drop(columns = ['biehn_yes_or_no', 'biehn_scale_rating'])
+
+    # Searching over the same feature engineering train() fits, so every fold sees the features the deployed model does
+    feature_engineering = [('feature_engineering', clone(data_preprocessor))]
+
+    # Pairing each head with its target, folds and scores
+    heads = {
+        'classifier': (Pipeline(steps = feature_engineering + [(SEARCHED_STEP, clone(classifier))], memory = memory),
+                       df_raw['biehn_yes_or_no'],
+                       StratifiedKFold(n_splits = search_config['cv'], shuffle = True, random_state = search_config['random_state']),
+                       CLASSIFIER_SCORING),
+        'regressor': (Pipeline(steps = feature_engineering + clone(regressor).steps, memory = memory),
+                      df_raw['biehn_scale_rating'],
+                      KFold(n_splits = search_config['cv'], shuffle = True, random_state = search_config['random_state']),
+                      REGRESSOR_SCORING)
+    }
+
+    best_params, results = {}, []
+    for head, (pipeline, y, cv, scoring) in heads.items():
+        print(f'Searching the {head} hyperparameters ({search_config["search_type"]} search, {search_config["cv"]} folds)...')
+        search = build_search(pipeline, search_config[head], scoring, cv, search_config, n_jobs)
+        search.fit(X, y)
+
+        # Picking the best candidate by the first score, keeping its hyperparameters without the pipeline step prefix
+        best_score = next(iter(scoring))
+        best_index = int(np.argmin(search.cv_results_[f'rank_test_{best_score}']))
+        best_params[head] = {name[len(SEARCHED_STEP) + 2:]: value for name, value in search.cv_results_['params'][best_index].items()}
+        results.append(search_results_table(search, head))
+        print(f'Best {head} hyperparameters: {best_params[head]} ({best_score} = {search.cv_results_[f"mean_test_{best_score}"][best_index]:.4f})')
+
+    return best_params, pd.concat(results, ignore_index = True)
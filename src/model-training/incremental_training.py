@@ -0,0 +1,398 @@
+# Importing the necessary Python libraries
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import cloudpickle
+from sklearn.metrics import accuracy_score, mean_absolute_error
+
+
+
+## INCREMENTAL TRAINING SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining how the heads are updated between full refits
+DEFAULT_INCREMENTAL_PARAMS = {
+    'max_trees': 100,                # Cap on the forest size, beyond which the oldest trees are retired
+    'trees_per_update': 10,          # Trees grown on every update
+    'window_size': 1000,             # Rows the new trees are grown on: the new rows plus the most recent other rows
+    'parity_check_every': 5,         # Updates between two parity checks against a full refit
+    'min_parity_rows': 10,           # New rows needed to run a due parity check, which is otherwise deferred
+    'max_accuracy_drop': 0.05,       # Accuracy the incremental model may lose to a full refit before it is replaced
+    'max_mae_increase': 0.1          # Mean absolute error it may gain over a full refit before it is replaced
+}
+
+# Defining the name of the persisted state
+INCREMENTAL_STATE_FILE = 'incremental_state.pkl'
+
+# Defining the target columns dropped from the training data to get the features
+TARGET_COLUMNS = ['biehn_yes_or_no', 'biehn_scale_rating']
+
+
+
+def load_incremental_params(overrides = None):
+    # Building the incremental parameters from the defaults and any overrides (e.g. SageMaker hyperparameters)
+    incremental_params = dict(DEFAULT_INCREMENTAL_PARAMS)
+    incremental_params.update({name: value for name, value in (overrides or {}).items() if name in DEFAULT_INCREMENTAL_PARAMS})
+    return incremental_params
+
+
+
+def hash_training_rows(df_raw):
+    """
+    Hashing every training row, vectorized, so the rows added or edited since the last update can be found
+
+    Args:
+        - df_raw (Pandas DataFrame): The training data
+
+    Returns:
+        - row_hashes (Pandas Series): The 64-bit content hash of each movie's row, indexed by movie name
+    """
+
+    row_hashes = pd.Series(pd.util.hash_pandas_object(df_raw, index = False).values,
+                           index = pd.Index(df_raw['movie_name'], name = 'movie_name'), dtype = 'uint64')
+
+    return row_hashes
+
+
+
+def lasso_coordinate_descent(gram, zy, n_samples, alpha, coef, max_iter = 1000, tol = 1e-4):
+    """
+    Solving the Lasso by cyclic coordinate descent on the centered Gram matrix, starting from the given coefficients
+
+    Minimizes the same objective as sklearn's Lasso, (1 / (2 * n_samples)) * ||y - Zw||^2 + alpha * ||w||_1, but from
+    the sufficient statistics alone, so an update costs nothing per training row. Starting from the previous
+    coefficients, a small delta typically converges in a few sweeps.
+
+    Args:
+        - gram (NumPy array): The centered Z^T Z, shaped (n_features, n_features)
+        - zy (NumPy array): The centered Z^T y, shaped (n_features,)
+        - n_samples (int): Number of training rows
+        - alpha (float): The Lasso regularization strength
+        - coef (NumPy array): The coefficients to start from
+        - max_iter (int): Maximum number of sweeps over the coefficients
+        - tol (float): The sweep stops once no coefficient moved by more than tol times the largest coefficient
+
+    Returns:
+        - coef (NumPy array): The fitted coefficients
+        - n_iter (int): Number of sweeps run
+    """
+
+    coef = np.array(coef, dtype = np.float64)
+    threshold = alpha * n_samples
+    diagonal = np.diag(gram)
+
+    # Keeping the residual correlation zy - gram @ coef up to date as each coefficient moves
+    residual_correlation = zy - gram @ coef
+    for n_iter in range(1, max_iter + 1):
+        max_change = 0.0
+        for j in np.flatnonzero(diagonal > 0):
+            rho = residual_correlation[j] + diagonal[j] * coef[j]
+            new_coef = np.sign(rho) * max(abs(rho) - threshold, 0.0) / diagonal[j]
+            change = new_coef - coef[j]
+            if change != 0.0:
+                residual_correlation -= gram[:, j] * change
+                coef[j] = new_coef
+                max_change = max(max_change, abs(change))
+
+        if max_change <= tol * max(np.abs(coef).max(), np.finfo(np.float64).tiny):
+            break
+
+    return coef, n_iter
+
+
+
+## INCREMENTAL TRAINING STATE
+## ---------------------------------------------------------------------------------------------------------------------
+class IncrementalTrainingState:
+    """
+    Model and bookkeeping carried from one training run to the next so only the new rows need to be learned
+
+    The feature engineering and the regressor's scaler stay as the last full refit fitted them. The forest grows new
+    trees on the new rows plus the most recent others, retiring its oldest trees beyond a cap. The Lasso keeps the
+    sufficient statistics of every training row (sums, Z^T Z and Z^T y of the scaled features), so added, edited and
+    deleted rows are folded in or out and the coefficients re-solved by a coordinate descent warm-started from the
+    previous ones. The result equals a Lasso fit on all the current rows through the frozen scaler.
+
+    Args:
+        - movie_rating_model (MovieRatingModel): The fitted model, with its RandomForestClassifier left unflattened
+        - training_params (dict): The "classifier" and "regressor" hyperparameters the model was fit with
+        - incremental_params (dict): The incremental training parameters (see DEFAULT_INCREMENTAL_PARAMS)
+        - df_raw (Pandas DataFrame): The training rows the model was fit on
+    """
+
+    def __init__(self, movie_rating_model, training_params, incremental_params, df_raw):
+        self.movie_rating_model = movie_rating_model
+        self.training_params = training_params
+        self.incremental_params = incremental_params
+        self.updates = 0
+        self.updates_since_parity_check = 0
+
+        # Keeping the last row of a movie listed twice, as every movie is tracked by name
+        df_raw = df_raw.drop_duplicates(subset = ['movie_name'], keep = 'last')
+        self.row_hashes = hash_training_rows(df_raw)
+
+        # Summarizing every row for the Lasso
+        self.lasso_rows = self.scaled_rows(df_raw)
+        self.n_samples, self.z_sum, self.y_sum = 0, 0.0, 0.0
+        self.zz, self.zy = 0.0, 0.0
+        self._accumulate(self.lasso_rows, sign = 1)
+
+    def scaled_rows(self, df):
+        # Engineering and scaling the rows as the frozen regressor sees them, next to their Biehn Scale rating
+        X_engineered = self.movie_rating_model.feature_engineering.transform(df.drop(columns = TARGET_COLUMNS))
+        Z = self.movie_rating_model.regressor[:-1].transform(X_engineered)
+        return pd.DataFrame(np.column_stack([Z, df['biehn_scale_rating'].values]), index = pd.Index(df['movie_name'], name = 'movie_name'))
+
+    def _accumulate(self, lasso_rows, sign):
+        # Adding (sign = 1) or removing (sign = -1) rows from the Lasso sufficient statistics
+        Z, y = lasso_rows.values[:, :-1], lasso_rows.values[:, -1]
+        self.n_samples += sign * len(y)
+        self.z_sum = self.z_sum + sign * Z.sum(axis = 0)
+        self.y_sum = self.y_sum + sign * y.sum()
+        self.zz = self.zz + sign * (Z.T @ Z)
+        self.zy = self.zy + sign * (Z.T @ y)
+
+    def diff(self, df_raw):
+        """
+        Finding the rows added or edited since the state was last updated, and the movies whose old rows must be unlearned
+
+        Args:
+            - df_raw (Pandas DataFrame): The current training data
+
+        Returns:
+            - df_delta (Pandas DataFrame): The new and edited rows
+            - removed (Pandas Index): Names of the edited and deleted movies whose previous rows the state holds
+            - row_hashes (Pandas Series): The content hash of every current row
+        """
+
+        df_raw = df_raw.drop_duplicates(subset = ['movie_name'], keep = 'last')
+        row_hashes = hash_training_rows(df_raw)
+
+        # Comparing the hashes of the movies the state already knows, the rest being new
+        previous_hashes = self.row_hashes.reindex(row_hashes.index)
+        is_delta = previous_hashes.isnull().values | (previous_hashes.values != row_hashes.values)
+        df_delta = df_raw[is_delta]
+
+        is_edited = is_delta & previous_hashes.notnull().values
+        removed = row_hashes.index[is_edited].union(self.row_hashes.index.difference(row_hashes.index))
+
+        return df_delta, removed, row_hashes
+
+    def recent_window(self, df_raw, df_delta):
+        # Taking the new rows plus the most recent others up to window_size (rows are read back in the order runs wrote them)
+        df_raw = df_raw.drop_duplicates(subset = ['movie_name'], keep = 'last')
+        df_others = df_raw[~df_raw['movie_name'].isin(df_delta['movie_name'])]
+        n_others = max(self.incremental_params['window_size'] - len(df_delta), 0)
+        return pd.concat([df_others.tail(n_others), df_delta])
+
+    def unseen_categories(self, df):
+        """
+        Finding the genres the fitted one-hot encoder never saw, which it would silently encode as no genre at all
+
+        Args:
+            - df (Pandas DataFrame): The rows to check
+
+        Returns:
+            - unseen_categories (list): The "column=value" pairs missing from the encoder's category mapping (missing values excluded)
+        """
+
+        ohe_engineering = self.movie_rating_model.feature_engineering.named_transformers_['ohe_engineering']
+        unseen_categories = []
+        for column_mapping in ohe_engineering.category_mapping:
+            values = pd.Series(df[column_mapping['col']].dropna().unique())
+            unseen_values = values[~values.isin(column_mapping['mapping'].index)]
+            unseen_categories += [f'{column_mapping["col"]}={value}' for value in unseen_values]
+
+        return unseen_categories
+
+    def check_parity(self, df_raw, df_delta, refit):
+        """
+        Comparing the incremental model against a full refit on rows neither has learned yet
+
+        Before the new rows are learned, the current model and a full refit on every other current row are both scored
+        on the new rows, the way the next run's movies would be predicted.
+
+        Args:
+            - df_raw (Pandas DataFrame): The current training data
+            - df_delta (Pandas DataFrame): The new and edited rows
+            - refit (callable): Fits a full MovieRatingModel on a DataFrame of training rows
+
+        Returns:
+            - parity (dict): The accuracy and mean absolute error of both models and whether the incremental one passed
+        """
+
+        full_model = refit(df_raw[~df_raw['movie_name'].isin(df_delta['movie_name'])])
+        parity = {'rows': len(df_delta)}
+        for name, movie_rating_model in [('incremental', self.movie_rating_model), ('full_refit', full_model)]:
+            X_engineered = movie_rating_model.feature_engineering.transform(df_delta.drop(columns = TARGET_COLUMNS))
+            parity[f'{name}_accuracy'] = accuracy_score(df_delta['biehn_yes_or_no'], movie_rating_model.classifier.predict(X_engineered))
+            parity[f'{name}_mae'] = mean_absolute_error(df_delta['biehn_scale_rating'], movie_rating_model.regressor.predict(X_engineered))
+
+        parity['passed'] = bool(parity['incremental_accuracy'] >= parity['full_refit_accuracy'] - self.incremental_params['max_accuracy_drop']
+                                and parity['incremental_mae'] <= parity['full_refit_mae'] + self.incremental_params['max_mae_increase'])
+
+        return parity
+
+    def grow_forest(self, df_window):
+        """
+        Growing new trees on the recent rows with warm_start, then retiring the oldest trees beyond max_trees
+
+        Args:
+            - df_window (Pandas DataFrame): The rows the new trees are grown on (see recent_window)
+
+        Returns:
+            - n_retired (int): Number of trees retired
+        """
+
+        forest = self.movie_rating_model.classifier
+        X_window = self.movie_rating_model.feature_engineering.transform(df_window.drop(columns = TARGET_COLUMNS))
+
+        # Appending trees_per_update trees fit on the window, leaving the existing trees untouched
+        forest.set_params(warm_start = True, n_estimators = len(forest.estimators_) + self.incremental_params['trees_per_update'])
+        forest.fit(X_window, df_window['biehn_yes_or_no'])
+
+        # Retiring the oldest trees, which come first in estimators_
+        n_retired = max(len(forest.estimators_) - self.incremental_params['max_trees'], 0)
+        forest.estimators_ = forest.estimators_[n_retired:]
+        forest.set_params(n_estimators = len(forest.estimators_))
+
+        return n_retired
+
+    def update_lasso(self, df_delta, removed):
+        """
+        Folding the new rows into the Lasso statistics, unlearning the removed ones, and re-solving from the previous coefficients
+
+        Args:
+            - df_delta (Pandas DataFrame): The new and edited rows
+            - removed (Pandas Index): Names of the edited and deleted movies whose previous rows must be unlearned
+
+        Returns:
+            - n_iter (int): Number of coordinate descent sweeps run
+        """
+
+        # Swapping the removed rows' contributions for the new rows'
+        removed_rows = self.lasso_rows[self.lasso_rows.index.isin(removed)]
+        delta_rows = self.scaled_rows(df_delta) if len(df_delta) > 0 else self.lasso_rows.iloc[:0]
+        self._accumulate(removed_rows, sign = -1)
+        self._accumulate(delta_rows, sign = 1)
+        self.lasso_rows = pd.concat([self.lasso_rows[~self.lasso_rows.index.isin(removed)], delta_rows])
+
+        # Centering the statistics as the Lasso's intercept does, then solving from the previous coefficients
+        lasso = self.movie_rating_model.regressor.steps[-1][1]
+        z_mean, y_mean = self.z_sum / self.n_samples, self.y_sum / self.n_samples
+        gram = self.zz - self.n_samples * np.outer(z_mean, z_mean)
+        zy = self.zy - self.n_samples * z_mean * y_mean
+        lasso.coef_, lasso.n_iter_ = lasso_coordinate_descent(gram, zy, self.n_samples, lasso.alpha, lasso.coef_,
+                                                              max_iter = lasso.max_iter, tol = lasso.tol)
+        lasso.intercept_ = np.reshape(y_mean - z_mean @ lasso.coef_, np.shape(lasso.intercept_))
+
+        return lasso.n_iter_
+
+    def data_hash(self):
+        """
+        Hashing what the state has learned, so a run updating it is fingerprinted apart from runs updating another state
+
+        Returns:
+            - data_hash (str): The SHA-256 of every known row's hash, the hyperparameters and the number of updates
+        """
+
+        data_hash = hashlib.sha256(json.dumps({'training_params': self.training_params, 'updates': self.updates},
+                                              sort_keys = True, default = str).encode('utf-8'))
+        data_hash.update(pd.util.hash_pandas_object(self.row_hashes, index = True).values.tobytes())
+
+        return data_hash.hexdigest()
+
+    def save(self, path):
+        # Writing to a temporary file and swapping it into place so an interrupted run never leaves a partial state
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(f'{path}.tmp', 'wb') as f:
+            cloudpickle.dump(self, f)
+        os.replace(f'{path}.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        # Loading the state left by the previous run, or None if there is none
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as f:
+            return cloudpickle.load(f)
+
+
+
+## INCREMENTAL TRAINING
+## ---------------------------------------------------------------------------------------------------------------------
+def train_incrementally(df_raw, incremental_state, refit, training_params, incremental_params, parity_check = False):
+    """
+    Updating the previous run's model with the rows added or edited since, falling back to a full refit when it cannot
+
+    A full refit replaces the state when there is none yet, when the hyperparameters changed, when the new rows hold a
+    category the frozen feature engineering never saw, when the recent rows lack one of the classes, or when the
+    incremental model fails a parity check against a full refit. Parity checks run every parity_check_every updates
+    once min_parity_rows new rows arrived, or on every update with parity_check = True.
+
+    Args:
+        - df_raw (Pandas DataFrame): The current training data
+        - incremental_state (IncrementalTrainingState): The state left by the previous run, or None
+        - refit (callable): Fits a full MovieRatingModel on a DataFrame of training rows
+        - training_params (dict): The "classifier" and "regressor" hyperparameters of this run
+        - incremental_params (dict): The incremental training parameters (see DEFAULT_INCREMENTAL_PARAMS)
+        - parity_check (bool): Whether to check parity on this update regardless of the schedule
+
+    Returns:
+        - movie_rating_model (MovieRatingModel): The trained model, with its RandomForestClassifier left unflattened
+        - incremental_state (IncrementalTrainingState): The state to persist for the next run
+        - report (dict): What was done, with the sizes of the update and the parity check results
+    """
+
+    def full_refit(reason, report = None):
+        print(f'Running a full refit: {reason}.')
+        movie_rating_model = refit(df_raw)
+        incremental_state = IncrementalTrainingState(movie_rating_model, training_params, incremental_params, df_raw)
+        return movie_rating_model, incremental_state, {**(report or {}), 'mode': 'full_refit', 'reason': reason}
+
+    if incremental_state is None:
+        return full_refit('no incremental state from a previous run')
+    if incremental_state.training_params != training_params:
+        return full_refit('the hyperparameters changed')
+    incremental_state.incremental_params = incremental_params
+
+    # Finding what changed since the previous run
+    df_delta, removed, row_hashes = incremental_state.diff(df_raw)
+    report = {'mode': 'incremental', 'delta_rows': len(df_delta), 'removed_rows': len(removed)}
+    if len(df_delta) + len(removed) == 0:
+        print('No training rows were added, edited or deleted since the previous run. Keeping its model.')
+        return incremental_state.movie_rating_model, incremental_state, {**report, 'mode': 'unchanged'}
+    if len(df_delta) > 0:
+        unseen_categories = incremental_state.unseen_categories(df_delta)
+        if len(unseen_categories) > 0:
+            return full_refit(f'the new rows hold categories the feature engineering was not fit on ({", ".join(unseen_categories)})', report)
+        df_window = incremental_state.recent_window(df_raw, df_delta)
+        if set(df_window['biehn_yes_or_no']) != set(incremental_state.movie_rating_model.classifier.classes_):
+            return full_refit('the recent rows do not hold every class', report)
+
+        # Checking parity against a full refit on the new rows, before they are learned, when a check is due
+        parity_due = incremental_state.updates_since_parity_check + 1 >= incremental_params['parity_check_every']
+        if parity_check or (parity_due and len(df_delta) >= incremental_params['min_parity_rows']):
+            report['parity'] = incremental_state.check_parity(df_raw, df_delta, refit)
+            print(f'Parity on {len(df_delta)} new rows: accuracy {report["parity"]["incremental_accuracy"]:.4f} incremental vs '
+                  f'{report["parity"]["full_refit_accuracy"]:.4f} full refit, MAE {report["parity"]["incremental_mae"]:.4f} vs '
+                  f'{report["parity"]["full_refit_mae"]:.4f}')
+            if not report['parity']['passed']:
+                return full_refit('the incremental model fell behind a full refit', report)
+
+        # Growing the forest on the recent rows
+        report['window_rows'] = len(df_window)
+        report['retired_trees'] = incremental_state.grow_forest(df_window)
+
+    # Re-solving the Lasso from the previous coefficients
+    report['trees'] = len(incremental_state.movie_rating_model.classifier.estimators_)
+    report['lasso_iterations'] = incremental_state.update_lasso(df_delta, removed)
+    incremental_state.row_hashes = row_hashes
+    incremental_state.updates += 1
+    incremental_state.updates_since_parity_check = 0 if 'parity' in report else incremental_state.updates_since_parity_check + 1
+    print(f'Learned {len(df_delta)} new or edited rows and unlearned {len(removed)}: {report["trees"]} trees '
+          f'({report.get("retired_trees", 0)} retired), {report["lasso_iterations"]} Lasso sweeps')
+
+    return incremental_state.movie_rating_model, incremental_state, report
@@ -0,0 +1,410 @@
+# Importing the necessary Python libraries
+import os
+import pickle
+import shutil
+import cloudpickle
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+
+
+## MODEL COMPILATION
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the packed node record so one gather per step fetches everything needed to descend a level
+NODE_DTYPE = np.dtype([('feature', np.intp), ('threshold', np.float64), ('left', np.intp), ('right', np.intp),
+                       ('missing_go_left', np.bool_)])
+
+
+
+class FlatForestClassifier(BaseEstimator, ClassifierMixin):
+    """
+    Fitted random forest flattened into contiguous NumPy node arrays for low-overhead prediction
+
+    Every tree's nodes are concatenated into one packed node table plus a leaf value array, with leaves pointing back
+    at themselves so all trees and rows can descend together one vectorized step per level. The float32 input cast,
+    the per-tree probability normalization and the tree-ordered accumulation all mirror sklearn's RandomForestClassifier,
+    so predictions are bit-identical to the forest it was built from. This removes sklearn's fixed per-call overhead
+    for the single-row and small-batch serving path; very large batches are still faster through sklearn's Cython trees.
+
+    Fitting trains a RandomForestClassifier with forest_params and flattens it, so the estimator can be cloned and
+    refit like any other sklearn classifier.
+
+    Args:
+        - forest_params (dict): The RandomForestClassifier hyperparameters fit trains the forest with (defaults if None)
+    """
+
+    def __init__(self, forest_params = None):
+        self.forest_params = forest_params
+
+    @classmethod
+    def from_forest(cls, forest):
+        """
+        Flattening a fitted single-output sklearn RandomForestClassifier
+
+        Args:
+            - forest (RandomForestClassifier): The fitted forest
+
+        Returns:
+            - flat_forest (FlatForestClassifier): The flattened equivalent of the forest, refitting with the forest's hyperparameters
+        """
+
+        return cls(forest_params = forest.get_params())._flatten(forest)
+
+    def _flatten(self, forest):
+        # Copying the fitted forest's trees into the flat arrays
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+
+        # Gathering each tree's node arrays, shifting the child indices by the tree's offset into the shared table
+        node_tables, leaf_values, roots = [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_table = np.zeros(tree.node_count, dtype = NODE_DTYPE)
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            # Pointing the leaves back at themselves so a finished descent stays in place
+            node_table['feature'] = np.where(is_leaf, 0, tree.feature)
+            node_table['threshold'] = tree.threshold
+            node_table['left'] = np.where(is_leaf, node_ids, tree.children_left) + offset
+            node_table['right'] = np.where(is_leaf, node_ids, tree.children_right) + offset
+            node_table['missing_go_left'] = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype = bool))
+            node_tables.append(node_table)
+
+            # Normalizing the node values into class probabilities exactly as DecisionTreeClassifier.predict_proba does
+            proba = tree.value[:, 0, :len(forest.classes_)]
+            normalizer = proba.sum(axis = 1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            leaf_values.append(proba / normalizer)
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        # Concatenating everything into contiguous arrays
+        self.nodes_ = np.concatenate(node_tables)
+        self.value_ = np.concatenate(leaf_values).astype(np.float64)
+        self.roots_ = np.asarray(roots, dtype = np.intp)
+
+        return self
+
+    def fit(self, X, y, sample_weight = None):
+        """
+        Training a RandomForestClassifier with forest_params and flattening it
+
+        Args:
+            - X (array-like): The feature matrix, shaped (n_rows, n_features)
+            - y (array-like): The class labels
+            - sample_weight (array-like): Optional per-row weights passed on to the forest
+
+        Returns:
+            - self (FlatForestClassifier): The fitted flat forest
+        """
+
+        forest = RandomForestClassifier(**(self.forest_params or {}))
+        forest.fit(X, y, sample_weight = sample_weight)
+
+        return self._flatten(forest)
+
+    def apply(self, X):
+        """
+        Finding the leaf each row lands in for every tree
+
+        Args:
+            - X (array-like): The feature matrix, shaped (n_rows, n_features_in_)
+
+        Returns:
+            - leaves (NumPy array): The leaf node indices into the shared arrays, shaped (n_trees, n_rows)
+        """
+
+        # Casting through float32 since sklearn's trees compare float32 inputs against their float64 thresholds
+        X = np.asarray(X, dtype = np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        X_flat = X.ravel()
+
+        # Starting every (tree, row) pair at its tree's root, with the offset of its row in the flattened input
+        nodes = np.repeat(self.roots_, n_rows)
+        row_offsets = np.tile(np.arange(n_rows) * n_features, len(self.roots_))
+        check_missing = bool(self.nodes_['missing_go_left'].any())
+
+        # Descending one level per step, dropping the pairs that have reached their leaf
+        active = np.arange(len(nodes))
+        while len(active) > 0:
+            current_nodes = self.nodes_.take(nodes[active])
+            values = X_flat.take(row_offsets[active] + current_nodes['feature'])
+            go_left = values <= current_nodes['threshold']
+            if check_missing:
+                go_left |= np.isnan(values) & current_nodes['missing_go_left']
+            next_nodes = np.where(go_left, current_nodes['left'], current_nodes['right'])
+            still_descending = next_nodes != nodes[active]
+            nodes[active] = next_nodes
+            active = active[still_descending]
+
+        return nodes.reshape(len(self.roots_), n_rows)
+
+    def predict_proba(self, X):
+        """
+        Predicting the class probabilities as the mean of the per-tree leaf probabilities
+
+        Args:
+            - X (array-like): The feature matrix, shaped (n_rows, n_features_in_)
+
+        Returns:
+            - proba (NumPy array): The class probabilities, shaped (n_rows, n_classes)
+        """
+
+        leaf_values = self.value_[self.apply(X)]
+
+        # Accumulating tree by tree in the same order sklearn does so the floating point sums match exactly
+        proba = np.zeros(leaf_values.shape[1:], dtype = np.float64)
+        for tree_values in leaf_values:
+            proba += tree_values
+        proba /= len(self.roots_)
+
+        return proba
+
+    def predict(self, X):
+        """
+        Predicting the most probable class for each row
+
+        Args:
+            - X (array-like): The feature matrix, shaped (n_rows, n_features_in_)
+
+        Returns:
+            - predictions (NumPy array): The predicted class labels
+        """
+
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis = 1), axis = 0)
+
+
+
+def flatten_forest_classifier(movie_rating_model, X_check = None):
+    """
+    Swapping the model's RandomForestClassifier head for its flattened equivalent
+
+    Models whose classifier is already flattened (or is not a forest) are returned unchanged, so this is safe to call on
+    any loaded model.
+
+    Args:
+        - movie_rating_model (MovieRatingModel): The fitted combined model
+        - X_check (Pandas DataFrame): Optional raw rows used to verify the flattened forest matches the forest exactly
+
+    Returns:
+        - flattened_model (MovieRatingModel): A model sharing the fitted feature engineering and regressor, with a FlatForestClassifier head
+    """
+
+    # Leaving anything that does not use a forest untouched
+    if not isinstance(movie_rating_model.classifier, RandomForestClassifier):
+        return movie_rating_model
+
+    # Rebuilding the model around the flattened forest
+    flattened_model = MovieRatingModel(movie_rating_model.feature_engineering,
+                                       FlatForestClassifier.from_forest(movie_rating_model.classifier),
+                                       movie_rating_model.regressor)
+
+    # Verifying the flattened forest reproduces the forest's probabilities bit for bit
+    if X_check is not None:
+        X_engineered = movie_rating_model.feature_engineering.transform(X_check)
+        if not np.array_equal(movie_rating_model.classifier.predict_proba(X_engineered),
+                              flattened_model.classifier.predict_proba(X_engineered)):
+            raise ValueError('Flattened forest predictions do not match the original RandomForestClassifier.')
+
+    return flattened_model
+
+
+
+## COMBINED MODEL
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the file names of the combined model artifact and the older two-pipeline layout
+MOVIE_RATING_MODEL_FILE = 'movie_rating_model.pkl'
+BINARY_CLASSIFICATION_PIPELINE_FILE = 'binary_classification_pipeline.pkl'
+REGRESSION_PIPELINE_FILE = 'regression_pipeline.pkl'
+
+# Defining the layout of the memory-mappable artifact: a pickled model skeleton next to its arrays saved as .npy files
+MOVIE_RATING_ARRAYS_DIR = 'movie_rating_model'
+MODEL_SKELETON_FILE = 'model.pkl'
+
+
+
+class MovieRatingModel(BaseEstimator):
+    """
+    Single fitted feature engineering stage feeding both the binary classification and the regression heads
+
+    Args:
+        - feature_engineering (obj): The feature engineering transformer shared by both heads (e.g. a ColumnTransformer)
+        - classifier (obj): The model predicting the Biehn binary yes / no approval
+        - regressor (obj): The model (typically a scaler + Lasso pipeline) predicting the Biehn Scale score
+    """
+
+    def __init__(self, feature_engineering, classifier, regressor):
+        self.feature_engineering = feature_engineering
+        self.classifier = classifier
+        self.regressor = regressor
+
+    def fit(self, X, y_yes_or_no, y_scale_rating):
+        """
+        Fitting the feature engineering once and both heads on its output
+
+        Args:
+            - X (Pandas DataFrame): The raw features
+            - y_yes_or_no (Pandas DataFrame): The Biehn binary yes / no approval targets
+            - y_scale_rating (Pandas DataFrame): The Biehn Scale rating targets
+
+        Returns:
+            - self (MovieRatingModel): The fitted model
+        """
+
+        X_engineered = self.feature_engineering.fit_transform(X)
+        self.classifier.fit(X_engineered, y_yes_or_no)
+        self.regressor.fit(X_engineered, y_scale_rating)
+
+        return self
+
+    def predict_all(self, X):
+        """
+        Predicting both scores from a single feature engineering pass
+
+        Args:
+            - X (Pandas DataFrame): The raw features, one row per movie
+
+        Returns:
+            - predictions (dict): The "biehn_yes_or_no" and "biehn_scale_score" prediction arrays
+        """
+
+        X_engineered = self.feature_engineering.transform(X)
+
+        return {'biehn_yes_or_no': self.classifier.predict(X_engineered),
+                'biehn_scale_score': self.regressor.predict(X_engineered)}
+
+    @classmethod
+    def from_pipelines(cls, binary_classification_pipeline, regression_pipeline):
+        """
+        Combining the older two-pipeline layout, keeping the classification pipeline's (identically fitted) feature engineering
+
+        Args:
+            - binary_classification_pipeline (sklearn Pipeline): Feature engineering followed by the classifier
+            - regression_pipeline (sklearn Pipeline): Feature engineering followed by the scaler and regressor
+
+        Returns:
+            - movie_rating_model (MovieRatingModel): The combined model
+        """
+
+        return cls(feature_engineering = binary_classification_pipeline.steps[0][1],
+                   classifier = binary_classification_pipeline.steps[-1][1],
+                   regressor = Pipeline(steps = regression_pipeline.steps[1:]))
+
+
+
+class _ArrayExportingPickler(cloudpickle.CloudPickler):
+    """
+    Pickler writing every numeric NumPy array to its own .npy file and pickling only a reference to it
+
+    Args:
+        - file (file object): The open binary file the model skeleton is pickled into
+        - artifact_dir (str): Directory the .npy files are written into
+    """
+
+    def __init__(self, file, artifact_dir):
+        super().__init__(file)
+        self.artifact_dir = artifact_dir
+
+        # Tracking the arrays already written so an array shared by several objects is saved once
+        self._array_files = {}
+
+    def persistent_id(self, obj):
+        # Leaving everything but plain numeric arrays to be pickled as usual
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject or obj.ndim == 0:
+            return None
+
+        if id(obj) not in self._array_files:
+            array_file = f'array_{len(self._array_files):03d}.npy'
+            np.save(os.path.join(self.artifact_dir, array_file), obj, allow_pickle = False)
+            self._array_files[id(obj)] = (array_file, obj)
+
+        return self._array_files[id(obj)][0]
+
+
+
+class _ArrayMappingUnpickler(pickle.Unpickler):
+    """
+    Unpickler resolving the array references written by _ArrayExportingPickler, memory-mapping the .npy files
+
+    Args:
+        - file (file object): The open binary file holding the model skeleton
+        - artifact_dir (str): Directory holding the .npy files
+        - mmap_mode (str): Mode passed to np.load ("r" to share read-only pages between processes, None to read into memory)
+    """
+
+    def __init__(self, file, artifact_dir, mmap_mode):
+        super().__init__(file)
+        self.artifact_dir = artifact_dir
+        self.mmap_mode = mmap_mode
+
+    def persistent_load(self, array_file):
+        array = np.load(os.path.join(self.artifact_dir, os.path.basename(array_file)), mmap_mode = self.mmap_mode, allow_pickle = False)
+
+        # Handing out a plain ndarray view of the mapping so results computed from it are ordinary arrays
+        return array.view(np.ndarray) if isinstance(array, np.memmap) else array
+
+
+
+def save_movie_rating_model_arrays(movie_rating_model, model_dir):
+    """
+    Saving the combined model as a small pickled skeleton plus one .npy file per tree, coefficient and other numeric array
+
+    Args:
+        - movie_rating_model (MovieRatingModel): The fitted (ideally flattened) combined model
+        - model_dir (str): Directory the artifact directory is created in
+
+    Returns:
+        - artifact_dir (str): The path of the written artifact directory
+    """
+
+    # Writing the artifact into a staging directory first
+    artifact_dir = os.path.join(model_dir, MOVIE_RATING_ARRAYS_DIR)
+    staging_dir = f'{artifact_dir}.tmp'
+    shutil.rmtree(staging_dir, ignore_errors = True)
+    os.makedirs(staging_dir)
+    with open(os.path.join(staging_dir, MODEL_SKELETON_FILE), 'wb') as f:
+        _ArrayExportingPickler(f, staging_dir).dump(movie_rating_model)
+
+    # Swapping the finished artifact into place so a loader never sees a half-written directory
+    shutil.rmtree(artifact_dir, ignore_errors = True)
+    os.replace(staging_dir, artifact_dir)
+
+    return artifact_dir
+
+
+
+def load_movie_rating_model(model_dir, mmap_mode = 'r'):
+    """
+    Loading the combined model, preferring the memory-mapped array artifact over the pickle and the older two-pipeline pickles
+
+    Args:
+        - model_dir (str): Directory holding the movie_rating_model array artifact, movie_rating_model.pkl or the two pipeline pickles
+        - mmap_mode (str): How the array artifact's .npy files are opened ("r" maps them read-only, None reads them into memory)
+
+    Returns:
+        - movie_rating_model (MovieRatingModel): The loaded combined model
+    """
+
+    # Mapping the array artifact if training wrote one, so every worker process shares the same pages through the OS
+    artifact_dir = os.path.join(model_dir, MOVIE_RATING_ARRAYS_DIR)
+    if os.path.exists(os.path.join(artifact_dir, MODEL_SKELETON_FILE)):
+        with open(os.path.join(artifact_dir, MODEL_SKELETON_FILE), 'rb') as f:
+            return _ArrayMappingUnpickler(f, artifact_dir, mmap_mode).load()
+
+    # Loading the combined artifact if training wrote one
+    if os.path.exists(os.path.join(model_dir, MOVIE_RATING_MODEL_FILE)):
+        with open(os.path.join(model_dir, MOVIE_RATING_MODEL_FILE), 'rb') as f:
+            return cloudpickle.load(f)
+
+    # Loading the respective pipelines from the older serialized pickle files
+    with open(os.path.join(model_dir, BINARY_CLASSIFICATION_PIPELINE_FILE), 'rb') as f:
+        binary_classification_pipeline = cloudpickle.load(f)
+    with open(os.path.join(model_dir, REGRESSION_PIPELINE_FILE), 'rb') as f:
+        regression_pipeline = cloudpickle.load(f)
+
+    return MovieRatingModel.from_pipelines(binary_classification_pipeline, regression_pipeline)
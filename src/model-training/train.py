@@ -1,10 +1,14 @@
 # Importing the necessary Python libraries
 import os
 import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
 import cloudpickle
 import pandas as pd
 from category_encoders.one_hot import OneHotEncoder
-from sklearn.preprocessing import FunctionTransformer
 from sklearn.preprocessing import StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.linear_model import Lasso
@@ -13,6 +17,13 @@ from sklearn.pipeline import Pipeline
 
 # Importing the helper functions from other adjacent files
 from helpers import *
+from hyperparameter_search import *
+from training_cache import *
+from incremental_training import *
+
+# Importing the partitioned raw data store from the data engineering code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data-engineering'))
+from raw_data_store import RawDataStore, RAW_DATA_STORE_DIR, RAW_DATA_COLUMNS, partition_run_id, filter_rows
 
 
 
@@ -26,82 +37,204 @@ INPUT_PATH = os.path.join(PRIMARY_DIRECTORY, 'input/data/train')
 MODEL_PATH = os.path.join(PRIMARY_DIRECTORY, 'model')
 OUTPUT_PATH = os.path.join(PRIMARY_DIRECTORY, 'output')
 
+# Noting the hyperparameters SageMaker passes to the job and where it collects the job's output data from
+HYPERPARAMETERS_PATH = os.path.join(PRIMARY_DIRECTORY, 'input/config/hyperparameters.json')
+OUTPUT_DATA_PATH = os.path.join(OUTPUT_PATH, 'data')
+
+# Pointing to the cache of previously trained artifacts, kept in the checkpoint directory SageMaker syncs across jobs
+TRAINING_CACHE_PATH = os.environ.get('TRAINING_CACHE_PATH', os.path.join(PRIMARY_DIRECTORY, 'checkpoints/training_cache'))
+
+# Pointing to the model and bookkeeping incremental training carries between runs, in the same checkpoint directory
+INCREMENTAL_STATE_PATH = os.environ.get('INCREMENTAL_STATE_PATH', os.path.join(PRIMARY_DIRECTORY, 'checkpoints', INCREMENTAL_STATE_FILE))
+
+# Defining the rows training reads: only those carrying both labels (pushed down to the Parquet reads of the store)
+TRAINING_FILTERS = [('biehn_scale_rating', '>=', 0.0), ('biehn_yes_or_no', 'in', ['Yes', 'No'])]
+
 
 
 ## MODEL TRAINING
 ## ---------------------------------------------------------------------------------------------------------------------
-def train(df_raw):
+# Defining the hyperparameters of each head used unless a search found better ones
+DEFAULT_CLASSIFIER_PARAMS = {'n_estimators': 50, 'max_depth': 20, 'min_samples_split': 5, 'min_samples_leaf': 2}
+DEFAULT_REGRESSOR_PARAMS = {'alpha': 0.275}
+
+
+
+def build_data_preprocessor():
     """
-    Takes in the raw data for the movie rating model and trains the respective binary classfication and regression algorithms
+    Creating the data preprocessor that performs the feature engineering shared by both heads
 
-    Args:
-        - df_raw (Pandas DataFrame): A Pandas DataFrame containing the data that will be trained upon
+    Genres the one-hot encoder did not see while fitting are encoded as no genre at all (all zeros), so a genre
+    missing from a cross-validation fold's training rows and a new genre at inference are both handled alike.
 
     Returns:
-        - binary_classification_pipeline (object): The trained version of the binary classification pipeline
-        - regression_pipeline (object): The trained version of the regression pipeline
+        - data_preprocessor (ColumnTransformer): The unfitted feature engineering stage
     """
 
-    # Instantiating a StandardScaler object for feature scaling
-    feature_scaler = StandardScaler()
-
-    # Creating the data preprocessor that will perform our feature engineering
-    data_preprocessor = ColumnTransformer(transformers = [
-        ('ohe_engineering', OneHotEncoder(use_cat_names = True, handle_unknown = 'ignore'), ['primary_genre', 'secondary_genre']),
-        ('movie_age_engineering', FunctionTransformer(generate_movie_age, validate = False), ['year']),
-        ('rt_critic_score_engineering', FunctionTransformer(engineer_rt_critic_score, validate = False), ['rt_critic_score']),
-        ('rt_audience_score_engineering', FunctionTransformer(handle_nulls_for_rt_audience_score, validate = False), ['rt_audience_score']),
-        ('metascore_engineering', FunctionTransformer(handle_nulls_for_metascore, validate = False), ['metascore']),
+    return ColumnTransformer(transformers = [
+        ('ohe_engineering', OneHotEncoder(use_cat_names = True, handle_unknown = 'value'), ['primary_genre', 'secondary_genre']),
+        ('movie_age_engineering', MovieAgeTransformer(), ['year']),
+        ('rt_critic_score_engineering', RTCriticScoreTransformer(fill_value = 59), ['rt_critic_score']),
+        ('rt_audience_score_engineering', NullImputer(fill_value = 59.0), ['rt_audience_score']),
+        ('metascore_engineering', NullImputer(fill_value = 50.0), ['metascore']),
         ('columns_to_drop', 'drop', ['movie_name', 'tmdb_id', 'imdb_id', 'tmdb_popularity'])
     ],
         remainder = 'passthrough'
     )
 
-    # Creating the full inference pipeline for the binary classification model
-    binary_classification_pipeline = Pipeline(steps = [
-        ('feature_engineering', data_preprocessor),
-        ('predictive_modeling', RandomForestClassifier(n_estimators = 50,
-                                                       max_depth = 20,
-                                                       min_samples_split = 5,
-                                                       min_samples_leaf = 2))
-    ])
 
-    # Creating the full inference pipeline for the binary classification model
-    regression_pipeline = Pipeline(steps = [
-        ('feature_engineering', data_preprocessor),
-        ('feature_scaling', feature_scaler),
-        ('predictive_modeling', Lasso(alpha = 0.275))
+
+def build_regressor(alpha = DEFAULT_REGRESSOR_PARAMS['alpha']):
+    """
+    Creating the regression head, which scales the engineered features before the Lasso
+
+    Args:
+        - alpha (float): The Lasso regularization strength
+
+    Returns:
+        - regressor (sklearn Pipeline): The unfitted scaler + Lasso pipeline
+    """
+
+    return Pipeline(steps = [
+        ('feature_scaling', StandardScaler()),
+        ('predictive_modeling', Lasso(alpha = alpha))
     ])
 
-    # Formally training the binary classification pipeline
-    binary_classification_pipeline.fit(df_raw.drop(columns = ['biehn_yes_or_no', 'biehn_scale_rating']),
-                                       df_raw[['biehn_yes_or_no']])
 
-    # Formally training the regression pipeline
-    regression_pipeline.fit(df_raw.drop(columns = ['biehn_yes_or_no', 'biehn_scale_rating']),
-                            df_raw[['biehn_scale_rating']])
 
-    # Returning the trained pipelines
-    return binary_classification_pipeline, regression_pipeline
+def train(df_raw, classifier_params = None, regressor_params = None):
+    """
+    Takes in the raw data for the movie rating model and trains the binary classfication and regression heads on a single shared feature engineering stage
 
+    Args:
+        - df_raw (Pandas DataFrame): A Pandas DataFrame containing the data that will be trained upon
+        - classifier_params (dict): Hyperparameters of the random forest classifier (defaults to DEFAULT_CLASSIFIER_PARAMS)
+        - regressor_params (dict): Hyperparameters of the Lasso regressor (defaults to DEFAULT_REGRESSOR_PARAMS)
 
+    Returns:
+        - movie_rating_model (MovieRatingModel): The trained combined model
+    """
 
-## SCRIPT INSTANTIATION
-## ---------------------------------------------------------------------------------------------------------------------
-if __name__ == "__main__":
-    # Loading in the CSV from the output of the data collection
-    df_raw = pd.read_csv(os.path.join(INPUT_PATH, 'all_data.csv'))
+    # Creating the data preprocessor that will perform our feature engineering
+    data_preprocessor = build_data_preprocessor()
+
+    # Creating the binary classification head
+    binary_classifier = RandomForestClassifier(**{**DEFAULT_CLASSIFIER_PARAMS, **(classifier_params or {})})
+
+    # Creating the regression head, which scales the engineered features before the Lasso
+    regressor = build_regressor(**{**DEFAULT_REGRESSOR_PARAMS, **(regressor_params or {})})
+
+    # Formally training both heads on a single pass of the feature engineering
+    movie_rating_model = MovieRatingModel(feature_engineering = data_preprocessor, classifier = binary_classifier, regressor = regressor)
+    movie_rating_model.fit(df_raw.drop(columns = ['biehn_yes_or_no', 'biehn_scale_rating']),
+                           df_raw[['biehn_yes_or_no']],
+                           df_raw[['biehn_scale_rating']])
 
-    # Training the binary classification and regression algorithms
-    binary_classification_pipeline, regression_pipeline = train(df_raw)
+    # Returning the trained model
+    return movie_rating_model
 
-    # Saving the binary classification pipeline to a serialized pickle file
-    with open(os.path.join(MODEL_PATH, 'binary_classification_pipeline.pkl'), 'wb') as f:
-        cloudpickle.dump(binary_classification_pipeline, f)
 
-    # Saving the regression pipeline to a serialized pickle file
-    with open(os.path.join(MODEL_PATH, 'regression_pipeline.pkl'), 'wb') as f:
-        cloudpickle.dump(regression_pipeline, f)
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the training mode, which SageMaker jobs set through their hyperparameters instead (e.g. {"search": "true"})
+    hyperparameters = read_hyperparameters(HYPERPARAMETERS_PATH)
+    parser = argparse.ArgumentParser(description = 'Trains the movie rating model, optionally searching the hyperparameters of both heads first')
+    parser.add_argument('--search', action = 'store_true', default = hyperparameters.get('search', False) is True,
+                        help = 'Cross-validate a grid or randomized search over both heads and train on the best candidates')
+    parser.add_argument('--search-config', default = hyperparameters.get('search_config'),
+                        help = 'JSON file overriding the search type, n_iter, cv, random_state or either head\'s search space')
+    parser.add_argument('--n-jobs', type = int, default = int(hyperparameters.get('n_jobs', -1)),
+                        help = 'Number of candidate fits run in parallel (-1 for every core)')
+    parser.add_argument('--force', action = 'store_true', default = hyperparameters.get('force', False) is True,
+                        help = 'Retrain even if the training cache holds artifacts for the same data, hyperparameters and code')
+    parser.add_argument('--incremental', action = 'store_true', default = hyperparameters.get('incremental', False) is True,
+                        help = 'Update the previous run\'s model with the new and edited rows instead of refitting it on all of them')
+    parser.add_argument('--parity-check', action = 'store_true', default = hyperparameters.get('parity_check', False) is True,
+                        help = 'Check the incremental model against a full refit on this run regardless of the schedule')
+    args = parser.parse_args()
+
+    # Loading in the output of the data collection from the partitioned store, or else from a CSV export
+    raw_data_store = RawDataStore(os.path.join(INPUT_PATH, RAW_DATA_STORE_DIR))
+    if raw_data_store.exists():
+        df_raw = raw_data_store.read(columns = RAW_DATA_COLUMNS, filters = TRAINING_FILTERS)
+        data_source = {'store': RAW_DATA_STORE_DIR, 'run_ids': [partition_run_id(path) for path in raw_data_store.partitions()]}
+    else:
+        df_raw = filter_rows(pd.read_csv(os.path.join(INPUT_PATH, 'all_data.csv')), TRAINING_FILTERS)
+        data_source = {'csv': 'all_data.csv'}
+
+    # Fingerprinting the run from the training data, the hyperparameters (or search) it trains with, the incremental
+    # state it updates (so a cache hit never skips learning rows the state is missing) and the code version
+    search_config = load_search_config(args.search_config, overrides = hyperparameters) if args.search else None
+    incremental_params = load_incremental_params(overrides = hyperparameters) if args.incremental else None
+    incremental_state = IncrementalTrainingState.load(INCREMENTAL_STATE_PATH) if args.incremental else None
+    training_config = {'classifier_params': DEFAULT_CLASSIFIER_PARAMS, 'regressor_params': DEFAULT_REGRESSOR_PARAMS,
+                       'search_config': search_config, 'incremental_params': incremental_params,
+                       'incremental_state': incremental_state.data_hash() if incremental_state is not None else None}
+    data_hash = hash_training_data(df_raw)
+    code_version = training_code_version(os.path.dirname(os.path.abspath(__file__)))
+    fingerprint = training_fingerprint(data_hash, training_config, code_version)
+
+    # Reusing the artifacts of an earlier run with the same fingerprint, as retraining would only reproduce them
+    training_cache = TrainingCache(TRAINING_CACHE_PATH)
+    manifest = training_cache.lookup(fingerprint)
+    if manifest is not None and not args.force:
+        training_cache.restore(fingerprint, MODEL_PATH, OUTPUT_DATA_PATH)
+        print(f'Inputs unchanged since the run trained at {manifest["trained_at"]}. Reused its artifacts ({fingerprint[:12]}).')
+        sys.exit(0)
+
+    # Searching the hyperparameters of both heads, writing every candidate's fit time and scores
+    start = time.perf_counter()
+    best_params = {}
+    if args.search:
+        cache_dir = tempfile.mkdtemp(prefix = 'preprocessor_cache_')
+        try:
+            best_params, df_results = search_movie_rating_model(df_raw, build_data_preprocessor(),
+                                                                RandomForestClassifier(**DEFAULT_CLASSIFIER_PARAMS, random_state = search_config['random_state']),
+                                                                build_regressor(),
+                                                                search_config, cache_dir, n_jobs = args.n_jobs)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors = True)
+
+        best_params = json.loads(json.dumps(best_params, default = to_json_value))
+        os.makedirs(OUTPUT_DATA_PATH, exist_ok = True)
+        df_results.to_csv(os.path.join(OUTPUT_DATA_PATH, SEARCH_RESULTS_FILE), index = False)
+        with open(os.path.join(OUTPUT_DATA_PATH, SEARCH_BEST_PARAMS_FILE), 'w') as f:
+            json.dump(best_params, f, indent = 2)
+        print(f'Search results saved to {OUTPUT_DATA_PATH}')
+
+    # Training the combined binary classification and regression model, or else updating the previous run's with the new rows
+    incremental_report = None
+    if args.incremental:
+        training_params = {head: best_params.get(head) for head in ['classifier', 'regressor']}
+        movie_rating_model, incremental_state, incremental_report = train_incrementally(
+            df_raw, incremental_state,
+            lambda df: train(df, training_params['classifier'], training_params['regressor']),
+            training_params, incremental_params, parity_check = args.parity_check)
+    else:
+        movie_rating_model = train(df_raw, best_params.get('classifier'), best_params.get('regressor'))
+
+    # Flattening the forest into NumPy node arrays for serving, verifying it against the forest on the training rows
+    movie_rating_model = flatten_forest_classifier(movie_rating_model,
+                                                   X_check = df_raw.drop(columns = ['biehn_yes_or_no', 'biehn_scale_rating']))
+
+    # Saving the combined model to a serialized pickle file
+    with open(os.path.join(MODEL_PATH, MOVIE_RATING_MODEL_FILE), 'wb') as f:
+        cloudpickle.dump(movie_rating_model, f)
+
+    # Saving the memory-mappable artifact alongside it, which serving loads in preference to the pickle
+    save_movie_rating_model_arrays(movie_rating_model, MODEL_PATH)
+
+    # Persisting the incremental state once the model it holds is saved
+    if args.incremental:
+        incremental_state.save(INCREMENTAL_STATE_PATH)
+
+    # Caching the artifacts under the run's fingerprint along with their lineage
+    manifest = build_training_manifest(fingerprint, data_hash, training_config, code_version, data_source, len(df_raw),
+                                       best_params, time.perf_counter() - start, incremental_report)
+    training_cache.store(fingerprint, MODEL_PATH, OUTPUT_DATA_PATH, manifest)
+    print(f'Cached the trained artifacts under {fingerprint[:12]}')
 
     # Exiting with a zero code to let SageMaker know training job's success
     sys.exit(0)
\ No newline at end of file
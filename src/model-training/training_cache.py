@@ -0,0 +1,238 @@
+# Importing the necessary Python libraries
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+import sklearn
+import numpy as np
+import pandas as pd
+import category_encoders
+
+
+
+## TRAINING FINGERPRINTS
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the file every cache entry and trained model directory carries its lineage in
+TRAINING_MANIFEST_FILE = 'training_manifest.json'
+
+# Defining the subdirectory of a cache entry holding the job's output data (e.g. the search results)
+OUTPUT_DATA_DIR = 'output_data'
+
+# Defining the libraries whose versions decide what the pickled artifacts contain
+TRAINING_LIBRARIES = {'scikit-learn': sklearn, 'category_encoders': category_encoders, 'numpy': np, 'pandas': pd}
+
+
+
+def hash_json(value):
+    # Hashing a JSON-serializable value in a canonical form, so key order never changes the hash
+    return hashlib.sha256(json.dumps(value, sort_keys = True, default = str).encode('utf-8')).hexdigest()
+
+
+
+def hash_training_data(df_raw):
+    """
+    Hashing the contents of the training data, independently of how it was stored (e.g. before or after a compaction)
+
+    Args:
+        - df_raw (Pandas DataFrame): The training data
+
+    Returns:
+        - data_hash (str): The SHA-256 of the column names and every row's values
+    """
+
+    data_hash = hashlib.sha256(json.dumps(list(df_raw.columns)).encode('utf-8'))
+    data_hash.update(pd.util.hash_pandas_object(df_raw, index = False).values.tobytes())
+
+    return data_hash.hexdigest()
+
+
+
+def training_code_version(source_dir):
+    """
+    Versioning the training code by its contents, so a job needs no git checkout to tell whether the code moved
+
+    Args:
+        - source_dir (str): Directory of the training code (e.g. the directory of train.py)
+
+    Returns:
+        - code_version (str): The SHA-256 of every Python file in the directory and of the TRAINING_LIBRARIES versions
+    """
+
+    code_hash = hashlib.sha256()
+    for source_file in sorted(glob.glob(os.path.join(source_dir, '*.py'))):
+        code_hash.update(os.path.basename(source_file).encode('utf-8'))
+        with open(source_file, 'rb') as f:
+            code_hash.update(f.read())
+    code_hash.update(hash_json({name: library.__version__ for name, library in TRAINING_LIBRARIES.items()}).encode('utf-8'))
+
+    return code_hash.hexdigest()
+
+
+
+def training_fingerprint(data_hash, training_config, code_version):
+    """
+    Combining everything a training run depends on into the key of its cached artifacts
+
+    Args:
+        - data_hash (str): The hash of the training data (see hash_training_data)
+        - training_config (dict): The hyperparameters and search configuration the run trains with
+        - code_version (str): The version of the training code (see training_code_version)
+
+    Returns:
+        - fingerprint (str): The SHA-256 of the three
+    """
+
+    return hash_json({'data_hash': data_hash, 'training_config': training_config, 'code_version': code_version})
+
+
+
+## TRAINING CACHE
+## ---------------------------------------------------------------------------------------------------------------------
+class TrainingCache:
+    """
+    Content-addressed store of trained model artifacts, one directory per training fingerprint
+
+    An entry holds the model directory's artifacts, the output data of the job that trained them and a manifest of
+    their lineage. Entries are staged in a hidden directory and renamed into place once complete, so a directory named
+    after a fingerprint is always a full set of artifacts. Only the most recent max_entries entries are kept.
+
+    Args:
+        - path (str): Directory holding the cache entries
+        - max_entries (int): Number of entries kept before the least recently used ones are removed
+    """
+
+    def __init__(self, path, max_entries = 5):
+        self.path = path
+        self.max_entries = max_entries
+
+    def _entry_dir(self, fingerprint):
+        return os.path.join(self.path, fingerprint)
+
+    def lookup(self, fingerprint):
+        """
+        Finding the manifest of the artifacts trained under a fingerprint
+
+        Args:
+            - fingerprint (str): The training fingerprint (see training_fingerprint)
+
+        Returns:
+            - manifest (dict): The lineage of the cached artifacts, or None if the fingerprint was never trained
+        """
+
+        manifest_path = os.path.join(self._entry_dir(fingerprint), TRAINING_MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+
+    def restore(self, fingerprint, model_dir, output_data_dir):
+        """
+        Copying a cached entry's artifacts into the model directory and its output data into the output directory
+
+        Args:
+            - fingerprint (str): The training fingerprint of the entry
+            - model_dir (str): The directory the trained artifacts go in (e.g. "/opt/ml/model")
+            - output_data_dir (str): The directory the job's output data goes in (e.g. "/opt/ml/output/data")
+        """
+
+        entry_dir = self._entry_dir(fingerprint)
+        copy_directory(entry_dir, model_dir, skip = [OUTPUT_DATA_DIR])
+        copy_directory(os.path.join(entry_dir, OUTPUT_DATA_DIR), output_data_dir)
+
+        # Marking the entry as recently used, so the pruning keeps it
+        os.utime(entry_dir)
+
+    def store(self, fingerprint, model_dir, output_data_dir, manifest):
+        """
+        Caching a training run's artifacts and output data under its fingerprint, replacing any earlier entry of it
+
+        Args:
+            - fingerprint (str): The training fingerprint of the run
+            - model_dir (str): The directory holding the trained artifacts
+            - output_data_dir (str): The directory holding the job's output data
+            - manifest (dict): The lineage of the artifacts, also written to the model directory
+
+        Returns:
+            - entry_dir (str): The path of the cache entry
+        """
+
+        # Recording the lineage next to the artifacts, so the model directory carries it wherever it is uploaded
+        with open(os.path.join(model_dir, TRAINING_MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent = 2)
+
+        # Staging the entry and renaming it into place, moving aside the entry a forced retraining replaces
+        entry_dir = self._entry_dir(fingerprint)
+        staging_dir = os.path.join(self.path, f'.{fingerprint}.tmp')
+        replaced_dir = os.path.join(self.path, f'.{fingerprint}.replaced')
+        for stale_dir in (staging_dir, replaced_dir):
+            shutil.rmtree(stale_dir, ignore_errors = True)
+        copy_directory(model_dir, staging_dir)
+        copy_directory(output_data_dir, os.path.join(staging_dir, OUTPUT_DATA_DIR))
+        if os.path.exists(entry_dir):
+            os.replace(entry_dir, replaced_dir)
+        os.replace(staging_dir, entry_dir)
+        shutil.rmtree(replaced_dir, ignore_errors = True)
+
+        self.prune()
+
+        return entry_dir
+
+    def prune(self):
+        # Removing the least recently used entries beyond max_entries
+        entry_dirs = [path for path in glob.glob(os.path.join(self.path, '*')) if os.path.isdir(path)]
+        for entry_dir in sorted(entry_dirs, key = os.path.getmtime, reverse = True)[self.max_entries:]:
+            shutil.rmtree(entry_dir, ignore_errors = True)
+
+
+
+def copy_directory(source_dir, destination_dir, skip = ()):
+    # Copying a directory's files and subdirectories over the destination's, doing nothing if the source does not exist
+    if not os.path.isdir(source_dir):
+        return
+
+    os.makedirs(destination_dir, exist_ok = True)
+    for name in os.listdir(source_dir):
+        source_path, destination_path = os.path.join(source_dir, name), os.path.join(destination_dir, name)
+        if name in skip:
+            continue
+        if os.path.isdir(source_path):
+            shutil.rmtree(destination_path, ignore_errors = True)
+            shutil.copytree(source_path, destination_path)
+        else:
+            shutil.copy2(source_path, destination_path)
+
+
+
+def build_training_manifest(fingerprint, data_hash, training_config, code_version, data_source, n_rows, best_params, training_seconds,
+                            incremental_report = None):
+    """
+    Recording the lineage of a training run: what went in, which code trained it and what it chose
+
+    Args:
+        - fingerprint (str): The training fingerprint of the run
+        - data_hash (str): The hash of the training data
+        - training_config (dict): The hyperparameters and search configuration the run trained with
+        - code_version (str): The version of the training code
+        - data_source (dict): Where the training data was read from (e.g. the store's partition run IDs)
+        - n_rows (int): Number of training rows
+        - best_params (dict): The hyperparameters a search picked, empty if none ran
+        - training_seconds (float): How long the search and training took
+        - incremental_report (dict): What an incremental run did (e.g. the rows learned and the parity check), if one ran
+
+    Returns:
+        - manifest (dict): The JSON-serializable lineage
+    """
+
+    return {
+        'fingerprint': fingerprint,
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'training_seconds': round(training_seconds, 3),
+        'data': {'hash': data_hash, 'rows': n_rows, 'source': data_source},
+        'training_config': training_config,
+        'best_params': best_params,
+        'incremental': incremental_report,
+        'code': {'version': code_version, 'libraries': {name: library.__version__ for name, library in TRAINING_LIBRARIES.items()}}
+    }
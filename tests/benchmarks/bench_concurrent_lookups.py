@@ -0,0 +1,96 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Importing the inference helper functions
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-inference-ui'))
+import helpers
+import provider_clients
+
+
+
+## SIMULATED PROVIDERS
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the median simulated latency (in seconds) of each upstream call
+PROVIDER_LATENCY = {'tmdb_search': 0.08, 'tmdb_details': 0.08, 'imdb': 0.40, 'omdb': 0.15, 'rt': 0.60}
+
+# Instantiating the random generator used for the latency jitter
+rng = np.random.default_rng(42)
+
+def simulate_latency(provider):
+    time.sleep(PROVIDER_LATENCY[provider] * rng.lognormal(mean = 0.0, sigma = 0.3))
+
+class FakeTMDb:
+    api_key = None
+    cache = True
+
+    def __init__(self, session = None):
+        pass
+
+class FakeSearch(FakeTMDb):
+    def movies(self, query):
+        simulate_latency('tmdb_search')
+        return [{'id': 603}]
+
+class FakeMovie(FakeTMDb):
+    def details(self, tmdb_id):
+        simulate_latency('tmdb_details')
+        return {'imdb_id': 'tt0133093', 'budget': 63000000, 'genres': [{'name': 'Action'}, {'name': 'Science Fiction'}],
+                'popularity': 70.1, 'revenue': 463517383, 'runtime': 136, 'vote_average': 8.2, 'vote_count': 22000}
+
+class FakeIMDb:
+    def get_movie(self, imdb_id):
+        simulate_latency('imdb')
+        return {'rating': 8.7, 'votes': 1900000, 'year': 1999}
+
+class FakeOMDBClient:
+    def __init__(self, apikey = None, timeout = None):
+        self.session = None
+
+    def imdbid(self, imdb_id):
+        simulate_latency('omdb')
+        return {'ratings': [{'source': 'Rotten Tomatoes', 'value': '88%'}], 'metascore': '73'}
+
+class FakeMovieScraper:
+    def __init__(self, movie_title = None):
+        self.metadata = {}
+
+    def extract_metadata(self):
+        simulate_latency('rt')
+        self.metadata = {'Score_Rotten': '88', 'Score_Audience': '85'}
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares sequential and concurrent upstream lookups in get_movie_features')
+    parser.add_argument('--requests', type = int, default = 50)
+    args = parser.parse_args()
+
+    # Swapping the real provider clients for the simulated ones
+    provider_clients.tmdbv3api.TMDb, provider_clients.tmdbv3api.Search, provider_clients.tmdbv3api.Movie = FakeTMDb, FakeSearch, FakeMovie
+    provider_clients.IMDb, provider_clients.OMDBClient, helpers.MovieScraper = FakeIMDb, FakeOMDBClient, FakeMovieScraper
+
+    # Running the same workload in both execution modes with one shared set of clients
+    clients = provider_clients.ProviderClients(None, None)
+    lookup_executor = ThreadPoolExecutor(max_workers = 8)
+    for mode, executor in [('sequential', None), ('concurrent', lookup_executor)]:
+        all_timings = []
+        for _ in range(args.requests):
+            stage_timings = {}
+            helpers.get_movie_features('The Matrix', None, None, lookup_executor = executor, stage_timings = stage_timings,
+                                       provider_clients = clients)
+            all_timings.append(stage_timings)
+
+        # Reporting the p50 / p99 for every stage
+        print(f'\n{mode} ({args.requests} requests)')
+        print(f"{'stage':>8} | {'p50 (ms)':>9} | {'p99 (ms)':>9}")
+        for stage in ['tmdb', 'imdb', 'omdb', 'rt', 'total']:
+            durations = np.array([timings[stage] for timings in all_timings]) * 1000
+            print(f'{stage:>8} | {np.percentile(durations, 50):>9.1f} | {np.percentile(durations, 99):>9.1f}')
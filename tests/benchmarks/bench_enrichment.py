@@ -0,0 +1,158 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+
+# Importing the data engineering stages
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/data-engineering'))
+import get_rt_data
+from get_tmdb_data import get_tmdb_data
+from get_imdb_data import get_imdb_data
+from get_omdb_data import get_omdb_data
+from enrichment_engine import EnrichmentEngine, build_rate_limiters, ENRICHED_COLUMNS
+
+
+
+## SIMULATED PROVIDERS
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the median simulated latency (in seconds) of each upstream call
+PROVIDER_LATENCY = {'tmdb': 0.08, 'imdb': 0.40, 'omdb': 0.15, 'rt': 0.60}
+
+# Instantiating the random generator used for the latency jitter and the per-provider request log
+rng = np.random.default_rng(42)
+request_times = {provider: [] for provider in PROVIDER_LATENCY}
+request_times_lock = threading.Lock()
+
+def simulate_request(provider):
+    with request_times_lock:
+        request_times[provider].append(time.perf_counter())
+        latency = PROVIDER_LATENCY[provider] * rng.lognormal(mean = 0.0, sigma = 0.3)
+    time.sleep(latency)
+
+
+
+def build_simulated_clients(all_data):
+    """
+    Building stand-ins for the provider clients that answer from all_data.csv after a simulated network delay
+
+    Args:
+        - all_data (Pandas DataFrame): The reviewed movies with every provider's values
+
+    Returns:
+        - provider_clients (SimpleNamespace): Object with the attributes the enrichment stages read from ProviderClients
+    """
+
+    by_name = {row.movie_name: row for row in all_data.itertuples()}
+    by_tmdb_id = {row.tmdb_id: row for row in all_data.itertuples()}
+    by_imdb_id = {row.imdb_id: row for row in all_data.itertuples()}
+
+    class FakeSearch:
+        def movies(self, query):
+            simulate_request('tmdb')
+            row = by_name.get(query['query'])
+            return [{'id': row.tmdb_id}] if row is not None else []
+
+    class FakeMovie:
+        def details(self, tmdb_id):
+            simulate_request('tmdb')
+            row = by_tmdb_id[tmdb_id]
+            genres = [{'name': genre} for genre in [row.primary_genre, row.secondary_genre] if isinstance(genre, str)]
+            return {'imdb_id': row.imdb_id, 'budget': row.budget, 'genres': genres, 'popularity': row.tmdb_popularity,
+                    'revenue': row.revenue, 'runtime': row.runtime, 'vote_average': row.tmdb_vote_average,
+                    'vote_count': row.tmdb_vote_count}
+
+    class FakeIMDb:
+        def get_movie(self, imdb_id):
+            simulate_request('imdb')
+            row = by_imdb_id[f'tt{imdb_id}']
+            return {'rating': row.imdb_rating, 'votes': row.imdb_votes, 'year': int(row.year)}
+
+    class FakeOMDBClient:
+        def imdbid(self, imdb_id):
+            simulate_request('omdb')
+            row = by_imdb_id[imdb_id]
+            ratings = [{'source': 'Rotten Tomatoes', 'value': row.rt_critic_score}] if isinstance(row.rt_critic_score, str) else []
+            return {'ratings': ratings, 'metascore': row.metascore}
+
+    class FakeMovieScraper:
+        def __init__(self, movie_title = None):
+            self.movie_title = movie_title
+            self.metadata = {}
+
+        def extract_metadata(self):
+            simulate_request('rt')
+            row = by_name[self.movie_title]
+            self.metadata = {'Score_Rotten': row.rt_critic_score[:2], 'Score_Audience': row.rt_audience_score}
+
+    # Swapping the scraper the Rotten Tomatoes stage constructs for the simulated one
+    get_rt_data.MovieScraper = FakeMovieScraper
+
+    return SimpleNamespace(tmdb_search = FakeSearch(), tmdb_movies = FakeMovie(), imdb_search = FakeIMDb(),
+                           omdb_client = FakeOMDBClient(), imdb_dataset = None)
+
+
+
+def peak_rate(times, window = 1.0):
+    # Getting the largest number of requests sent within any window of the given length
+    times = np.sort(times)
+    if len(times) == 0:
+        return 0
+    return int(max(np.searchsorted(times, t + window) - i for i, t in enumerate(times)))
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares the sequential enrichment passes with the concurrent enrichment engine')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--movies', type = int, default = 40)
+    parser.add_argument('--workers', type = int, default = 16)
+    parser.add_argument('--tmdb-rate', type = float, default = 20.0)
+    parser.add_argument('--imdb-rate', type = float, default = 10.0)
+    parser.add_argument('--omdb-rate', type = float, default = 10.0)
+    parser.add_argument('--rt-rate', type = float, default = 5.0)
+    args = parser.parse_args()
+
+    # Building the delta of reviewed movies and the simulated providers
+    all_data = pd.read_csv(args.data_path)
+    df_delta = all_data[['movie_name', 'biehn_scale_rating', 'biehn_yes_or_no']].head(args.movies).reset_index(drop = True)
+    provider_clients = build_simulated_clients(all_data)
+
+    # Running the four sequential passes
+    start = time.perf_counter()
+    df_sequential = get_tmdb_data(df_delta.copy(), None, provider_clients = provider_clients)
+    df_sequential = get_imdb_data(df_sequential, provider_clients = provider_clients)
+    df_sequential = get_omdb_data(df_sequential, None, provider_clients = provider_clients)
+    df_sequential = get_rt_data.get_rt_data(df_sequential)
+    sequential_seconds = time.perf_counter() - start
+
+    # Running the concurrent engine with every provider rate limited
+    for provider in request_times:
+        request_times[provider].clear()
+    rate_limits = {'tmdb': args.tmdb_rate, 'imdb': args.imdb_rate, 'omdb': args.omdb_rate, 'rt': args.rt_rate}
+    enrichment_engine = EnrichmentEngine(provider_clients, max_workers = args.workers, rate_limiters = build_rate_limiters(rate_limits))
+    start = time.perf_counter()
+    df_concurrent = enrichment_engine.enrich(df_delta)
+    concurrent_seconds = time.perf_counter() - start
+
+    # Checking both approaches collected the same data
+    df_sequential = df_sequential[ENRICHED_COLUMNS].reset_index(drop = True).astype(str)
+    same_data = df_sequential.equals(df_concurrent.astype(str))
+    if not same_data:
+        print(df_sequential.compare(df_concurrent.astype(str)))
+
+    # Reporting the wall clock times and the busiest second seen by each provider against its limit
+    print(f'\n{args.movies} movies, {args.workers} workers, same data: {same_data}')
+    print(f"{'mode':>10} | {'seconds':>8} | {'movies/s':>8}")
+    print(f"{'sequential':>10} | {sequential_seconds:>8.2f} | {args.movies / sequential_seconds:>8.2f}")
+    print(f"{'concurrent':>10} | {concurrent_seconds:>8.2f} | {args.movies / concurrent_seconds:>8.2f}")
+    print(f"\n{'provider':>8} | {'requests':>8} | {'limit/s':>7} | {'peak in 1s':>10}")
+    for provider, times in request_times.items():
+        print(f'{provider:>8} | {len(times):>8} | {rate_limits[provider]:>7.1f} | {peak_rate(times):>10}')
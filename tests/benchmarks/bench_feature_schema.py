@@ -0,0 +1,85 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import argparse
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Importing the inference helper functions
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-inference-ui'))
+from helpers import ALL_FEATS, load_movie_rating_model, flatten_forest_classifier, compile_movie_rating_model
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def measure(func, repeats):
+    """
+    Measuring the median duration and the peak traced allocation of a zero argument function
+
+    Args:
+        - func (function): The function to measure
+        - repeats (int): Number of timed calls
+
+    Returns:
+        - microseconds (float): The median duration of a single call in microseconds
+        - peak_kib (float): The peak memory allocated during a single call in KiB
+        - result (obj): The return value of the last call
+    """
+
+    # Warming up once so lazily built state (e.g. per-thread buffers) is not counted
+    func()
+
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+
+    # Tracing the allocations of one further call
+    tracemalloc.start()
+    func()
+    peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+
+    return float(np.median(durations)) * 1e6, peak_kib, result
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Benchmarks the precompiled feature schema against DataFrame preprocessing')
+    parser.add_argument('--model-dir', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../models'))
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [1, 32])
+    parser.add_argument('--repeats', type = int, default = 200)
+    args = parser.parse_args()
+
+    # Loading the model and compiling it, verifying the compiled model against every reviewed movie
+    warnings.filterwarnings('ignore')
+    movie_rating_model = flatten_forest_classifier(load_movie_rating_model(args.model_dir))
+    df_features = pd.read_csv(args.data_path)[['movie_name'] + ALL_FEATS]
+    compiled_model = compile_movie_rating_model(movie_rating_model, X_check = df_features[ALL_FEATS])
+    feature_records = df_features.to_dict('records')
+
+    print(f"{'batch':>6} | {'stage':>13} | {'DataFrame (us)':>14} | {'schema (us)':>11} | {'DataFrame KiB':>13} | {'schema KiB':>10} | identical")
+    for batch_size in args.sizes:
+        batch_records = feature_records[:batch_size]
+
+        # Comparing the feature engineering alone
+        df_time, df_kib, df_output = measure(lambda: movie_rating_model.feature_engineering.transform(pd.DataFrame(batch_records)[ALL_FEATS]),
+                                             args.repeats)
+        schema_time, schema_kib, schema_output = measure(lambda: compiled_model.feature_schema.transform(batch_records), args.repeats)
+        identical = np.array_equal(np.asarray(df_output), schema_output, equal_nan = True)
+        print(f'{batch_size:>6} | {"preprocessing":>13} | {df_time:>14.1f} | {schema_time:>11.1f} | {df_kib:>13.1f} | {schema_kib:>10.1f} | {identical}')
+
+        # Comparing the full scoring of both heads
+        df_time, df_kib, df_output = measure(lambda: movie_rating_model.predict_all(pd.DataFrame(batch_records)[ALL_FEATS]), args.repeats)
+        schema_time, schema_kib, schema_output = measure(lambda: compiled_model.predict_all(batch_records), args.repeats)
+        identical = all(np.array_equal(df_output[key], schema_output[key]) for key in df_output)
+        print(f'{batch_size:>6} | {"scoring":>13} | {df_time:>14.1f} | {schema_time:>11.1f} | {df_kib:>13.1f} | {schema_kib:>10.1f} | {identical}')
@@ -0,0 +1,124 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Importing the training helper functions
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-training'))
+from helpers import MovieAgeTransformer, RTCriticScoreTransformer, NullImputer
+
+
+
+## LEGACY FEATURE ENGINEERING FUNCTIONS
+## ---------------------------------------------------------------------------------------------------------------------
+def legacy_generate_movie_age(df):
+    currentYear = datetime.now().year
+    for index, row in df.iterrows():
+        df.loc[index, 'movie_age'] = currentYear - row['year']
+    return df
+
+def legacy_engineer_rt_critic_score(df):
+    for index, row in df.iterrows():
+        if pd.notnull(row['rt_critic_score']):
+            df.loc[index, 'rt_critic_score'] = int(row['rt_critic_score'][:2])
+    df['rt_critic_score'] = df['rt_critic_score'].fillna(59)
+    df['rt_critic_score'] = df['rt_critic_score'].astype(int)
+    return df
+
+def legacy_handle_nulls_for_metascore(df):
+    df['metascore'] = df['metascore'].fillna(50.0)
+    return df
+
+def legacy_handle_nulls_for_rt_audience_score(df):
+    df['rt_audience_score'] = df['rt_audience_score'].fillna(59.0)
+    return df
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def generate_raw_features(n_rows, seed = 42):
+    """
+    Generating a synthetic DataFrame shaped like the raw feature columns in all_data.csv
+
+    Args:
+        - n_rows (int): Number of rows to generate
+        - seed (int): Random seed for reproducibility
+
+    Returns:
+        - df (Pandas DataFrame): A DataFrame containing synthetic year, RT critic, RT audience and metascore columns
+    """
+
+    # Instantiating the random generator
+    rng = np.random.default_rng(seed)
+
+    # Generating the RT critic scores as percentage strings with roughly 10% nulls
+    rt_critic_score = pd.Series([f'{score}%' for score in rng.integers(10, 100, n_rows)], dtype = object)
+    rt_critic_score[rng.random(n_rows) < 0.1] = np.nan
+
+    # Generating the numeric columns with roughly 10-30% nulls
+    metascore = rng.integers(10, 100, n_rows).astype(float)
+    metascore[rng.random(n_rows) < 0.1] = np.nan
+    rt_audience_score = rng.integers(10, 100, n_rows).astype(float)
+    rt_audience_score[rng.random(n_rows) < 0.3] = np.nan
+
+    return pd.DataFrame({'year': rng.integers(1950, 2022, n_rows).astype(float),
+                         'rt_critic_score': rt_critic_score,
+                         'metascore': metascore,
+                         'rt_audience_score': rt_audience_score})
+
+
+
+def run_legacy(df):
+    return [legacy_generate_movie_age(df[['year']].copy()),
+            legacy_engineer_rt_critic_score(df[['rt_critic_score']].copy()),
+            legacy_handle_nulls_for_rt_audience_score(df[['rt_audience_score']].copy()),
+            legacy_handle_nulls_for_metascore(df[['metascore']].copy())]
+
+
+
+def run_vectorized(df):
+    return [MovieAgeTransformer().transform(df[['year']]),
+            RTCriticScoreTransformer(fill_value = 59).transform(df[['rt_critic_score']]),
+            NullImputer(fill_value = 59.0).transform(df[['rt_audience_score']]),
+            NullImputer(fill_value = 50.0).transform(df[['metascore']])]
+
+
+
+def time_call(func, df):
+    start = time.perf_counter()
+    outputs = func(df)
+    return time.perf_counter() - start, outputs
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Benchmarks the vectorized feature transformers against the legacy iterrows functions')
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [1_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max-rows', type = int, default = None,
+                        help = 'Skipping the legacy functions above this many rows (they take minutes at 1M rows)')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} | {'legacy (s)':>12} | {'vectorized (s)':>14} | {'speedup':>8} | identical")
+    for n_rows in args.sizes:
+        df_raw = generate_raw_features(n_rows)
+
+        # Timing the vectorized transformers
+        vectorized_time, vectorized_outputs = time_call(run_vectorized, df_raw)
+
+        # Timing the legacy functions and checking the outputs match
+        if args.legacy_max_rows is not None and n_rows > args.legacy_max_rows:
+            print(f'{n_rows:>10} | {"skipped":>12} | {vectorized_time:>14.4f} | {"-":>8} | -')
+            continue
+        legacy_time, legacy_outputs = time_call(run_legacy, df_raw)
+        identical = all(np.array_equal(legacy.to_numpy(dtype = np.float64), vectorized.to_numpy(dtype = np.float64))
+                        for legacy, vectorized in zip(legacy_outputs, vectorized_outputs))
+
+        print(f'{n_rows:>10} | {legacy_time:>12.4f} | {vectorized_time:>14.4f} | {legacy_time / vectorized_time:>7.0f}x | {identical}')
@@ -0,0 +1,77 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+
+# Importing the training functions
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-training'))
+from helpers import flatten_forest_classifier
+from train import train
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def time_predictions(predict_func, X, repeats):
+    """
+    Timing repeated calls of a prediction function on the same batch
+
+    Args:
+        - predict_func (function): The prediction function to time
+        - X (array-like): The batch to predict on
+        - repeats (int): Number of timed calls
+
+    Returns:
+        - seconds_per_call (float): The median duration of a single call
+        - predictions (NumPy array): The predictions from the last call
+    """
+
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictions = predict_func(X)
+        durations.append(time.perf_counter() - start)
+
+    return float(np.median(durations)), predictions
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Benchmarks the flattened forest evaluator against sklearn RandomForestClassifier.predict')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [1, 32, 1024])
+    parser.add_argument('--repeats', type = int, default = 200)
+    args = parser.parse_args()
+
+    # Training the model on the reviewed movies and flattening its forest
+    warnings.filterwarnings('ignore')
+    df_raw = pd.read_csv(args.data_path)
+    movie_rating_model = train(df_raw)
+    flattened_model = flatten_forest_classifier(movie_rating_model)
+
+    # Benchmarking the forests alone on the already engineered features, since the feature engineering is shared
+    forest = movie_rating_model.classifier
+    flat_forest = flattened_model.classifier
+    X_engineered = np.asarray(movie_rating_model.feature_engineering.transform(df_raw.drop(columns = ['biehn_yes_or_no', 'biehn_scale_rating'])),
+                              dtype = np.float64)
+
+    print(f"{'batch':>6} | {'sklearn (ms)':>12} | {'flat (ms)':>10} | {'speedup':>8} | identical")
+    rng = np.random.default_rng(42)
+    for batch_size in args.sizes:
+        # Sampling a batch of engineered rows with replacement
+        X_batch = X_engineered[rng.integers(0, len(X_engineered), batch_size)]
+
+        # Timing both evaluators and checking the probabilities match bit for bit
+        sklearn_time, sklearn_predictions = time_predictions(forest.predict, X_batch, args.repeats)
+        flat_time, flat_predictions = time_predictions(flat_forest.predict, X_batch, args.repeats)
+        identical = (np.array_equal(sklearn_predictions, flat_predictions)
+                     and np.array_equal(forest.predict_proba(X_batch), flat_forest.predict_proba(X_batch)))
+
+        print(f'{batch_size:>6} | {sklearn_time * 1e3:>12.3f} | {flat_time * 1e3:>10.3f} | {sklearn_time / flat_time:>7.1f}x | {identical}')
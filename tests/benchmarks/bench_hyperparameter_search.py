@@ -0,0 +1,61 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+# Importing the model training code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-training'))
+from train import build_data_preprocessor, build_regressor, DEFAULT_CLASSIFIER_PARAMS
+from hyperparameter_search import load_search_config, search_movie_rating_model
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def timed_search(df_raw, search_config, cache_dir, n_jobs):
+    # Timing a full search of both heads, returning the best hyperparameters found
+    start = time.perf_counter()
+    best_params, df_results = search_movie_rating_model(df_raw, build_data_preprocessor(), RandomForestClassifier(**DEFAULT_CLASSIFIER_PARAMS, random_state = search_config['random_state']),
+                                                        build_regressor(), search_config, cache_dir, n_jobs = n_jobs)
+    return time.perf_counter() - start, best_params, len(df_results)
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares the hyperparameter search with and without caching the fitted feature engineering per fold')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--search-type', choices = ['grid', 'random'], default = 'random')
+    parser.add_argument('--n-iter', type = int, default = 20)
+    parser.add_argument('--cv', type = int, default = 5)
+    parser.add_argument('--n-jobs', type = int, nargs = '+', default = [1, -1])
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+    df_raw = pd.read_csv(args.data_path)
+    search_config = load_search_config(overrides = {'search_type': args.search_type, 'n_iter': args.n_iter, 'cv': args.cv})
+
+    results = []
+    for n_jobs in args.n_jobs:
+        # Searching without a cache, so every candidate refits the feature engineering of its fold
+        uncached_seconds, uncached_params, n_candidates = timed_search(df_raw, search_config, None, n_jobs)
+
+        # Searching with a fresh cache, so the feature engineering is fit once per fold and head
+        cache_dir = tempfile.mkdtemp()
+        cached_seconds, cached_params, _ = timed_search(df_raw, search_config, cache_dir, n_jobs)
+        shutil.rmtree(cache_dir)
+        results.append((n_jobs, n_candidates, uncached_seconds, cached_seconds, uncached_params == cached_params))
+
+    # Reporting the search times side by side
+    print(f'{args.search_type} search over both heads of {len(df_raw)} movies with {args.cv}-fold CV ({os.cpu_count()} cores)')
+    print(f"{'n_jobs':>6} | {'candidates':>10} | {'no cache':>8} | {'cached':>7} | {'speedup':>7} | same best")
+    for n_jobs, n_candidates, uncached_seconds, cached_seconds, same_params in results:
+        print(f'{n_jobs:>6} | {n_candidates:>10} | {uncached_seconds:>7.2f}s | {cached_seconds:>6.2f}s | '
+              f'{uncached_seconds / cached_seconds:>6.2f}x | {same_params}')
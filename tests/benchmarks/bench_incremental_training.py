@@ -0,0 +1,73 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Lasso
+
+# Importing the model training code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-training'))
+from train import train
+from incremental_training import TARGET_COLUMNS, load_incremental_params, train_incrementally
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def build_history(all_data, n_movies, offset = 0):
+    # Repeating all_data.csv under unique titles to the given number of movies
+    df = pd.concat([all_data] * (n_movies // len(all_data) + 1), ignore_index = True).head(n_movies).copy()
+    df['movie_name'] = [f'{movie_name} #{offset + i}' for i, movie_name in enumerate(df['movie_name'])]
+    return df
+
+
+
+def lasso_gap(incremental_state, df_raw):
+    # Measuring how far the incrementally solved Lasso is from sklearn's fit on all rows through the same frozen scaler
+    movie_rating_model = incremental_state.movie_rating_model
+    lasso = movie_rating_model.regressor.steps[-1][1]
+    Z = movie_rating_model.regressor[:-1].transform(movie_rating_model.feature_engineering.transform(df_raw.drop(columns = TARGET_COLUMNS)))
+    reference = Lasso(alpha = lasso.alpha).fit(Z, df_raw['biehn_scale_rating'])
+    return np.abs(reference.coef_ - lasso.coef_).max()
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares a full refit with an incremental update as the history grows')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--history', type = int, nargs = '+', default = [1000, 10000, 50000])
+    parser.add_argument('--delta', type = int, default = 100)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+    all_data = pd.read_csv(args.data_path)
+    training_params = {'classifier': None, 'regressor': None}
+    incremental_params = load_incremental_params()
+
+    results = []
+    for n_movies in args.history:
+        df_history = build_history(all_data, n_movies)
+        df_raw = pd.concat([df_history, build_history(all_data, args.delta, offset = n_movies)], ignore_index = True)
+
+        # Building the state from a full refit on the history, then timing a full refit and an update on history + delta
+        _, incremental_state, _ = train_incrementally(df_history, None, train, training_params, incremental_params)
+        start = time.perf_counter()
+        train(df_raw)
+        full_refit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        _, incremental_state, report = train_incrementally(df_raw, incremental_state, train, training_params, incremental_params)
+        incremental_seconds = time.perf_counter() - start
+        results.append((n_movies, full_refit_seconds, incremental_seconds, report['mode'], lasso_gap(incremental_state, df_raw)))
+
+    # Reporting both times side by side
+    print(f'Learning a {args.delta}-movie delta ({incremental_params["trees_per_update"]} new trees on up to '
+          f'{incremental_params["window_size"]} recent rows)')
+    print(f"{'history':>8} | {'full refit':>10} | {'incremental':>11} | {'speedup':>7} | {'mode':>11} | max Lasso coef gap")
+    for n_movies, full_refit_seconds, incremental_seconds, mode, gap in results:
+        print(f'{n_movies:>8} | {full_refit_seconds:>9.2f}s | {incremental_seconds:>10.3f}s | '
+              f'{full_refit_seconds / incremental_seconds:>6.1f}x | {mode:>11} | {gap:.2e}')
@@ -0,0 +1,131 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import asyncio
+import argparse
+import warnings
+import threading
+import numpy as np
+import pandas as pd
+from functools import partial
+
+# Importing the inference helper functions and the micro-batcher
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-inference-ui'))
+from helpers import ALL_FEATS, load_movie_rating_model, flatten_forest_classifier, compile_movie_rating_model, predict_from_features
+from micro_batcher import MicroBatcher
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def run_concurrent(score_func, feature_records, n_threads, requests_per_thread):
+    """
+    Scoring single movies from several threads at once, like concurrent API requests
+
+    Args:
+        - score_func (function): Function scoring one dictionary of movie features
+        - feature_records (list): The dictionaries of movie features to cycle through
+        - n_threads (int): Number of concurrent callers
+        - requests_per_thread (int): Number of movies each caller scores
+
+    Returns:
+        - throughput (float): Scored movies per second across all callers
+        - latencies (NumPy array): The duration of every single call in milliseconds
+    """
+
+    latencies = [[] for _ in range(n_threads)]
+    barrier = threading.Barrier(n_threads + 1)
+
+    def caller(thread_index):
+        barrier.wait()
+        for i in range(requests_per_thread):
+            record = feature_records[(thread_index * requests_per_thread + i) % len(feature_records)]
+            start = time.perf_counter()
+            score_func(record)
+            latencies[thread_index].append((time.perf_counter() - start) * 1000)
+
+    # Releasing every caller at once and timing until the last one finishes
+    threads = [threading.Thread(target = caller, args = (thread_index,)) for thread_index in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return n_threads * requests_per_thread / elapsed, np.concatenate([np.asarray(thread_latencies) for thread_latencies in latencies])
+
+
+
+def run_cancellation(micro_batcher, feature_records, n_requests):
+    """
+    Cancelling every other async caller while their items wait in the queue, like clients disconnecting mid-request
+
+    Args:
+        - micro_batcher (MicroBatcher): The micro-batcher to submit to
+        - feature_records (list): The dictionaries of movie features to cycle through
+        - n_requests (int): Number of concurrent async callers, half of which are cancelled
+
+    Returns:
+        - survived (bool): Whether every caller left uncancelled, and one submitted afterwards, received its result
+    """
+
+    async def cancel_half():
+        tasks = [asyncio.ensure_future(micro_batcher.submit_async(feature_records[i % len(feature_records)])) for i in range(n_requests)]
+        await asyncio.sleep(0)
+        for task in tasks[::2]:
+            task.cancel()
+        results = await asyncio.gather(*tasks[1::2])
+        late_result = await asyncio.wait_for(micro_batcher.submit_async(feature_records[0]), timeout = 5)
+        return len(results) == len(tasks[1::2]) and late_result is not None
+
+    # Reserving a place for every caller so their items wait in the queue (for max_wait_ms) long enough to be cancelled
+    with micro_batcher.reserve(), micro_batcher.reserve():
+        try:
+            return asyncio.run(cancel_half())
+        except asyncio.TimeoutError:
+            return False
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Benchmarks micro-batched scoring against one model call per request')
+    parser.add_argument('--model-dir', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../models'))
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--threads', type = int, nargs = '+', default = [1, 8, 32])
+    parser.add_argument('--requests-per-thread', type = int, default = 200)
+    parser.add_argument('--max-batch-size', type = int, default = 32)
+    parser.add_argument('--max-wait-ms', type = float, default = 2.0)
+    args = parser.parse_args()
+
+    # Loading and compiling the model the same way the API does
+    warnings.filterwarnings('ignore')
+    movie_rating_model = compile_movie_rating_model(flatten_forest_classifier(load_movie_rating_model(args.model_dir)))
+    feature_records = pd.read_csv(args.data_path)[['movie_name'] + ALL_FEATS].to_dict('records')
+    predict_batch = partial(predict_from_features, movie_rating_model = movie_rating_model)
+
+    print(f"{'threads':>7} | {'mode':>8} | {'req/s':>8} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'mean batch':>10}")
+    for n_threads in args.threads:
+        # Scoring each request with its own model call
+        throughput, latencies = run_concurrent(lambda record: predict_batch([record])[0], feature_records, n_threads, args.requests_per_thread)
+        print(f'{n_threads:>7} | {"direct":>8} | {throughput:>8.0f} | {np.percentile(latencies, 50):>8.3f} | {np.percentile(latencies, 99):>8.3f} | {1:>10.2f}')
+
+        # Scoring the same requests through a fresh micro-batcher
+        micro_batcher = MicroBatcher(predict_batch, max_batch_size = args.max_batch_size, max_wait_ms = args.max_wait_ms)
+        throughput, latencies = run_concurrent(micro_batcher.submit, feature_records, n_threads, args.requests_per_thread)
+        mean_batch_size = micro_batcher.stats()['batch_size']['mean']
+        micro_batcher.shutdown()
+        print(f'{n_threads:>7} | {"batched":>8} | {throughput:>8.0f} | {np.percentile(latencies, 50):>8.3f} | {np.percentile(latencies, 99):>8.3f} | {mean_batch_size:>10.2f}')
+
+    # Checking that callers cancelled while queued neither fail the others nor stop the batcher
+    micro_batcher = MicroBatcher(predict_batch, max_batch_size = args.max_batch_size, max_wait_ms = max(args.max_wait_ms, 50.0))
+    survived = run_cancellation(micro_batcher, feature_records, 2 * args.max_batch_size)
+    cancelled_items = micro_batcher.stats()['cancelled_items']
+    micro_batcher.shutdown()
+    print(f'Cancelling half of {2 * args.max_batch_size} queued async callers: {cancelled_items} items dropped, '
+          f'batcher {"kept serving" if survived else "STOPPED SERVING"}')
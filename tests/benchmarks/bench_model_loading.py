@@ -0,0 +1,145 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import json
+import argparse
+import tempfile
+import warnings
+import subprocess
+import cloudpickle
+import numpy as np
+
+# Importing the inference helper functions
+INFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-inference-ui')
+sys.path.insert(0, INFERENCE_DIR)
+from helpers import MOVIE_RATING_MODEL_FILE, load_movie_rating_model, flatten_forest_classifier, save_movie_rating_model_arrays
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the worker that loads and warms up the model the way an API worker does, reporting its timings and memory
+WORKER_SCRIPT = '''
+import os, sys, json, time
+sys.path.insert(0, sys.argv[1])
+
+def read_memory_kib(path, fields):
+    with open(path) as f:
+        values = dict(line.split(':', 1) for line in f if ':' in line)
+    return {field: int(values[field].split()[0]) for field in fields}
+
+start = time.perf_counter()
+import warnings
+warnings.filterwarnings('ignore')
+import pandas as pd
+from helpers import ALL_FEATS, load_movie_rating_model, flatten_forest_classifier, compile_movie_rating_model
+import_seconds = time.perf_counter() - start
+feature_records = pd.read_csv(sys.argv[3])[ALL_FEATS].to_dict('records')
+
+before = read_memory_kib('/proc/self/status', ['RssAnon', 'RssFile'])
+start = time.perf_counter()
+movie_rating_model = compile_movie_rating_model(flatten_forest_classifier(load_movie_rating_model(sys.argv[2])))
+load_seconds = time.perf_counter() - start
+movie_rating_model.predict_all(feature_records)
+after = read_memory_kib('/proc/self/status', ['RssAnon', 'RssFile'])
+
+print(json.dumps({'import_seconds': import_seconds, 'load_seconds': load_seconds,
+                  'rss_anon_kib': after['RssAnon'] - before['RssAnon'], 'rss_file_kib': after['RssFile'] - before['RssFile']}), flush = True)
+sys.stdin.readline()
+'''
+
+
+
+def run_workers(model_dir, data_path, n_workers):
+    """
+    Starting several worker processes at once, each loading the model from the same directory, and measuring them together
+
+    Args:
+        - model_dir (str): Directory holding the artifact to load
+        - data_path (str): CSV of movies each worker scores once to touch the model's pages
+        - n_workers (int): Number of concurrent worker processes
+
+    Returns:
+        - reports (list): Each worker's timings and resident memory growth
+        - total_pss_kib (int): The workers' summed proportional set size while all of them are alive
+    """
+
+    workers = [subprocess.Popen([sys.executable, '-c', WORKER_SCRIPT, INFERENCE_DIR, model_dir, data_path],
+                                stdin = subprocess.PIPE, stdout = subprocess.PIPE, text = True)
+               for _ in range(n_workers)]
+
+    # Waiting for every worker to finish loading, then reading their memory while all of them still hold the model
+    reports = [json.loads(worker.stdout.readline()) for worker in workers]
+    total_pss_kib = 0
+    for worker in workers:
+        with open(f'/proc/{worker.pid}/smaps_rollup') as f:
+            total_pss_kib += next(int(line.split()[1]) for line in f if line.startswith('Pss:'))
+
+    # Releasing the workers
+    for worker in workers:
+        worker.communicate('\n')
+
+    return reports, total_pss_kib
+
+
+
+def tile_forest(flat_forest, copies):
+    """
+    Repeating a flattened forest's trees to emulate a larger production forest with the same predictions
+
+    Args:
+        - flat_forest (FlatForestClassifier): The flattened forest to enlarge (modified in place)
+        - copies (int): How many copies of every tree the enlarged forest holds
+    """
+
+    n_nodes = len(flat_forest.nodes_)
+    node_tables = []
+    for copy_index in range(copies):
+        node_table = flat_forest.nodes_.copy()
+        node_table['left'] += copy_index * n_nodes
+        node_table['right'] += copy_index * n_nodes
+        node_tables.append(node_table)
+    flat_forest.nodes_ = np.concatenate(node_tables)
+    flat_forest.value_ = np.concatenate([flat_forest.value_] * copies)
+    flat_forest.roots_ = np.concatenate([flat_forest.roots_ + copy_index * n_nodes for copy_index in range(copies)])
+
+
+
+def directory_size_kib(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / 1024
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares cold start time and worker memory of the pickled and memory-mapped model artifacts')
+    parser.add_argument('--model-dir', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../models'))
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--workers', type = int, nargs = '+', default = [1, 4])
+    parser.add_argument('--forest-copies', type = int, default = 1, help = 'Repeats the trees to emulate a larger forest')
+    args = parser.parse_args()
+
+    # Writing the same flattened model in both formats into scratch directories
+    warnings.filterwarnings('ignore')
+    movie_rating_model = flatten_forest_classifier(load_movie_rating_model(args.model_dir))
+    if args.forest_copies > 1:
+        tile_forest(movie_rating_model.classifier, args.forest_copies)
+    with tempfile.TemporaryDirectory() as pickle_dir, tempfile.TemporaryDirectory() as arrays_dir:
+        with open(os.path.join(pickle_dir, MOVIE_RATING_MODEL_FILE), 'wb') as f:
+            cloudpickle.dump(movie_rating_model, f)
+        save_movie_rating_model_arrays(movie_rating_model, arrays_dir)
+
+        print(f"{'format':>7} | {'disk KiB':>8} | {'workers':>7} | {'import (s)':>10} | {'load (s)':>8} | {'anon KiB/worker':>15} | {'file KiB/worker':>15} | {'total PSS MiB':>13}")
+        for n_workers in args.workers:
+            for artifact_format, model_dir in [('pickle', pickle_dir), ('arrays', arrays_dir)]:
+                reports, total_pss_kib = run_workers(model_dir, args.data_path, n_workers)
+
+                # Averaging the per-worker figures
+                import_seconds = np.median([report['import_seconds'] for report in reports])
+                load_seconds = np.median([report['load_seconds'] for report in reports])
+                anon_kib = np.mean([report['rss_anon_kib'] for report in reports])
+                file_kib = np.mean([report['rss_file_kib'] for report in reports])
+                print(f'{artifact_format:>7} | {directory_size_kib(model_dir):>8.0f} | {n_workers:>7} | {import_seconds:>10.3f} | {load_seconds:>8.4f} | '
+                      f'{anon_kib:>15.0f} | {file_kib:>15.0f} | {total_pss_kib / 1024:>13.1f}')
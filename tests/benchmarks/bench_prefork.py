@@ -0,0 +1,188 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+import pandas as pd
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def warm_metadata_cache(cache_path, data_path):
+    """
+    Filling a metadata cache with every reviewed movie so the benchmark scores movies without calling any provider
+
+    Args:
+        - cache_path (str): Where the SQLite metadata cache is written
+        - data_path (str): Path to all_data.csv
+
+    Returns:
+        - movie_names (list): The titles whose provider responses are now cached
+    """
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/data-engineering'))
+    from metadata_cache import MetadataCache, normalize_title
+
+    # Writing each movie's provider responses in the slimmed shapes the lookups read back
+    metadata_cache = MetadataCache(path = cache_path)
+    all_data = pd.read_csv(data_path)
+    for row in all_data.itertuples():
+        metadata_cache.set('tmdb_search', normalize_title(row.movie_name), row.tmdb_id)
+        genres = [{'name': genre} for genre in [row.primary_genre, row.secondary_genre] if isinstance(genre, str)]
+        metadata_cache.set('tmdb', row.tmdb_id, {'imdb_id': row.imdb_id, 'budget': row.budget, 'genres': genres,
+                                                 'popularity': row.tmdb_popularity, 'revenue': row.revenue,
+                                                 'runtime': row.runtime, 'vote_average': row.tmdb_vote_average,
+                                                 'vote_count': row.tmdb_vote_count})
+        metadata_cache.set('imdb', row.imdb_id, {'rating': row.imdb_rating, 'votes': row.imdb_votes, 'year': int(row.year)})
+        ratings = [{'source': 'Rotten Tomatoes', 'value': row.rt_critic_score}] if isinstance(row.rt_critic_score, str) else []
+        metadata_cache.set('omdb', row.imdb_id, {'ratings': ratings, 'metascore': str(int(row.metascore)) if row.metascore == row.metascore else 'N/A'})
+        rt_critic_score = row.rt_critic_score[:2] if isinstance(row.rt_critic_score, str) else None
+        metadata_cache.set('rt', normalize_title(row.movie_name), {'Score_Rotten': rt_critic_score, 'Score_Audience': row.rt_audience_score})
+    metadata_cache.close()
+
+    return all_data['movie_name'].tolist()
+
+
+
+def get_status(url):
+    # Getting the status code of a GET request, or None while nothing is listening yet
+    try:
+        with urllib.request.urlopen(url, timeout = 1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None
+
+
+
+def post_batch(url, movie_names):
+    # Posting one batch of titles and returning how many were scored
+    request = urllib.request.Request(url, data = json.dumps(movie_names).encode(), headers = {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout = 60) as response:
+        return len(json.loads(response.read()))
+
+
+
+def run_load(url, movie_names, n_clients, batch_size, duration):
+    """
+    Posting batches of titles from concurrent clients for a fixed duration
+
+    Args:
+        - url (str): The batch scoring endpoint
+        - movie_names (list): The titles the batches are drawn from
+        - n_clients (int): Number of concurrent client threads
+        - batch_size (int): Titles per request
+        - duration (float): Seconds to keep posting
+
+    Returns:
+        - titles_per_second (float): Titles scored per second across all clients
+    """
+
+    scored = [0] * n_clients
+    deadline = time.perf_counter() + duration
+
+    def client(client_index):
+        # Rotating through the titles so each client posts different batches
+        offset = client_index * batch_size
+        while time.perf_counter() < deadline:
+            batch = [movie_names[(offset + i) % len(movie_names)] for i in range(batch_size)]
+            scored[client_index] += post_batch(url, batch)
+            offset += batch_size * n_clients
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target = client, args = (client_index,)) for client_index in range(n_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sum(scored) / (time.perf_counter() - start)
+
+
+
+def time_workers(app_dir, cwd, env, workers, movie_names, n_clients, batch_size, duration, timeout):
+    """
+    Starting the pre-fork server with a number of workers and measuring its batch scoring throughput
+
+    Args:
+        - app_dir (str): Directory holding prefork_server.py
+        - cwd (str): Working directory the API is started from
+        - env (dict): Environment of the server
+        - workers (int): Number of worker processes
+        - movie_names (list): The titles the batches are drawn from
+        - n_clients (int): Number of concurrent client threads
+        - batch_size (int): Titles per request
+        - duration (float): Seconds of load after a short warm-up
+        - timeout (float): Seconds to wait for readiness before giving up
+
+    Returns:
+        - titles_per_second (float): Titles scored per second
+    """
+
+    # Reserving a free port for this run
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    # Launching the pre-fork server and waiting until its workers are ready
+    server = subprocess.Popen([sys.executable, os.path.join(app_dir, 'prefork_server.py'), '--host', '127.0.0.1', '--port', str(port),
+                               '--workers', str(workers), '--log-level', 'warning'],
+                              cwd = cwd, env = env, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+    try:
+        start = time.perf_counter()
+        while get_status(f'http://127.0.0.1:{port}/ready') != 200:
+            if server.poll() is not None:
+                raise RuntimeError(f'The pre-fork server exited with code {server.returncode} during startup.')
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError('The pre-fork server did not become ready in time.')
+            time.sleep(0.1)
+
+        # Warming every worker's in-memory cache tier before measuring
+        url = f'http://127.0.0.1:{port}/invocations/batch'
+        run_load(url, movie_names, n_clients, batch_size, min(duration, 3.0))
+        return run_load(url, movie_names, n_clients, batch_size, duration)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Measures batch scoring throughput of the pre-fork server as the worker count grows')
+    parser.add_argument('--app-dir', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-inference-ui'))
+    parser.add_argument('--cwd', default = None, help = 'Working directory for the API (defaults to the app directory, as when run locally)')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--workers', type = int, nargs = '+', default = sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument('--clients', type = int, default = 16)
+    parser.add_argument('--batch-size', type = int, default = 32)
+    parser.add_argument('--duration', type = float, default = 10.0)
+    parser.add_argument('--timeout', type = float, default = 120.0)
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app_dir)
+    cwd = args.cwd or app_dir
+
+    # Pre-warming a throwaway metadata cache so the workload is the CPU-bound feature engineering and scoring alone
+    cache_path = os.path.join(tempfile.mkdtemp(), 'metadata_cache.sqlite')
+    movie_names = warm_metadata_cache(cache_path, os.path.abspath(args.data_path))
+    env = dict(os.environ, METADATA_CACHE_PATH = cache_path, RESULT_CACHE_TTL = '0')
+
+    # Measuring each worker count against the single worker baseline
+    print(f'{os.cpu_count()} CPU core(s), {args.clients} clients posting {args.batch_size} titles per request')
+    print(f"{'workers':>7} | {'titles/s':>9} | {'speedup':>7}")
+    baseline = None
+    for workers in args.workers:
+        titles_per_second = time_workers(app_dir, cwd, env, workers, movie_names, args.clients, args.batch_size, args.duration, args.timeout)
+        baseline = baseline or titles_per_second
+        print(f'{workers:>7} | {titles_per_second:>9.1f} | {titles_per_second / baseline:>6.2f}x')
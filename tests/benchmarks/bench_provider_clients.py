@@ -0,0 +1,134 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Importing the provider client registry from the data engineering directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/data-engineering'))
+import tmdbv3api
+from imdb import IMDb
+from omdb import OMDBClient
+from provider_clients import ProviderClients
+
+
+
+## LOCAL STAND-IN SERVER
+## ---------------------------------------------------------------------------------------------------------------------
+# Defining the canned responses of the stand-in TMDb and OMDb endpoints
+TMDB_SEARCH_RESPONSE = {'page': 1, 'total_results': 1, 'total_pages': 1, 'results': [{'id': 603, 'title': 'The Matrix'}]}
+TMDB_DETAILS_RESPONSE = {'id': 603, 'imdb_id': 'tt0133093', 'budget': 63000000, 'genres': [{'id': 28, 'name': 'Action'}],
+                         'popularity': 70.1, 'revenue': 463517383, 'runtime': 136, 'vote_average': 8.2, 'vote_count': 22000}
+OMDB_RESPONSE = {'Response': 'True', 'Title': 'The Matrix', 'Metascore': '73',
+                 'Ratings': [{'Source': 'Rotten Tomatoes', 'Value': '88%'}]}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Keeping connections alive between requests like the real APIs do (without Nagle stalls on the split header / body writes)
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    # Simulated per-connection setup cost (e.g. a TLS handshake), set from the command line
+    handshake_seconds = 0.0
+
+    def setup(self):
+        time.sleep(self.handshake_seconds)
+        super().setup()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.startswith('/3/search/movie'):
+            body = TMDB_SEARCH_RESPONSE
+        elif url.path.startswith('/3/movie/'):
+            body = TMDB_DETAILS_RESPONSE
+        elif 'i' in parse_qs(url.query):
+            body = OMDB_RESPONSE
+        else:
+            body = {}
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def point_at_stand_in(base_url, tmdb_objects, omdb_client):
+    for tmdb_object in tmdb_objects:
+        tmdb_object._base = f'{base_url}/3'
+    omdb_client.url = base_url
+
+
+
+def lookup_with_fresh_clients(base_url):
+    # Building every client per call, like get_movie_features did before the registry
+    tmdb = tmdbv3api.TMDb()
+    tmdb_search = tmdbv3api.Search()
+    tmdb_movies = tmdbv3api.Movie()
+    tmdb.api_key = 'benchmark'
+    imdb_search = IMDb()
+    omdb_client = OMDBClient(apikey = 'benchmark')
+    point_at_stand_in(base_url, [tmdb, tmdb_search, tmdb_movies], omdb_client)
+
+    tmdb_id = tmdb_search.movies({'query': 'The Matrix'})[0]['id']
+    tmdb_movies.details(tmdb_id)
+    omdb_client.imdbid('tt0133093')
+
+
+
+def lookup_with_registry(provider_clients):
+    tmdb_id = provider_clients.tmdb_search.movies({'query': 'The Matrix'})[0]['id']
+    provider_clients.tmdb_movies.details(tmdb_id)
+    provider_clients.omdb_client.imdbid('tt0133093')
+
+
+
+def time_calls(func, n_calls):
+    durations = []
+    for _ in range(n_calls):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return np.array(durations) * 1000
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares per-call provider clients with the pooled ProviderClients registry')
+    parser.add_argument('--calls', type = int, default = 200)
+    parser.add_argument('--handshake-ms', type = float, default = 0.0, help = 'Simulated per-connection setup cost on the server')
+    args = parser.parse_args()
+
+    # Starting the stand-in server on a free local port
+    StandInHandler.handshake_seconds = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    # Building the registry once and pointing it at the stand-in server
+    provider_clients = ProviderClients('benchmark', 'benchmark')
+    point_at_stand_in(base_url, [provider_clients.tmdb, provider_clients.tmdb_search, provider_clients.tmdb_movies],
+                      provider_clients.omdb_client)
+
+    # Timing the search -> details -> OMDb sequence both ways (tmdbv3api's own request cache stays disabled for both)
+    results = {'fresh clients (before)': time_calls(lambda: lookup_with_fresh_clients(base_url), args.calls),
+               'ProviderClients (after)': time_calls(lambda: lookup_with_registry(provider_clients), args.calls)}
+
+    print(f"{'mode':>24} | {'mean (ms)':>9} | {'p50 (ms)':>9} | {'p99 (ms)':>9}")
+    for mode, durations in results.items():
+        print(f'{mode:>24} | {durations.mean():>9.2f} | {np.percentile(durations, 50):>9.2f} | {np.percentile(durations, 99):>9.2f}')
+
+    server.shutdown()
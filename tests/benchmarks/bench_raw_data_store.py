@@ -0,0 +1,83 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import pandas as pd
+
+# Importing the data engineering storage
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/data-engineering'))
+from raw_data_store import RawDataStore, RAW_DATA_COLUMNS
+from save_and_join_raw_data import save_and_join_raw_data
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def build_history(all_data, n_movies, offset = 0):
+    # Repeating all_data.csv under unique titles to the given number of movies
+    df = pd.concat([all_data] * (n_movies // len(all_data) + 1), ignore_index = True).head(n_movies).copy()
+    df['movie_name'] = [f'{movie_name} #{offset + i}' for i, movie_name in enumerate(df['movie_name'])]
+    return df
+
+
+
+def timed(func, repeats = 3):
+    # Getting the best wall clock time of a few runs
+    best_seconds, result = float('inf'), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    return best_seconds, result
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares rewriting all_data.csv each run with appending Parquet partitions to the raw data store')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--history', type = int, nargs = '+', default = [10000, 100000, 500000])
+    parser.add_argument('--delta', type = int, default = 100)
+    parser.add_argument('--partitions', type = int, default = 10)
+    args = parser.parse_args()
+    all_data = pd.read_csv(args.data_path)
+
+    results = []
+    for n_movies in args.history:
+        work_dir = tempfile.mkdtemp()
+        df_history = build_history(all_data, n_movies)
+        df_delta = build_history(all_data, args.delta, offset = n_movies)
+
+        # Writing the history as a CSV and as a store of one large partition followed by several run-sized ones
+        df_history.to_csv(os.path.join(work_dir, 'all_data.csv'), index = False)
+        raw_data_store = RawDataStore(os.path.join(work_dir, 'all_data'))
+        raw_data_store.append(df_history, run_id = '0-history')
+        for partition in range(args.partitions):
+            raw_data_store.append(build_history(all_data, args.delta, offset = 2 * n_movies + partition * args.delta),
+                                  run_id = f'1-run-{partition:03d}')
+
+        # Timing one run's write: rewriting the whole CSV against appending a partition of the delta
+        csv_write_seconds, _ = timed(lambda: save_and_join_raw_data(df_history, df_delta, work_dir))
+        store_write_seconds, _ = timed(lambda: RawDataStore(os.path.join(work_dir, 'scratch')).append(df_delta))
+
+        # Timing the reads: the full CSV, the full store, the data engineering projection and the filtered training read
+        csv_read_seconds, _ = timed(lambda: pd.read_csv(os.path.join(work_dir, 'all_data.csv')))
+        store_read_seconds, df_stored = timed(lambda: raw_data_store.read())
+        projected_read_seconds, _ = timed(lambda: raw_data_store.read(columns = ['movie_name', 'biehn_scale_rating', 'biehn_yes_or_no', 'tmdb_id', 'imdb_id']))
+        filtered_read_seconds, _ = timed(lambda: raw_data_store.read(columns = RAW_DATA_COLUMNS, filters = [('year', '>=', 2015.0)]))
+        same_data = len(df_stored) == n_movies + args.partitions * args.delta
+        results.append((n_movies, csv_write_seconds, store_write_seconds, csv_read_seconds, store_read_seconds,
+                        projected_read_seconds, filtered_read_seconds, same_data))
+        shutil.rmtree(work_dir)
+
+    # Reporting the per-run write and the read times as the history grows
+    print(f'Writing a {args.delta}-movie delta and reading the history back ({args.partitions} run partitions on top of the history)')
+    print(f"{'history':>8} | {'csv write':>9} | {'store append':>12} | {'csv read':>8} | {'store read':>10} | {'projected':>9} | {'filtered':>8} | rows ok")
+    for n_movies, *seconds, same_data in results:
+        print(f'{n_movies:>8} | {seconds[0]:>8.3f}s | {seconds[1]:>11.3f}s | {seconds[2]:>7.3f}s | {seconds[3]:>9.3f}s | '
+              f'{seconds[4]:>8.3f}s | {seconds[5]:>7.3f}s | {same_data}')
@@ -0,0 +1,166 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import pandas as pd
+from types import SimpleNamespace
+
+# Importing the data engineering stages
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/data-engineering'))
+import get_rt_data
+from get_tmdb_data import get_tmdb_data, get_tmdb_record, TMDB_COLUMNS
+from get_imdb_data import get_imdb_data, get_imdb_fields
+from get_omdb_data import get_omdb_data, get_omdb_fields
+from get_rt_data import get_rt_fields
+from record_streams import iter_records, records_to_dataframe
+from enrichment_engine import stream_enriched_records, ENRICHED_COLUMNS
+
+
+
+## SIMULATED PROVIDERS
+## ---------------------------------------------------------------------------------------------------------------------
+def build_reviews_and_clients(all_data, n_movies):
+    """
+    Building a review list of the given length by repeating all_data.csv under unique titles and IDs, plus instant provider stand-ins
+
+    Args:
+        - all_data (Pandas DataFrame): The reviewed movies with every provider's values
+        - n_movies (int): Number of reviews to build
+
+    Returns:
+        - df_reviews (Pandas DataFrame): The "movie_name", "biehn_scale_rating" and "biehn_yes_or_no" of every review
+        - provider_clients (SimpleNamespace): Object with the attributes the enrichment stages read from ProviderClients
+    """
+
+    # Giving every repeated movie its own title, tmdb_id and imdb_id
+    rows = [all_data.iloc[i % len(all_data)] for i in range(n_movies)]
+    by_name = {f'{row.movie_name} #{i}': (i, row) for i, row in enumerate(rows)}
+    df_reviews = pd.DataFrame({'movie_name': list(by_name),
+                               'biehn_scale_rating': [row.biehn_scale_rating for row in rows],
+                               'biehn_yes_or_no': [row.biehn_yes_or_no for row in rows]})
+
+    class FakeSearch:
+        def movies(self, query):
+            return [{'id': by_name[query['query']][0]}]
+
+    class FakeMovie:
+        def details(self, tmdb_id):
+            row = rows[tmdb_id]
+            genres = [{'name': genre} for genre in [row.primary_genre, row.secondary_genre] if isinstance(genre, str)]
+            return {'imdb_id': f'tt{tmdb_id:07d}', 'budget': row.budget, 'genres': genres, 'popularity': row.tmdb_popularity,
+                    'revenue': row.revenue, 'runtime': row.runtime, 'vote_average': row.tmdb_vote_average,
+                    'vote_count': row.tmdb_vote_count}
+
+    class FakeIMDb:
+        def get_movie(self, imdb_id):
+            row = rows[int(imdb_id)]
+            return {'rating': row.imdb_rating, 'votes': row.imdb_votes, 'year': int(row.year)}
+
+    class FakeOMDBClient:
+        def imdbid(self, imdb_id):
+            row = rows[int(imdb_id[2:])]
+            ratings = [{'source': 'Rotten Tomatoes', 'value': row.rt_critic_score}] if isinstance(row.rt_critic_score, str) else []
+            return {'ratings': ratings, 'metascore': row.metascore}
+
+    class FakeMovieScraper:
+        def __init__(self, movie_title = None):
+            self.movie_title = movie_title
+            self.metadata = {}
+
+        def extract_metadata(self):
+            row = by_name[self.movie_title][1]
+            self.metadata = {'Score_Rotten': row.rt_critic_score[:2], 'Score_Audience': row.rt_audience_score}
+
+    # Swapping the scraper the Rotten Tomatoes stage constructs for the simulated one
+    get_rt_data.MovieScraper = FakeMovieScraper
+
+    provider_clients = SimpleNamespace(tmdb_search = FakeSearch(), tmdb_movies = FakeMovie(), imdb_search = FakeIMDb(),
+                                       omdb_client = FakeOMDBClient(), imdb_dataset = None)
+
+    return df_reviews, provider_clients
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def enrich_row_by_row(df_reviews, provider_clients):
+    # Reproducing the previous accumulation: growing the TMDb frame one row at a time (each step copies the whole frame)
+    # and then writing every later stage's values back one cell at a time with .loc
+    df_tmdb = pd.DataFrame(columns = TMDB_COLUMNS)
+    for index, row in df_reviews.iterrows():
+        tmdb_record = get_tmdb_record(row['movie_name'], row['biehn_scale_rating'], row['biehn_yes_or_no'],
+                                      provider_clients.tmdb_search, provider_clients.tmdb_movies)
+        df_tmdb = pd.concat([df_tmdb, pd.DataFrame.from_dict([tmdb_record])], ignore_index = True)
+
+    for index, row in df_tmdb.iterrows():
+        fields = get_imdb_fields(row['movie_name'], row['imdb_id'], provider_clients.imdb_search)
+        fields.update(get_omdb_fields(row['movie_name'], row['imdb_id'], provider_clients.omdb_client))
+        for column, value in fields.items():
+            df_tmdb.loc[index, column] = value
+    for index, row in df_tmdb.iterrows():
+        df_tmdb.loc[index, 'rt_audience_score'] = get_rt_fields(row['movie_name'], row['rt_critic_score'])['rt_audience_score']
+
+    return df_tmdb
+
+
+
+def enrich_by_stage(df_reviews, provider_clients):
+    # Running the four get_*_data stages, each streaming its records and materializing them once
+    df_new_data = get_tmdb_data(df_reviews, None, provider_clients = provider_clients)
+    df_new_data = get_imdb_data(df_new_data, provider_clients = provider_clients)
+    df_new_data = get_omdb_data(df_new_data, None, provider_clients = provider_clients)
+    return get_rt_data.get_rt_data(df_new_data)
+
+
+
+def enrich_streaming(df_reviews, provider_clients):
+    # Chaining the four stages into one record stream, materialized once at the end
+    return records_to_dataframe(stream_enriched_records(iter_records(df_reviews), provider_clients), ENRICHED_COLUMNS)
+
+
+
+def measure(enrich_func, df_reviews, provider_clients):
+    # Timing one run and tracking the peak memory Python allocated during it
+    tracemalloc.start()
+    start = time.perf_counter()
+    df_enriched = enrich_func(df_reviews, provider_clients)
+    seconds = time.perf_counter() - start
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return df_enriched, seconds, peak_bytes
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares row-by-row DataFrame accumulation with the streamed enrichment stages as the review list grows')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--movies', type = int, nargs = '+', default = [250, 500, 1000, 2000])
+    args = parser.parse_args()
+    all_data = pd.read_csv(args.data_path)
+
+    # Silencing the stages' per-movie progress messages
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+
+    results = []
+    for n_movies in args.movies:
+        df_reviews, provider_clients = build_reviews_and_clients(all_data, n_movies)
+        df_row_by_row, row_by_row_seconds, row_by_row_peak = measure(enrich_row_by_row, df_reviews, provider_clients)
+        df_by_stage, by_stage_seconds, by_stage_peak = measure(enrich_by_stage, df_reviews, provider_clients)
+        df_streaming, streaming_seconds, streaming_peak = measure(enrich_streaming, df_reviews, provider_clients)
+        same_data = df_row_by_row.astype(str).equals(df_by_stage.astype(str)) and df_row_by_row.astype(str).equals(df_streaming.astype(str))
+        results.append((n_movies, [(row_by_row_seconds, row_by_row_peak), (by_stage_seconds, by_stage_peak),
+                                   (streaming_seconds, streaming_peak)], same_data))
+
+    # Reporting time and peak traced memory for both approaches
+    sys.stdout = stdout
+    print('Seconds and peak traced memory (MB) of each approach')
+    print(f"{'movies':>6} | {'row-by-row':>16} | {'stage by stage':>16} | {'one stream':>16} | same data")
+    for n_movies, measurements, same_data in results:
+        cells = ' | '.join(f'{seconds:>7.2f}s {peak_bytes / 1e6:>6.2f}MB' for seconds, peak_bytes in measurements)
+        print(f'{n_movies:>6} | {cells} | {same_data}')
@@ -0,0 +1,113 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import argparse
+import tempfile
+import pandas as pd
+from types import SimpleNamespace
+
+# Importing the data engineering stages and the simulated providers of the record stream benchmark
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/data-engineering'))
+import get_rt_data
+from bench_record_streams import build_reviews_and_clients
+from enrichment_engine import EnrichmentEngine
+from enrichment_journal import EnrichmentJournal
+
+
+
+## SIMULATED INTERRUPTION
+## ---------------------------------------------------------------------------------------------------------------------
+class Interrupted(Exception):
+    pass
+
+
+
+def count_calls(provider_clients, calls, fail_after = None):
+    """
+    Wrapping the simulated providers so every upstream call is counted, optionally failing once a budget is spent
+
+    Args:
+        - provider_clients (SimpleNamespace): The simulated provider clients
+        - calls (dict): Counter of upstream calls, updated in place under the "count" key
+        - fail_after (int): Number of calls after which every API call raises, simulating a crash mid-run
+
+    Returns:
+        - counted_clients (SimpleNamespace): Object with the same attributes, each call passing through the counter
+    """
+
+    def counted(func, can_fail = True):
+        def wrapper(*args, **kwargs):
+            if can_fail and fail_after is not None and calls['count'] >= fail_after:
+                raise Interrupted('Simulated interruption')
+            calls['count'] += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    # Counting the scraper the Rotten Tomatoes stage constructs, always wrapping the simulated one rather than an earlier wrapper
+    # (it never fails, as the stage turns scraper errors into a missing score rather than a failed movie)
+    scraper = getattr(get_rt_data.MovieScraper, 'simulated', get_rt_data.MovieScraper)
+    class CountedMovieScraper(scraper):
+        simulated = scraper
+        extract_metadata = counted(scraper.extract_metadata, can_fail = False)
+    get_rt_data.MovieScraper = CountedMovieScraper
+
+    return SimpleNamespace(tmdb_search = SimpleNamespace(movies = counted(provider_clients.tmdb_search.movies)),
+                           tmdb_movies = SimpleNamespace(details = counted(provider_clients.tmdb_movies.details)),
+                           imdb_search = SimpleNamespace(get_movie = counted(provider_clients.imdb_search.get_movie)),
+                           omdb_client = SimpleNamespace(imdbid = counted(provider_clients.omdb_client.imdbid)),
+                           imdb_dataset = None)
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Interrupts an enrichment run partway and compares a resumed rerun with a full rerun')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--movies', type = int, default = 500)
+    parser.add_argument('--workers', type = int, default = 4)
+    parser.add_argument('--interrupt-fraction', type = float, default = 0.6)
+    args = parser.parse_args()
+
+    # Building the reviews and the simulated providers
+    all_data = pd.read_csv(args.data_path)
+    df_reviews, provider_clients = build_reviews_and_clients(all_data, args.movies)
+    journal_path = os.path.join(tempfile.mkdtemp(), 'enrichment_journal.jsonl')
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+
+    # Running a full, uninterrupted enrichment as the reference
+    full_calls = {'count': 0}
+    start = time.perf_counter()
+    df_full = EnrichmentEngine(count_calls(provider_clients, full_calls), max_workers = args.workers).enrich(df_reviews)
+    full_seconds = time.perf_counter() - start
+
+    # Interrupting a journaled run once the given share of its upstream calls has been made
+    interrupted_calls = {'count': 0}
+    # (the worker pool drops the failing movies, while the single-threaded stream stops at the first one)
+    journal = EnrichmentJournal(journal_path, fsync = False)
+    try:
+        EnrichmentEngine(count_calls(provider_clients, interrupted_calls, fail_after = int(full_calls['count'] * args.interrupt_fraction)),
+                         max_workers = args.workers, journal = journal).enrich(df_reviews)
+    except Interrupted:
+        pass
+    journal.close()
+
+    # Resuming from the journal the interrupted run left behind
+    resumed_calls = {'count': 0}
+    journal = EnrichmentJournal(journal_path, resume = True, fsync = False)
+    engine = EnrichmentEngine(count_calls(provider_clients, resumed_calls), max_workers = args.workers, journal = journal)
+    start = time.perf_counter()
+    df_resumed = engine.enrich(df_reviews)
+    resumed_seconds = time.perf_counter() - start
+    journal.discard()
+
+    # Reporting how much upstream work the resumed run redid
+    sys.stdout = stdout
+    same_data = df_full.astype(str).equals(df_resumed.astype(str))
+    print(f'{args.movies} movies, interrupted after {interrupted_calls["count"]} of {full_calls["count"]} upstream calls')
+    print(f"{'run':>8} | {'upstream calls':>14} | {'seconds':>7}")
+    print(f"{'full':>8} | {full_calls['count']:>14} | {full_seconds:>7.2f}")
+    print(f"{'resumed':>8} | {resumed_calls['count']:>14} | {resumed_seconds:>7.2f}")
+    print(f"Stages reused: {engine.stats()['reused_stages']}, same data: {same_data}")
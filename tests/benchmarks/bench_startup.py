@@ -0,0 +1,128 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def profile_imports(app_dir, cwd, report_path, top):
+    """
+    Profiling the import of the API module with "python -X importtime", saving the raw report and printing the slowest imports
+
+    Args:
+        - app_dir (str): Directory holding api.py
+        - cwd (str): Working directory the API is started from
+        - report_path (str): Where the raw importtime report is written
+        - top (int): Number of imports to print, slowest cumulative time first
+    """
+
+    # Importing the API module exactly as uvicorn would, capturing the importtime lines written to stderr
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import sys; sys.path.insert(0, {app_dir!r}); import api'],
+                               cwd = cwd, capture_output = True, text = True)
+    import_lines = [line for line in completed.stderr.splitlines() if line.startswith('import time:')]
+    with open(report_path, 'w') as f:
+        f.write('\n'.join(import_lines) + '\n')
+    if completed.returncode != 0:
+        raise RuntimeError(f'Importing the API failed:\n{completed.stderr[-2000:]}')
+
+    # Parsing the "self | cumulative | module" columns, skipping the header line
+    imports = []
+    for line in import_lines[1:]:
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        imports.append((int(cumulative_us), int(self_us), module.rstrip()))
+
+    print(f'Import profile written to {report_path}; slowest imports of api.py by cumulative time:')
+    print(f"{'cumulative (ms)':>15} | {'self (ms)':>9} | module")
+    for cumulative_us, self_us, module in sorted(imports, reverse = True)[:top]:
+        print(f'{cumulative_us / 1000:>15.1f} | {self_us / 1000:>9.1f} | {module}')
+
+
+
+def get_status(url):
+    # Getting the status code of a GET request, or None while nothing is listening yet
+    try:
+        with urllib.request.urlopen(url, timeout = 1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None
+
+
+
+def time_startup(app_dir, cwd, startup_mode, timeout):
+    """
+    Starting the API under uvicorn and timing how long it takes to pass its liveness (/ping) and readiness (/ready) checks
+
+    Args:
+        - app_dir (str): Directory holding api.py
+        - cwd (str): Working directory the API is started from
+        - startup_mode (str): The STARTUP_MODE the API is started in ("eager" or "deferred")
+        - timeout (float): Seconds to wait for readiness before giving up
+
+    Returns:
+        - live_seconds (float): Seconds from launch until /ping first answered 200
+        - ready_seconds (float): Seconds from launch until /ready first answered 200
+    """
+
+    # Reserving a free port for this run
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    # Launching uvicorn with the requested startup mode
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1', '--port', str(port), '--app-dir', app_dir, 'api:api'],
+                              cwd = cwd, env = dict(os.environ, STARTUP_MODE = startup_mode),
+                              stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+
+    # Polling both health checks until the API is ready
+    live_seconds, ready_seconds = None, None
+    try:
+        while ready_seconds is None and time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f'uvicorn exited with code {server.returncode} during startup.')
+            if live_seconds is None and get_status(f'http://127.0.0.1:{port}/ping') == 200:
+                live_seconds = time.perf_counter() - start
+            if live_seconds is not None and get_status(f'http://127.0.0.1:{port}/ready') == 200:
+                ready_seconds = time.perf_counter() - start
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return live_seconds, ready_seconds
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Profiles the API imports and times liveness and readiness for each startup mode')
+    parser.add_argument('--app-dir', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-inference-ui'))
+    parser.add_argument('--cwd', default = None, help = 'Working directory for the API (defaults to the app directory, as when run locally)')
+    parser.add_argument('--importtime-report', default = 'api_importtime.txt')
+    parser.add_argument('--top', type = int, default = 20)
+    parser.add_argument('--repeats', type = int, default = 3)
+    parser.add_argument('--timeout', type = float, default = 120.0)
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app_dir)
+    cwd = args.cwd or app_dir
+
+    # Profiling the imports paid before the app can answer anything
+    profile_imports(app_dir, cwd, os.path.abspath(args.importtime_report), args.top)
+
+    # Timing both startup modes
+    print(f"\n{'mode':>8} | {'run':>3} | {'live (s)':>8} | {'ready (s)':>9}")
+    for startup_mode in ['eager', 'deferred']:
+        for run in range(args.repeats):
+            live_seconds, ready_seconds = time_startup(app_dir, cwd, startup_mode, args.timeout)
+            print(f'{startup_mode:>8} | {run:>3} | {live_seconds:>8.2f} | {ready_seconds:>9.2f}')
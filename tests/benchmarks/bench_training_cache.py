@@ -0,0 +1,91 @@
+# Importing the necessary Python libraries
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+import pandas as pd
+
+# Importing the model training code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-training'))
+from train import train, DEFAULT_CLASSIFIER_PARAMS, DEFAULT_REGRESSOR_PARAMS
+from helpers import flatten_forest_classifier, save_movie_rating_model_arrays
+from training_cache import (TrainingCache, build_training_manifest, hash_training_data, training_code_version,
+                            training_fingerprint)
+
+
+
+## BENCHMARK SUPPORT
+## ---------------------------------------------------------------------------------------------------------------------
+def build_history(all_data, n_movies):
+    # Repeating all_data.csv under unique titles to the given number of movies
+    df = pd.concat([all_data] * (n_movies // len(all_data) + 1), ignore_index = True).head(n_movies).copy()
+    df['movie_name'] = [f'{movie_name} #{i}' for i, movie_name in enumerate(df['movie_name'])]
+    return df
+
+
+
+def fingerprint_run(df_raw, training_config):
+    # Fingerprinting a run the way train.py does
+    data_hash = hash_training_data(df_raw)
+    code_version = training_code_version(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../src/model-training'))
+    return training_fingerprint(data_hash, training_config, code_version), data_hash, code_version
+
+
+
+def train_and_cache(df_raw, training_config, training_cache, model_dir, output_data_dir):
+    # Training, saving and caching the artifacts the way a run with a cache miss does
+    start = time.perf_counter()
+    fingerprint, data_hash, code_version = fingerprint_run(df_raw, training_config)
+    movie_rating_model = flatten_forest_classifier(train(df_raw), X_check = df_raw.drop(columns = ['biehn_yes_or_no', 'biehn_scale_rating']))
+    save_movie_rating_model_arrays(movie_rating_model, model_dir)
+    manifest = build_training_manifest(fingerprint, data_hash, training_config, code_version, {'csv': 'all_data.csv'},
+                                       len(df_raw), {}, time.perf_counter() - start)
+    training_cache.store(fingerprint, model_dir, output_data_dir, manifest)
+    return time.perf_counter() - start
+
+
+
+def reuse_from_cache(df_raw, training_config, training_cache, model_dir, output_data_dir):
+    # Fingerprinting and restoring the cached artifacts the way a run with unchanged inputs does
+    start = time.perf_counter()
+    fingerprint, _, _ = fingerprint_run(df_raw, training_config)
+    hit = training_cache.lookup(fingerprint) is not None
+    training_cache.restore(fingerprint, model_dir, output_data_dir)
+    return time.perf_counter() - start, hit
+
+
+
+## SCRIPT INSTANTIATION
+## ---------------------------------------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    # Parsing the benchmark options
+    parser = argparse.ArgumentParser(description = 'Compares a full training run with reusing the cached artifacts of unchanged inputs')
+    parser.add_argument('--data-path', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/raw/all_data.csv'))
+    parser.add_argument('--movies', type = int, nargs = '+', default = [137, 10000, 50000])
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+    all_data = pd.read_csv(args.data_path)
+    training_config = {'classifier_params': DEFAULT_CLASSIFIER_PARAMS, 'regressor_params': DEFAULT_REGRESSOR_PARAMS, 'search_config': None}
+
+    results = []
+    for n_movies in args.movies:
+        work_dir = tempfile.mkdtemp()
+        model_dir, output_data_dir = os.path.join(work_dir, 'model'), os.path.join(work_dir, 'output/data')
+        os.makedirs(model_dir)
+        training_cache = TrainingCache(os.path.join(work_dir, 'checkpoints/training_cache'))
+        df_raw = build_history(all_data, n_movies)
+
+        # Timing the first run, which trains, then the unchanged rerun into an emptied model directory
+        training_seconds = train_and_cache(df_raw, training_config, training_cache, model_dir, output_data_dir)
+        shutil.rmtree(model_dir)
+        reuse_seconds, hit = reuse_from_cache(df_raw, training_config, training_cache, model_dir, output_data_dir)
+        results.append((n_movies, training_seconds, reuse_seconds, hit))
+        shutil.rmtree(work_dir)
+
+    # Reporting both runs side by side
+    print(f"{'movies':>7} | {'train + cache':>13} | {'reuse':>7} | {'speedup':>8} | cache hit")
+    for n_movies, training_seconds, reuse_seconds, hit in results:
+        print(f'{n_movies:>7} | {training_seconds:>12.2f}s | {reuse_seconds:>6.3f}s | {training_seconds / reuse_seconds:>7.1f}x | {hit}')
@@ -6,22 +6,27 @@ cd ../../
 # Moving data from data directory into sagemaker_dir
 echo 'Moving the data into the input directory...'
 cp data/raw/all_data.csv tests/sagemaker_dir/input/data/all_data.csv
+if [ -d data/raw/all_data ]; then cp -r data/raw/all_data tests/sagemaker_dir/input/data/all_data; fi
 
 # Building the Docker image from the Dockerfile
 echo 'Rebuilding the Docker image...'
 docker build -t movie-ratings-model:dev .
 
-# Running the Docker container while mounting the sagemaker_dir
+# Running the Docker container while mounting the sagemaker_dir (EXPORT_CSV=1 so all_data.csv is written even when no review changed)
 echo 'Running the Docker image for data engineering...'
-docker run -v $(pwd)/tests/sagemaker_dir:/opt/ml movie-ratings-model:dev preprocess
+docker run -e EXPORT_CSV=1 -v $(pwd)/tests/sagemaker_dir:/opt/ml movie-ratings-model:dev preprocess
 
 # Moving outputs on job completion into appropriate data directory
 echo 'Moving the outputs into appropriate final directory...'
 mv tests/sagemaker_dir/output/caelan_reviews.csv data/raw/caelan_reviews.csv
 mv tests/sagemaker_dir/output/all_data.csv data/raw/all_data.csv
+mkdir -p data/raw/all_data
+if [ -d tests/sagemaker_dir/output/all_data ]; then mv tests/sagemaker_dir/output/all_data/part-*.parquet data/raw/all_data/ 2>/dev/null; fi
+if [ -f tests/sagemaker_dir/output/all_data/review_index.json ]; then mv tests/sagemaker_dir/output/all_data/review_index.json data/raw/all_data/review_index.json; fi
 
 # Deleting data from sagemaker_dir
 echo 'Deleting data from sagemaker_dir...'
 rm tests/sagemaker_dir/input/data/all_data.csv
+rm -rf tests/sagemaker_dir/input/data/all_data
 
 echo 'Data engineering local test complete!'
\ No newline at end of file
@@ -0,0 +1,4 @@
+curl --request POST \
+--header 'Content-Type: application/json' \
+--data @../test_json/batch_movies.json \
+--url http://0.0.0.0:8080/invocations/batch
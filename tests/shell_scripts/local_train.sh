@@ -6,6 +6,7 @@ cd ../../
 # Copying the data into the proper SageMaker test directory
 echo 'Moving the training data to proper directory...'
 cp data/raw/all_data.csv tests/sagemaker_test_dir/input/data/train/all_data.csv
+if [ -d data/raw/all_data ]; then cp -r data/raw/all_data tests/sagemaker_test_dir/input/data/train/all_data; fi
 
 # Building the Docker container
 echo 'Building the Docker container...'
@@ -17,12 +18,14 @@ docker run -v $(pwd)/tests/sagemaker_test_dir/:/opt/ml/ movie-ratings-model:dev
 
 # Moving the trained artifacts into the "models" directory
 echo 'Moving the model artifacts...'
-mv tests/sagemaker_test_dir/model/binary_classification_pipeline.pkl models/binary_classification_pipeline.pkl
-mv tests/sagemaker_test_dir/model/regression_pipeline.pkl models/regression_pipeline.pkl
+mv tests/sagemaker_test_dir/model/movie_rating_model.pkl models/movie_rating_model.pkl
+rm -rf models/movie_rating_model
+mv tests/sagemaker_test_dir/model/movie_rating_model models/movie_rating_model
 
 # Removing the training data from the SageMaker test directory
 echo 'Cleaning up training data...'
 rm tests/sagemaker_test_dir/input/data/train/all_data.csv
+rm -rf tests/sagemaker_test_dir/input/data/train/all_data
 
 # Printing statement to note train job completion
 echo 'Model training complete!'
\ No newline at end of file